@@ -0,0 +1,44 @@
+import pytest
+
+import items
+
+def full_frame(g):
+    g.renderer.invalidate_all()
+    g.draw()
+
+def bench_draw_ground(benchmark, world):
+    world.role = 'GROUND'
+    benchmark(full_frame, world)
+
+def bench_draw_ground_idle(benchmark, world):
+    # Nothing changed: the dirty-rect path should do (almost) no work
+    world.role = 'GROUND'
+    world.draw()
+    benchmark(world.draw)
+
+@pytest.mark.parametrize('zoom', [0.5, 1.0, 2.0, 3.0])
+def bench_draw_sky(benchmark, world, zoom):
+    world.role = 'SKY'
+    world.sky_zoom = zoom
+    benchmark(full_frame, world)
+    world.role = 'GROUND'
+    world.sky_zoom = 1.0
+
+def full_inventory(g):
+    inv = g.player.inventory
+    for i in range(inv.size): inv.set(i, i % len(items.NAMES), 1 + i)
+    g.win_inv.set_target(g.add_building(1, 1, 'furnace'))
+    g.win_inv.visible = True
+    return g.win_inv
+
+def bench_inventory_window_render(benchmark, game):
+    win = full_inventory(game)
+    def redraw():
+        win.invalidate()
+        win.draw(game.screen)
+    benchmark(redraw)
+
+def bench_inventory_window_cached(benchmark, game):
+    win = full_inventory(game)
+    win.draw(game.screen)
+    benchmark(win.draw, game.screen)
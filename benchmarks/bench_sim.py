@@ -0,0 +1,45 @@
+import pytest
+
+import main
+import items
+from ore import OreField
+from shard import ShardPool, FURNACE, LAB
+
+def bench_building_update_furnace(benchmark, game):
+    b = game.add_building(3, 3, 'furnace')
+    b.max_energy = b.energy = 10 ** 12
+    b.slots.set(main.INPUT, items.IRON_ORE, 64)
+    benchmark(b.update, game)
+
+def bench_building_update_idle(benchmark, game):
+    b = game.add_building(3, 3, 'furnace')
+    benchmark(b.update, game)
+
+def bench_game_update(benchmark, base):
+    benchmark(base.update)
+
+def bench_sky_beam_search(benchmark, base):
+    # Aim at empty space so the search scans everything and no energy moves
+    benchmark(base.input_sky_beam, -10000, -10000)
+
+@pytest.mark.parametrize('drills', [1000, 10000])
+def bench_ore_drills(benchmark, drills):
+    # The batched drill tick alone (delivery into output slots is per fired drill, see ore.py --drills)
+    side = int(drills ** 0.5 + 0.999)
+    field = OreField(side, side, main.DRILL_PERIOD)
+    for i in range(drills):
+        tile = (i % side, i // side)
+        field.seed(tile, items.IRON_ORE, 10 ** 9)
+        field.add_drill(type('Drill', (), {})(), tile)
+        field.now += 1
+    benchmark(field.update)
+
+@pytest.mark.parametrize('workers', [0, 2], ids=lambda w: f"{w}w")
+def bench_shard_tick(benchmark, workers):
+    # 100k furnaces/labs in shared memory; scaling over more cores: python src/shard.py
+    pool = ShardPool(workers, 100000)
+    for i in range(100000):
+        if i % 3 == 2: pool.add(type('Row', (), {})(), LAB, 10 ** 12, 0, items.IRON_BAR, 64, items.EMPTY, 0)
+        else: pool.add(type('Row', (), {})(), FURNACE, 10 ** 12, 0, items.IRON_ORE, 64, items.EMPTY, 0)
+    benchmark(pool.tick, main.DRAW_COST, main.PROCESS_MAX, main.DRAW_COST, main.LAB_CYCLE)
+    pool.close()
@@ -0,0 +1,31 @@
+import random
+
+import pygame
+import pytest
+
+import main
+from conftest import SEED
+from ore import OreField
+from statehash import StateHash
+
+def blank_game(w, h):
+    # Just the state generate_world fills in, so map size isn't tied to the frozen config
+    g = main.Game.__new__(main.Game)
+    g.seed, g.rng = SEED, random.Random(SEED)
+    g.map_w, g.map_h = w, h
+    g.tiles, g.resources = pygame.sprite.Group(), pygame.sprite.Group()
+    g.tile_map, g.tile_sprites = {}, {}
+    g.hasher = StateHash()
+    g.ore, g.ore_sprites, g.res_sprites = OreField(w, h), {}, {}
+    return g
+
+@pytest.mark.parametrize('size', [40, 80, 160])
+def bench_generate_world(benchmark, size):
+    benchmark.pedantic(lambda g: g.generate_world(), setup=lambda: ((blank_game(size, size),), {}), rounds=5)
+
+def bench_blueprint_paste(benchmark):
+    # 1000 buildings in one bulk insert: belt rows laid against their flow, poles and furnaces
+    def setup():
+        cells = [(x, y, 'belt' if y % 4 == 0 else 'pole' if x % 6 == 0 else 'furnace', (-1, 0)) for y in range(40) for x in range(25)]
+        return (main.Game(headless=True, seed=SEED), cells), {}
+    benchmark.pedantic(lambda g, cells: g.add_buildings(cells), setup=setup, rounds=5)
@@ -0,0 +1,47 @@
+# Headless benchmark suite (pytest-benchmark). Run from the repo root or from benchmarks/:
+#   python -m pytest benchmarks                       # run + autosave to benchmarks/.results
+#   python -m pytest benchmarks --benchmark-compare   # compare against the last saved run
+#   python -m pytest benchmarks --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+import pytest
+import main
+import items
+
+SEED = 1234
+RESULTS = os.path.join(ROOT, 'benchmarks', '.results')
+
+def pytest_configure(config):
+    # Saved runs go to benchmarks/.results whatever the working directory, unless --benchmark-storage says otherwise
+    if config.getoption('benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + RESULTS
+
+def populate(g, n):
+    # n machines in a square block, powered by their own local buffers so every tick does work
+    side = max(1, int(n ** 0.5 + 0.999))
+    kinds = ('furnace', 'furnace', 'science_lab', 'solar')
+    for i in range(n):
+        b = g.add_building(i % side, i // side, kinds[i % len(kinds)])
+        b.max_energy = b.energy = 10 ** 12
+        if b.b_type == 'furnace': b.slots.set(main.INPUT, items.IRON_ORE, 64)
+        elif b.b_type == 'science_lab': b.slots.set(main.INPUT, items.IRON_BAR, 64)
+    return g
+
+@pytest.fixture(scope='session')
+def world():
+    return main.Game(headless=True, seed=SEED)
+
+@pytest.fixture
+def game():
+    return main.Game(headless=True, seed=SEED)
+
+@pytest.fixture(scope='module', params=[10, 1000, 10000], ids=lambda n: f"{n}b")
+def base(request):
+    return populate(main.Game(headless=True, seed=SEED), request.param)
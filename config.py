@@ -0,0 +1,133 @@
+import argparse
+import json
+import math
+import os
+
+# --- DEFAULTS ---
+# name: (type, default, help)
+FIELDS = {
+    'screen_width':   (int,   1180, "Window width in pixels"),
+    'screen_height':  (int,   720,  "Window height in pixels"),
+    'tile_size':      (int,   32,   "Tile edge in pixels"),
+    'fps':            (int,   60,   "Frame / tick rate"),
+    'map_w':          (int,   80,   "Map width in tiles"),
+    'map_h':          (int,   80,   "Map height in tiles"),
+    'seed':           (int,   -1,   "World seed (-1 = random)"),
+    'player_speed':   (int,   4,    "GROUND move speed in px per tick"),
+    'process_max':    (int,   120,  "Furnace ticks per bar"),
+    'lab_cycle':      (int,   180,  "Science lab ticks per data"),
+    'max_energy':     (int,   500,  "Energy buffer per building"),
+    'start_energy':   (float, 100,  "Global energy at start"),
+    'beam_range':     (float, 150,  "Sky beam reach in world px"),
+    'beam_amount':    (float, 5,    "Energy moved per beam shot"),
+    'regen_base':     (float, 0.1,  "Global regen per tick"),
+    'regen_upgraded': (float, 0.5,  "Global regen per tick with regen upgrade"),
+    'solar_regen':    (float, 0.2,  "Extra regen per solar per tick"),
+    'energy_cap':     (float, 100,  "Global energy cap"),
+    'energy_cap_upgraded': (float, 200, "Global energy cap with capacity upgrade"),
+    'efficiency_mod': (float, 1.5,  "Furnace speed multiplier with efficiency upgrade"),
+    'solar_power':    (float, 1.0,  "Energy per tick a grid-connected solar supplies"),
+    'pole_reach':     (int,   6,    "Max tile distance between wired power poles"),
+    'pole_supply':    (int,   2,    "Tile radius a power pole connects machines in"),
+    'ore_amount':     (int,   400,  "Mean ore units in one ore tile"),
+    'drill_period':   (int,   60,   "Mining drill ticks per ore unit"),
+    'lod_region':     (int,   16,   "Simulation LOD region edge in tiles"),
+    'lod_every':      (int,   8,    "Ticks between catch-ups of regions far from both players (1 = off)"),
+    'sim_workers':    (int,   0,    "Processes ticking far regions from shared memory (0 = LOD catch-up instead)"),
+    'hash_every':     (int,   60,   "Ticks between state hash exchanges"),
+    'hud_messages':   (int,   6,    "Notification lines shown at once"),
+    'input_delay':    (int,   4,    "Lockstep: ticks between reading input and running it on both peers"),
+}
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'terrasky.json')
+
+class ConfigError(ValueError):
+    pass
+
+class Config:
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, **values):
+        for name, (typ, default, _) in FIELDS.items():
+            object.__setattr__(self, name, coerce(name, values.get(name, default)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Config is frozen")
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+def coerce(name, value):
+    if name not in FIELDS: raise ConfigError(f"Unknown config key '{name}'")
+    typ = FIELDS[name][0]
+    if isinstance(value, bool): raise ConfigError(f"{name}: expected {typ.__name__}, got bool")
+    if typ is int and isinstance(value, float) and not value.is_integer():
+        raise ConfigError(f"{name}: expected int, got {value!r}")
+    try:
+        return typ(value)
+    except (TypeError, ValueError):
+        raise ConfigError(f"{name}: expected {typ.__name__}, got {value!r}")
+
+def validate(cfg):
+    for name in ('screen_width', 'screen_height', 'tile_size', 'fps', 'map_w', 'map_h', 'process_max', 'lab_cycle', 'max_energy', 'hash_every', 'pole_reach', 'pole_supply', 'drill_period', 'lod_region', 'lod_every', 'hud_messages', 'input_delay'):
+        if getattr(cfg, name) <= 0: raise ConfigError(f"{name} must be > 0")
+    for name in ('player_speed', 'efficiency_mod'):
+        if not getattr(cfg, name) > 0: raise ConfigError(f"{name} must be > 0")
+    for name in ('start_energy', 'beam_range', 'beam_amount', 'regen_base', 'regen_upgraded', 'solar_regen', 'energy_cap', 'energy_cap_upgraded', 'solar_power', 'ore_amount', 'sim_workers'):
+        v = getattr(cfg, name)
+        if not (v >= 0 and math.isfinite(v)): raise ConfigError(f"{name} must be >= 0")
+    return cfg
+
+def read_file(path):
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict): raise ConfigError(f"{path}: top level must be an object")
+    return data
+
+def build_parser():
+    p = argparse.ArgumentParser(description="TerraSky", allow_abbrev=False)
+    p.add_argument('--config', help="JSON config file (default: terrasky.json if present)")
+    p.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help="Override any config key")
+    for name, (typ, _, hlp) in FIELDS.items():
+        p.add_argument('--' + name.replace('_', '-'), dest=name, type=typ, default=None, help=hlp)
+    return p
+
+def parse(argv=None, overrides=None, parser=None):
+    parser = parser or build_parser()
+    args, _ = parser.parse_known_args(argv)
+
+    # Precedence: defaults < file < overrides (launcher) < --set < named flags
+    values = {}
+    path = args.config or (DEFAULT_FILE if os.path.exists(DEFAULT_FILE) else None)
+    if path: values.update(read_file(path))
+    values.update(overrides or {})
+    for item in args.set:
+        if '=' not in item: raise ConfigError(f"--set expects KEY=VALUE, got '{item}'")
+        k, v = item.split('=', 1)
+        values[k.strip()] = v.strip()
+    for name in FIELDS:
+        v = getattr(args, name)
+        if v is not None: values[name] = v
+    for k in values: coerce(k, values[k]) # Reject unknown keys early
+    return validate(Config(**values))
+
+# --- GLOBAL INSTANCE ---
+# Loaded once at startup. Modules copy the fields they need into their own
+# module-level constants, so hot loops never touch this object.
+_active = None
+
+def load(argv=None, overrides=None):
+    global _active
+    _active = parse(argv, overrides)
+    return _active
+
+def install(values):
+    # Replace the active config wholesale (e.g. with the one stored in a replay)
+    global _active
+    _active = validate(Config(**values))
+    return _active
+
+def get():
+    global _active
+    if _active is None: _active = parse()
+    return _active
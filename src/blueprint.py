@@ -0,0 +1,45 @@
+from collections import Counter
+
+# --- BLUEPRINTS ---
+# A blueprint is the buildings of a captured rectangle, stored relative to its
+# top-left tile as (dx, dy, b_type, dir) in row-major order. Placing one is a
+# single transaction on the game side (Game.build): every tile is
+# checked against the occupancy grid and the whole bill against the
+# inventory before anything is paid for or built.
+
+def bill(b_types, costs):
+    # Total cost of building b_types as {item_id: count}; costs: b_type -> [(item_id, count)]
+    total = Counter()
+    for b_type, n in Counter(b_types).items():
+        for item_id, c in costs[b_type]: total[item_id] += c * n
+    return total
+
+class Blueprint:
+    def __init__(self, entries, w, h):
+        self.entries = entries
+        self.w, self.h = w, h
+
+    @classmethod
+    def capture(cls, occupancy, x0, y0, x1, y1):
+        # occupancy: (tx, ty) -> building; corners are inclusive and may come in any order
+        x0, x1 = sorted((x0, x1))
+        y0, y1 = sorted((y0, y1))
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(occupancy):
+            hits = ((x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1) if (x, y) in occupancy)
+        else: # Sparse base, big box: filter the buildings instead of probing every tile
+            hits = sorted((t for t in occupancy if x0 <= t[0] <= x1 and y0 <= t[1] <= y1), key=lambda t: (t[1], t[0]))
+        entries = []
+        for x, y in hits:
+            b = occupancy[(x, y)]
+            entries.append((x - x0, y - y0, b.b_type, b.dir))
+        return cls(entries, x1 - x0 + 1, y1 - y0 + 1)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def bill(self, costs):
+        return bill((e[2] for e in self.entries), costs)
+
+    def cells(self, ox, oy):
+        # [(gx, gy, b_type, dir)] with the top-left corner at (ox, oy)
+        return [(ox + dx, oy + dy, t, d) for dx, dy, t, d in self.entries]
@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# --- LOAD-GENERATOR BOTS ---
+# Bots speak the normal client protocol over any transport (loopback or
+# socket) and script plausible play from the snapshots they receive.
+
+# Screen positions of the default (undragged) windows, see InventoryWindow / RecipeWindow
+RECIPE_BTN = (600, 170)  # First recipe button centre; +50 px per row
+INV_SLOT0 = (140, 270)   # First inventory slot centre
+MACH_IN = (205, 185)     # Machine input slot centre
+
+class Bot:
+    def __init__(self, transport, session, role, seed):
+        self.t = transport
+        self.rng = random.Random(seed)
+        self.role = role
+        self.plan = []
+        self.player = None
+        self.buildings = []
+        transport.send({'t': 'join', 'session': session, 'role': role})
+
+    def observe(self):
+        for msg in self.t.poll():
+            if msg.get('t') == 'state':
+                self.player = msg['player']
+                self.buildings = msg['buildings']
+
+    def step(self):
+        self.observe()
+        if not self.plan: self.think()
+        cmds = self.plan.pop(0) if self.plan else []
+        if cmds: self.t.send({'t': 'cmd', 'cmds': cmds})
+
+class GroundBot(Bot):
+    def __init__(self, transport, session, seed):
+        super().__init__(transport, session, 'GROUND', seed)
+        import main
+        self.recipe_count = len(main.RECIPES)
+
+    def walk_to(self, tx, ty, limit=200):
+        px, py = self.player
+        for _ in range(limit):
+            dx = 4 if tx > px else -4 if tx < px else 0
+            dy = 4 if ty > py else -4 if ty < py else 0
+            if not dx and not dy: break
+            px, py = px + dx, py + dy
+            self.plan.append([('move', dx, dy)])
+
+    def think(self):
+        roll = self.rng.random()
+        furnaces = [b for b in self.buildings if b[2] == 'furnace']
+        if roll < 0.15:
+            # Build something via the construction window
+            i = self.rng.randrange(self.recipe_count)
+            self.plan += [[('recipes',)], [('mdown', RECIPE_BTN[0], RECIPE_BTN[1] + i * 50, 1)], [('recipes',)]]
+        elif roll < 0.4 and furnaces and self.player:
+            # Walk up to a furnace and move the first inventory stack into it
+            b = self.rng.choice(furnaces)
+            self.walk_to(b[0] + 6, b[1] + 6)
+            self.plan += [[('inv',)], [('mdown', INV_SLOT0[0], INV_SLOT0[1], 1)],
+                          [('mdown', MACH_IN[0], MACH_IN[1], 1)],
+                          [('mdown', INV_SLOT0[0], INV_SLOT0[1], 1)], [('inv',)]]
+        else:
+            # Wander and harvest whatever is underfoot
+            dx, dy = self.rng.choice((-4, 0, 4)), self.rng.choice((-4, 0, 4))
+            for i in range(self.rng.randint(20, 40)):
+                self.plan.append([('move', dx, dy), ('harvest',)] if i % 8 == 0 else [('move', dx, dy)])
+
+class SkyBot(Bot):
+    def __init__(self, transport, session, seed):
+        super().__init__(transport, session, 'SKY', seed)
+
+    def think(self):
+        roll = self.rng.random()
+        if roll < 0.1:
+            self.plan.append([('zoom', self.rng.choice((-1, 1)))])
+        elif roll < 0.4:
+            dx, dy = self.rng.uniform(-10, 10), self.rng.uniform(-10, 10)
+            self.plan += [[('pan', dx, dy)] for _ in range(self.rng.randint(5, 20))]
+        elif self.buildings:
+            b = self.rng.choice(self.buildings)
+            for _ in range(self.rng.randint(3, 10)):
+                self.plan += [[('beam', b[0] + 16, b[1] + 16)], [], [], []]
+        else:
+            self.plan += [[] for _ in range(10)]
+
+# --- DRIVER ---
+
+def percentile(sorted_vals, p):
+    if not sorted_vals: return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(p / 100.0 * len(sorted_vals)))]
+
+def run_load(n_bots, ticks, fps, seed=0):
+    import network
+    hub = network.LoopbackHub()
+    bots = []
+    for i in range(n_bots):
+        sid = f"load-{i // 2}" # Each session gets a GROUND and a SKY bot
+        cls = GroundBot if i % 2 == 0 else SkyBot
+        bots.append(cls(hub.connect(), sid, seed * 100003 + i))
+
+    tick_ns = []
+    for _ in range(ticks):
+        for b in bots: b.step()
+        t0 = time.perf_counter_ns()
+        hub.tick()
+        tick_ns.append(time.perf_counter_ns() - t0)
+
+    secs = ticks / fps # Simulated seconds
+    tick_ns.sort()
+    ms = [percentile(tick_ns, p) / 1e6 for p in (50, 95, 99, 100)]
+    up = sum(b.t.bytes_out for b in bots); down = sum(b.t.bytes_in for b in bots)
+    m_up = sum(b.t.msgs_out for b in bots); m_down = sum(b.t.msgs_in for b in bots)
+    return {'bots': n_bots, 'sessions': len(hub.sessions), 'ticks': ticks,
+            'p50': ms[0], 'p95': ms[1], 'p99': ms[2], 'max': ms[3],
+            'kbps_in': up / 1024 / secs, 'kbps_out': down / 1024 / secs,
+            'msgs_in': m_up / secs, 'msgs_out': m_down / secs}
+
+def main(argv=None):
+    import config
+    p = argparse.ArgumentParser(description="Loopback load test for the TerraSky server", allow_abbrev=False)
+    p.add_argument('--bots', type=int, nargs='+', default=[1, 10, 100, 1000])
+    p.add_argument('--ticks', type=int, default=600)
+    args, _ = p.parse_known_args(argv)
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    fps = config.get().fps
+
+    print(f"{'bots':>6} {'sess':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'in KB/s':>9} {'out KB/s':>9} {'in msg/s':>9} {'out msg/s':>9}")
+    for n in args.bots:
+        r = run_load(n, args.ticks, fps)
+        print(f"{r['bots']:>6} {r['sessions']:>5} {r['p50']:>8.3f} {r['p95']:>8.3f} {r['p99']:>8.3f} {r['max']:>8.3f} "
+              f"{r['kbps_in']:>9.1f} {r['kbps_out']:>9.1f} {r['msgs_in']:>9.0f} {r['msgs_out']:>9.0f}")
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
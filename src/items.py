@@ -0,0 +1,119 @@
+from array import array
+
+# --- ITEM REGISTRY ---
+# Items are interned to small integer ids; everything hot works on ids and
+# only the UI / logs turn them back into names.
+EMPTY = -1
+DEFAULT_STACK = 64
+
+NAMES = []      # id -> name
+IDS = {}        # name -> id
+STACK = []      # id -> stack limit
+SMELTS_TO = []  # id -> furnace output id (EMPTY if not smeltable)
+
+def register(name, stack=DEFAULT_STACK):
+    if name in IDS: return IDS[name]
+    IDS[name] = len(NAMES)
+    NAMES.append(name)
+    STACK.append(stack)
+    SMELTS_TO.append(EMPTY)
+    return IDS[name]
+
+WOOD = register('wood')
+STONE = register('stone')
+IRON_ORE = register('iron_ore')
+COPPER_ORE = register('copper_ore')
+IRON_BAR = register('iron_bar')
+COPPER_BAR = register('copper_bar')
+
+SMELTS_TO[IRON_ORE] = IRON_BAR
+SMELTS_TO[COPPER_ORE] = COPPER_BAR
+
+# --- INVENTORY ---
+
+class Inventory:
+    # Fixed number of slots stored as two parallel int arrays. Every slot
+    # write goes through set(), which keeps per-item totals and tells
+    # listeners (cb(inventory, slot_index)) exactly which slot changed.
+    def __init__(self, size):
+        self.size = size
+        self.ids = array('i', [EMPTY]) * size
+        self.counts = array('i', [0]) * size
+        self.totals = {}
+        self.listeners = []
+
+    def set(self, i, item_id, count):
+        if count <= 0: item_id, count = EMPTY, 0
+        old_id, old_n = self.ids[i], self.counts[i]
+        if old_id == item_id and old_n == count: return
+        if old_id != EMPTY: self.totals[old_id] -= old_n
+        if item_id != EMPTY: self.totals[item_id] = self.totals.get(item_id, 0) + count
+        self.ids[i] = item_id
+        self.counts[i] = count
+        for cb in self.listeners: cb(self, i)
+
+    def count(self, item_id):
+        return self.totals.get(item_id, 0)
+
+    def add(self, item_id, n):
+        # Tops up existing stacks, then fills empty slots. Returns what didn't fit.
+        limit = STACK[item_id]
+        ids, counts = self.ids, self.counts
+        for i in range(self.size):
+            if n <= 0: return 0
+            if ids[i] == item_id and counts[i] < limit:
+                k = min(n, limit - counts[i])
+                self.set(i, item_id, counts[i] + k)
+                n -= k
+        for i in range(self.size):
+            if n <= 0: return 0
+            if ids[i] == EMPTY:
+                k = min(n, limit)
+                self.set(i, item_id, k)
+                n -= k
+        return max(n, 0)
+
+    def remove(self, item_id, n):
+        # All-or-nothing; takes from the last slots first
+        if self.count(item_id) < n: return False
+        for i in range(self.size - 1, -1, -1):
+            if n <= 0: break
+            if self.ids[i] == item_id:
+                k = min(n, self.counts[i])
+                self.set(i, item_id, self.counts[i] - k)
+                n -= k
+        return True
+
+    def take(self, i, n=1):
+        self.set(i, self.ids[i], self.counts[i] - n)
+
+    def state(self):
+        return (tuple(self.ids), tuple(self.counts))
+
+# --- SLOT TRANSFERS (cursor <-> slot) ---
+
+def click_slot(cursor, inv, i):
+    # Pick up / place / stack (up to the stack limit) / swap, like the old swap_logic
+    c_id, c_n = cursor.ids[0], cursor.counts[0]
+    s_id, s_n = inv.ids[i], inv.counts[i]
+    if c_id == EMPTY:
+        if s_id == EMPTY: return
+        cursor.set(0, s_id, s_n); inv.set(i, EMPTY, 0)
+    elif s_id == EMPTY:
+        inv.set(i, c_id, c_n); cursor.set(0, EMPTY, 0)
+    elif c_id == s_id:
+        k = min(c_n, STACK[s_id] - s_n)
+        inv.set(i, s_id, s_n + k); cursor.set(0, c_id, c_n - k)
+    else:
+        inv.set(i, c_id, c_n); cursor.set(0, s_id, s_n)
+
+def take_slot(cursor, inv, i):
+    # Take-only slots (machine output): pick up, or merge into a matching cursor stack
+    c_id, c_n = cursor.ids[0], cursor.counts[0]
+    s_id, s_n = inv.ids[i], inv.counts[i]
+    if s_id == EMPTY: return
+    if c_id == EMPTY:
+        cursor.set(0, s_id, s_n); inv.set(i, EMPTY, 0)
+    elif c_id == s_id:
+        k = min(s_n, STACK[s_id] - c_n)
+        cursor.set(0, c_id, c_n + k); inv.set(i, s_id, s_n - k)
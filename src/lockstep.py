@@ -0,0 +1,148 @@
+import queue
+import socket
+import time
+
+from network import SocketTransport, ROLES, valid_cmd, cmd_limits, capped
+from statehash import DesyncDetector
+
+# --- LOCKSTEP CO-OP ---
+# Two peers, GROUND and SKY, each run the whole simulation and exchange only
+# their commands, {'t': 'in', 'tick': n, 'cmds': [...]}, so traffic does not
+# grow with the base. Input read at tick t is scheduled for tick t + delay and
+# sent at once; a tick runs when both peers' commands for it are in (GROUND's
+# applied first), otherwise that peer stalls for the frame. Simulation state is
+# integers (fixed-point energy, see main.ENERGY_ONE) and all randomness comes
+# from the seeded Game.rng, so the same commands give the same bits on both
+# sides. Hashes are still compared every hash_every ticks to catch divergence.
+#
+# Handshake: the host sends {'t': 'hello', 'seed', 'delay', 'role' (the
+# joiner's), 'config'}; the joiner refuses to start if any simulation setting
+# differs from its own. Commands are checked against network.COMMANDS on both
+# ends, so each peer only ever applies its own role's ops (no SKY clicks in
+# GROUND's windows); an 'in' frame out of sequence ends the game.
+LOCAL_KEYS = ('screen_width', 'screen_height', 'seed', 'input_delay') # May differ between peers
+
+class Lockstep:
+    def __init__(self, game, transport, role, delay, every):
+        self.game = game
+        self.t = transport
+        self.role = role
+        self.peer = ROLES[1 - ROLES.index(role)]
+        self.delay = delay
+        self.tick = 0          # Next tick to run
+        self.next_in = delay   # Tick the next local input is scheduled for; the first `delay` ticks have none
+        self.peer_in = delay   # Tick the peer's next input must be for (TCP keeps them in order)
+        self.held = []         # Local commands read while the window was full (stalled on the peer)
+        self.inputs = {r: dict.fromkeys(range(delay), ()) for r in ROLES} # role -> {tick: cmds}
+        self.detector = DesyncDetector(game.hasher, f"lockstep_{role}", every)
+        import config # Loaded by main already
+        self.limits = cmd_limits(config.get().player_speed)
+        self.stalls = 0        # Frames spent waiting for the peer
+        self.gone = False
+
+    def submit(self, cmds):
+        # Commands read this frame; they run on both peers `delay` ticks after the current one
+        self.held += [c for c in cmds if valid_cmd(c, self.role)] # Roles are fixed per peer; 'role' isn't a wire op
+        if self.next_in > self.tick + self.delay: return
+        cmds, self.held = capped(self.held, self.limits, {}), [] # Frames held while stalled share one tick's caps
+        self.inputs[self.role][self.next_in] = cmds
+        self.t.send({'t': 'in', 'tick': self.next_in, 'cmds': cmds})
+        self.next_in += 1
+
+    def poll(self):
+        for msg in self.t.poll():
+            t = msg.get('t') if isinstance(msg, dict) else None
+            if t == 'in':
+                tick, cmds = msg.get('tick'), msg.get('cmds')
+                if type(tick) is not int or tick != self.peer_in or not isinstance(cmds, list):
+                    return self.drop(f"bad input frame for tick {tick!r}, expected {self.peer_in}")
+                cmds = [tuple(c) for c in cmds if valid_cmd(c, self.peer)]
+                self.inputs[self.peer][tick] = capped(cmds, self.limits, {}) # One frame is one tick
+                self.peer_in += 1
+            elif t == 'hash' and self.detector.check(self.peer, msg) is False:
+                self.game.add_message(f"DESYNC at tick {msg['tick']}", 'warn')
+            elif t == 'bye': self.gone = True
+        if self.t.closed: self.gone = True
+
+    def drop(self, err):
+        print(f"Lockstep: dropping {self.peer}: {err}")
+        self.gone = True
+
+    def step(self):
+        # Runs the next tick if both inputs for it are in; False = stalled this frame
+        self.poll()
+        t = self.tick
+        if t not in self.inputs[self.peer]:
+            self.stalls += 1
+            return False
+        g = self.game
+        for role in ROLES: # Same order on both peers
+            cmds = self.inputs[role].pop(t)
+            if cmds:
+                g.role = role
+                g.apply_commands([tuple(c) for c in cmds]) # Local ones too: same tuples as the peer's
+        g.role = self.role
+        g.update()
+        self.tick = t + 1
+        if self.tick % self.detector.every == 0: g.sync_sim() # Hash the caught-up world
+        h = self.detector.local(self.tick)
+        if h: self.t.send(h)
+        return True
+
+# --- CONNECTING ---
+
+def host(port, role):
+    srv = socket.create_server(('', port))
+    print(f"Lockstep: waiting for the other player on port {port}")
+    sock, addr = srv.accept()
+    srv.close()
+    print(f"Lockstep: {addr[0]} joined as {ROLES[1 - ROLES.index(role)]}")
+    return SocketTransport(sock=sock)
+
+def join(addr, timeout=30):
+    h, _, port = addr.rpartition(':')
+    t = SocketTransport(h or '127.0.0.1', int(port))
+    # Exactly one message: the host's inputs may already be queued right behind its hello
+    try: msg = t.inbox.get(timeout=timeout)
+    except queue.Empty: raise ConnectionError(f"no hello from {addr}")
+    if msg.get('t') != 'hello': raise ConnectionError(f"{addr}: expected hello, got {msg.get('t')!r}")
+    return t, msg
+
+def check_config(mine, theirs):
+    bad = [k for k in mine if k not in LOCAL_KEYS and mine[k] != theirs.get(k)]
+    if bad: raise SystemExit("Lockstep: settings differ from the host's: " + ", ".join(f"{k} {mine[k]!r} != {theirs.get(k)!r}" for k in bad))
+
+def run(host_port=None, join_addr=None, role='GROUND'):
+    # Client entry point (main.py --lockstep-host PORT / --lockstep-join HOST:PORT)
+    import main, pygame
+    cfg = main.CFG
+    if join_addr:
+        t, hello = join(join_addr)
+        check_config(cfg.as_dict(), hello['config'])
+        role, delay = hello['role'], hello['delay']
+        g = main.Game(seed=hello['seed'])
+    else:
+        t = host(host_port, role)
+        delay = cfg.input_delay
+        g = main.Game()
+        t.send({'t': 'hello', 'seed': g.seed, 'delay': delay, 'role': ROLES[1 - ROLES.index(role)], 'config': cfg.as_dict()})
+    pygame.display.set_caption(f"TerraSky (lockstep, {role}, {delay} ticks input delay)")
+    g.role = role # Directly: the 'role' command would also hide windows on this side only
+    ls = Lockstep(g, t, role, delay, cfg.hash_every)
+    t0 = time.perf_counter()
+    try:
+        while not ls.gone:
+            ls.submit(g.poll_commands())
+            ls.step()
+            g.draw()
+            g.clock.tick(main.FPS)
+    except SystemExit:
+        pass
+    finally:
+        g.pathfinder.close()
+        try: t.send({'t': 'bye'})
+        except OSError: pass
+        t.close()
+        secs = max(time.perf_counter() - t0, 1e-9)
+        print(f"Lockstep: {ls.tick} ticks, {ls.stalls} stalled frames, {t.bytes_out / secs / 1024:.2f} KB/s up, "
+              f"{t.bytes_in / secs / 1024:.2f} KB/s down, {len(ls.detector.desyncs)} desyncs")
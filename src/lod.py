@@ -0,0 +1,102 @@
+import heapq
+from operator import attrgetter
+
+# --- SIMULATION LOD ---
+# Ticking buildings are bucketed into square regions of `size` tiles. A region
+# is hot while it overlaps a view (GROUND screen around the player, SKY
+# viewport) or is pinned (it holds a building on a power grid or next to a
+# belt, whose per-tick order matters, or the open machine window). Hot
+# regions tick every frame in building order. Cold ones sit out and later
+# advance by every tick they missed in one call (Building.advance), which is
+# exact; they catch up every `every` frames, staggered across regions, and
+# at once when they turn hot or something outside the tick touches them.
+# With an offload (shard.py) cold regions are instead handed over whole and
+# ticked every frame elsewhere, then handed back when they turn hot.
+UID = attrgetter('uid')
+
+def drain(e, a, limit):
+    # Up to `limit` ticks of "if e > 0: e -= a". Returns (e, ticks that ran). Energy is
+    # integer fixed-point (main.ENERGY_ONE), so one multiply equals n subtractions exactly.
+    if e <= 0 or limit <= 0: return e, 0
+    if a <= 0: return e, limit # Free running (never happens with the default tree)
+    n = min(limit, -(-e // a))
+    return e - n * a, n
+
+class RegionLOD:
+    def __init__(self, size=16, every=8, offload=None):
+        self.size = size
+        self.every = every
+        self.offload = offload # send(members) / recall(members) / pull(members) / tick()
+        self.out = set()       # Regions the offload currently holds
+        self.members = {} # region -> {building: None}, in insertion (= uid) order
+        self.synced = {}  # region -> last tick its members were simulated through
+        self.now = 0      # Last completed tick
+
+    def region_of(self, tile):
+        return (tile[0] // self.size, tile[1] // self.size)
+
+    def view(self, rect, tile_size):
+        # World pixel rect -> inclusive region bounds (rx0, ry0, rx1, ry1)
+        span = self.size * tile_size
+        return (rect[0] // span, rect[1] // span, (rect[0] + rect[2] - 1) // span, (rect[1] + rect[3] - 1) // span)
+
+    def add(self, b, tile):
+        r = self.region_of(tile)
+        self._recall(r)
+        if r not in self.members:
+            self.members[r] = {}
+            self.synced[r] = self.now
+        self.members[r][b] = None
+
+    def remove(self, b, tile):
+        r = self.region_of(tile)
+        self._recall(r)
+        del self.members[r][b]
+        if not self.members[r]:
+            del self.members[r]
+            del self.synced[r]
+
+    def lag(self, r):
+        return self.now - self.synced[r]
+
+    def _recall(self, r):
+        if r in self.out:
+            self.offload.recall(self.members[r])
+            self.out.discard(r)
+
+    def step(self, views, pinned, advance):
+        # Runs one tick. Calls advance(members, ticks) for cold regions that are due (and for the
+        # backlog of regions turning hot); returns hot buildings to update() this tick, in uid order.
+        now = self.now = self.now + 1
+        every = self.every
+        hot = []
+        for r, bs in self.members.items():
+            rx, ry = r
+            if every <= 1 or r in pinned or any(x0 <= rx <= x1 and y0 <= ry <= y1 for x0, y0, x1, y1 in views):
+                if r in self.out: self._recall(r)
+                elif now - self.synced[r] > 1: advance(bs, now - 1 - self.synced[r])
+                hot.append(bs)
+                self.synced[r] = now
+            elif self.offload is not None:
+                if r not in self.out:
+                    if now - self.synced[r] > 1: advance(bs, now - 1 - self.synced[r])
+                    self.offload.send(bs)
+                    self.out.add(r)
+                self.synced[r] = now # Ticked by the offload below
+            elif (rx * 7 + ry * 13 + now) % every == 0:
+                advance(bs, now - self.synced[r])
+                self.synced[r] = now
+        if self.offload is not None: self.offload.tick()
+        return hot[0] if len(hot) == 1 else heapq.merge(*hot, key=UID)
+
+    def sync(self, advance, region=None, pull=False):
+        # Bring lagging regions (or just one) up to the last completed tick. Offloaded regions are
+        # already current: a single region is taken back (it is about to be edited), and pull=True
+        # copies the rest into the buildings for reading.
+        for r in ([region] if region is not None else list(self.members)):
+            if r in self.out:
+                if region is not None: self._recall(r)
+                elif pull: self.offload.pull(self.members[r])
+            elif r in self.members and self.synced[r] < self.now:
+                advance(self.members[r], self.now - self.synced[r])
+                self.synced[r] = self.now
@@ -0,0 +1,284 @@
+import argparse
+import time
+from collections import deque
+
+from items import EMPTY
+
+# --- BELT SIMULATION ---
+# Belts are compiled into segments: maximal chains of belt tiles where each
+# tile feeds exactly the next one. A segment is a FIFO of [item_id, t_enter].
+# Items are never stepped individually; an item's position is implied by the
+# tick it entered, so a tick only looks at each segment's head and tail.
+TICKS_PER_TILE = 8
+ITEMS_PER_TILE = 4
+SPACING = TICKS_PER_TILE // ITEMS_PER_TILE # Minimum ticks between items
+
+DIRS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+def step(tile, d):
+    return (tile[0] + d[0], tile[1] + d[1])
+
+class Segment:
+    __slots__ = ('uid', 'path', 'items', 'travel', 'capacity', 'last_exit', 'source', 'sink', 'feeders', 'bounds')
+
+    def __init__(self, uid, path, tile_size):
+        self.uid = uid
+        self.path = path # [tile, ...] in travel order
+        self.items = deque() # [item_id, t_enter], oldest (front-most) first
+        self.last_exit = -SPACING
+        self.source = None # Building feeding the first tile
+        self.sink = None   # Segment or building after the last tile
+        self.feeders = []  # Segments whose sink is this one
+        self.measure(tile_size)
+
+    def measure(self, tile_size):
+        path = self.path
+        self.travel = len(path) * TICKS_PER_TILE
+        self.capacity = len(path) * ITEMS_PER_TILE
+        xs = [t[0] for t in path]; ys = [t[1] for t in path]
+        self.bounds = (min(xs) * tile_size, min(ys) * tile_size,
+                       (max(xs) - min(xs) + 1) * tile_size, (max(ys) - min(ys) + 1) * tile_size)
+
+    def can_accept(self, now):
+        it = self.items
+        return len(it) < self.capacity and (not it or now - it[-1][1] >= SPACING)
+
+    def positions(self, now):
+        # (item_id, ticks travelled) front first; queued items stop SPACING behind the one ahead
+        out = []
+        limit = self.travel
+        for item_id, t in self.items:
+            p = max(0, min(now - t, limit))
+            out.append((item_id, p))
+            limit = p - SPACING
+        return out
+
+    def hash_state(self):
+        return f"{self.path[0]},{len(self.path)},{[tuple(i) for i in self.items]},{self.last_exit}"
+
+class LogisticsNetwork:
+    # building_at(tile) -> object with belt_take() / belt_give(item_id), or None
+    def __init__(self, building_at=lambda tile: None, tile_size=32, hasher=None):
+        self.belts = {} # tile -> [dir, segment, index in segment path]
+        self.segments = {} # Segment -> None (insertion ordered for determinism)
+        self.building_at = building_at
+        self.tile_size = tile_size
+        self.hasher = hasher
+        self.now = 0
+        self.next_uid = 0
+        self.moving = [] # Segments whose items moved, entered or left this tick
+
+    # --- Topology ---
+
+    def place(self, tile, d):
+        self.belts[tile] = [d, None, 0]
+        if not self._extend(tile): self._relink(tile)
+
+    def place_many(self, belts):
+        # [(tile, dir)]: register every tile first, then rebuild each connected line once
+        # (placing one by one relinks a line per tile when it isn't laid in flow order)
+        if len(belts) == 1: return self.place(*belts[0])
+        for tile, d in belts: self.belts[tile] = [d, None, 0]
+        done = set()
+        for tile, _ in belts:
+            if tile in done: continue
+            done |= self._component(tile)
+            self._relink(tile)
+
+    def remove(self, tile):
+        # Returns the items that were on the removed tile
+        if tile not in self.belts: return []
+        return self._relink(tile, removed=True)
+
+    def endpoint_changed(self, tile):
+        # A machine appeared/disappeared at tile: re-resolve belts that touch it
+        for d in DIRS:
+            n = step(tile, d)
+            if n in self.belts: self._resolve(self.belts[n][1])
+
+    def _next(self, t):
+        n = step(t, self.belts[t][0])
+        return n if n in self.belts else None
+
+    def _upstream_count(self, t):
+        c = 0
+        for d in DIRS:
+            n = step(t, d)
+            if n in self.belts and step(n, self.belts[n][0]) == t: c += 1
+        return c
+
+    def _component(self, start):
+        # Belts connected to start through feed links in either direction
+        seen, todo = {start}, [start]
+        while todo:
+            t = todo.pop()
+            for d in DIRS:
+                n = step(t, d)
+                if n in seen or n not in self.belts: continue
+                if step(n, self.belts[n][0]) == t or step(t, self.belts[t][0]) == n:
+                    seen.add(n); todo.append(n)
+        return seen
+
+    def _extend(self, tile):
+        # Fast path for laying a line: the new belt continues exactly one segment's tail into free space
+        if self._next(tile) is not None: return False
+        ups = [n for n in (step(tile, d) for d in DIRS) if n in self.belts and self._next(n) == tile]
+        if len(ups) != 1: return False
+        _, seg, idx = self.belts[ups[0]]
+        if idx != len(seg.path) - 1 or seg.sink is seg: return False
+        self.belts[tile][1:] = [seg, len(seg.path)]
+        seg.path.append(tile)
+        seg.measure(self.tile_size)
+        self._resolve(seg)
+        return True
+
+    def _relink(self, tile, removed=False):
+        # Rebuild only the connected belt component around tile, carrying items over by position
+        now = self.now
+        starts = [tile] + [step(tile, d) for d in DIRS]
+        tiles = set()
+        for s in starts:
+            if s in self.belts and s not in tiles: tiles |= self._component(s)
+
+        old = {}
+        for t in tiles:
+            seg = self.belts[t][1]
+            if seg is not None: old[seg] = None
+        carried = []
+        outside_feeders = []
+        for seg in old:
+            for item_id, p in seg.positions(now):
+                k = min(int(p // TICKS_PER_TILE), len(seg.path) - 1)
+                carried.append((seg.path[k], p - k * TICKS_PER_TILE, item_id))
+            outside_feeders += [f for f in seg.feeders if f not in old]
+            if isinstance(seg.sink, Segment) and seg.sink not in old: seg.sink.feeders.remove(seg)
+            del self.segments[seg]
+            if self.hasher: self.hasher.remove(('seg', seg.uid))
+
+        dropped = []
+        if removed:
+            del self.belts[tile]
+            tiles.discard(tile)
+        new = self._build(sorted(tiles))
+
+        for t, off, item_id in carried:
+            if t not in self.belts:
+                dropped.append(item_id)
+                continue
+            _, seg, idx = self.belts[t]
+            seg.items.append([item_id, now - (idx * TICKS_PER_TILE + off)])
+        for seg in new:
+            if len(seg.items) > 1: seg.items = deque(sorted(seg.items, key=lambda i: i[1]))
+            self._resolve(seg)
+        for f in outside_feeders: self._resolve(f)
+        return dropped
+
+    def _build(self, tiles):
+        tset = set(tiles)
+        heads = [t for t in tiles if self._upstream_count(t) != 1]
+        placed = set()
+        new = []
+
+        def walk(h):
+            path = [h]
+            placed.add(h)
+            t = self._next(h)
+            while t is not None and t in tset and t not in placed and self._upstream_count(t) == 1:
+                path.append(t)
+                placed.add(t)
+                t = self._next(t)
+            seg = Segment(self.next_uid, path, self.tile_size)
+            self.next_uid += 1
+            for i, p in enumerate(path):
+                self.belts[p][1] = seg
+                self.belts[p][2] = i
+            self.segments[seg] = None
+            new.append(seg)
+
+        for h in heads: walk(h)
+        for t in tiles: # Whatever is left is a closed loop; cut it anywhere
+            if t not in placed: walk(t)
+        return new
+
+    def _resolve(self, seg):
+        if seg is None or seg not in self.segments: return
+        first, last = seg.path[0], seg.path[-1]
+        back = step(first, self.belts[first][0])
+        back = (2 * first[0] - back[0], 2 * first[1] - back[1])
+        seg.source = None if back in self.belts else self.building_at(back)
+
+        if isinstance(seg.sink, Segment) and seg in seg.sink.feeders: seg.sink.feeders.remove(seg)
+        nxt = step(last, self.belts[last][0])
+        if nxt in self.belts:
+            seg.sink = self.belts[nxt][1]
+            seg.sink.feeders.append(seg)
+        else:
+            seg.sink = self.building_at(nxt)
+        if self.hasher: self.hasher.touch(('seg', seg.uid), seg)
+
+    # --- Tick ---
+
+    def update(self):
+        now = self.now = self.now + 1
+        moving = self.moving = []
+        hasher = self.hasher
+        for seg in self.segments:
+            it = seg.items
+            changed = False
+            if it and now - it[0][1] >= seg.travel and now - seg.last_exit >= SPACING:
+                sink = seg.sink
+                if sink is seg: # Closed loop: front item goes round again
+                    head = it.popleft(); head[1] = now; it.append(head)
+                    seg.last_exit = now; changed = True
+                elif isinstance(sink, Segment):
+                    if sink.can_accept(now):
+                        sink.items.append([it.popleft()[0], now])
+                        seg.last_exit = now; changed = True
+                        if hasher: hasher.touch(('seg', sink.uid), sink)
+                elif sink is not None and sink.belt_give(it[0][0]):
+                    it.popleft()
+                    seg.last_exit = now; changed = True
+            if seg.source is not None and seg.can_accept(now):
+                item_id = seg.source.belt_take()
+                if item_id != EMPTY:
+                    it.append([item_id, now]); changed = True
+            if changed and hasher: hasher.touch(('seg', seg.uid), seg)
+            if changed or (it and now - it[-1][1] < seg.travel - (len(it) - 1) * SPACING): moving.append(seg)
+
+    def items_in_transit(self):
+        return sum(len(s.items) for s in self.segments)
+
+# --- THROUGHPUT BENCHMARK ---
+
+def bench(n_items, ticks, loop_side):
+    net = LogisticsNetwork()
+    per_loop = 4 * (loop_side - 1) * ITEMS_PER_TILE
+    loops = max(1, -(-n_items // per_loop))
+    t0 = time.perf_counter()
+    for l in range(loops):
+        ox = l * (loop_side + 1)
+        s = loop_side - 1
+        ring = [((ox + i, 0), (1, 0)) for i in range(s)] + [((ox + s, i), (0, 1)) for i in range(s)] \
+             + [((ox + s - i, s), (-1, 0)) for i in range(s)] + [((ox, s - i), (0, -1)) for i in range(s)]
+        for tile, d in ring: net.place(tile, d)
+    build = time.perf_counter() - t0
+
+    left = n_items
+    for seg in net.segments:
+        k = min(seg.capacity, left)
+        for j in range(k): seg.items.append([0, -(k - j) * SPACING])
+        left -= k
+
+    t0 = time.perf_counter()
+    for _ in range(ticks): net.update()
+    dt = time.perf_counter() - t0
+    print(f"{net.items_in_transit()} items on {len(net.belts)} belts / {len(net.segments)} segments (built in {build*1000:.0f} ms)")
+    print(f"{ticks} ticks: {dt / ticks * 1000:.3f} ms/tick -> {ticks / dt:.0f} ticks/s")
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Belt network throughput benchmark", allow_abbrev=False)
+    p.add_argument('--items', type=int, default=100000)
+    p.add_argument('--ticks', type=int, default=600)
+    p.add_argument('--loop-side', type=int, default=26)
+    a = p.parse_args()
+    bench(a.items, a.ticks, a.loop_side)
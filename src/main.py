@@ -1,13 +1,75 @@
 import pygame
+import argparse
 import random
 import sys
+import os
 import math
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import replay
+import items
+import upgrades
+from upgrades import SPEED, ENERGY, REGEN, CAPACITY
+import blueprint
+from notify import NotificationBus
+import telemetry
+from telemetry import Telemetry, SMELTED
+from items import EMPTY, Inventory, STACK, SMELTS_TO
+from statehash import StateHash
+from render import DirtyRects
+from logistics import LogisticsNetwork, TICKS_PER_TILE
+from power import PowerNetwork
+from pathfind import Pathfinder
+from ore import OreField
+from lod import RegionLOD, drain
+from shard import ShardPool, FURNACE, LAB
+from profiler import FrameProfiler
+from sampler import StackSampler
+import memstats
+from memstats import tag
 
 # --- CONFIGURATION ---
-SCREEN_WIDTH = 1180
-SCREEN_HEIGHT = 720
-TILE_SIZE = 32
-FPS = 60
+# Frozen from config.py at import time; hot code reads these plain globals.
+CFG = config.get()
+SCREEN_WIDTH = CFG.screen_width
+SCREEN_HEIGHT = CFG.screen_height
+TILE_SIZE = CFG.tile_size
+RES_PAD = -(-max(0, 20 - TILE_SIZE) // (2 * TILE_SIZE)) # Tiles a 20px resource marker overhangs its own by
+FPS = CFG.fps
+MAP_W = CFG.map_w
+MAP_H = CFG.map_h
+PLAYER_SPEED = CFG.player_speed
+PROCESS_MAX = CFG.process_max
+LAB_CYCLE = CFG.lab_cycle
+BEAM_RANGE = CFG.beam_range
+
+# Simulation energy is fixed-point: integers in 1/ENERGY_ONE of a unit, so buildings, grids and
+# shard workers only ever add, subtract and compare ints and every peer gets the same bits.
+# Config stays in whole units and is converted here, once.
+ENERGY_ONE = 1000
+def fx(v): return int(round(v * ENERGY_ONE))
+MAX_ENERGY = fx(CFG.max_energy)
+START_ENERGY = fx(CFG.start_energy)
+BEAM_AMOUNT = fx(CFG.beam_amount)
+REGEN_BASE = fx(CFG.regen_base)
+SOLAR_REGEN = fx(CFG.solar_regen)
+ENERGY_CAP = fx(CFG.energy_cap)
+SOLAR_POWER = fx(CFG.solar_power)
+DRAW_COST = fx(0.5) # Per tick a working furnace / lab draws, before upgrades
+EFFICIENCY_MOD = CFG.efficiency_mod
+UPGRADES = upgrades.make_tree(EFFICIENCY_MOD, CFG.regen_upgraded / CFG.regen_base if CFG.regen_base else 1.0,
+                              CFG.energy_cap_upgraded / CFG.energy_cap if CFG.energy_cap else 1.0)
+UPGRADE_LAYOUT = upgrades.layout(UPGRADES)
+POLE_REACH = CFG.pole_reach
+POLE_SUPPLY = CFG.pole_supply
+HUD_MESSAGES = CFG.hud_messages
+ORE_AMOUNT = CFG.ore_amount
+DRILL_PERIOD = CFG.drill_period
+LOD_REGION = CFG.lod_region
+LOD_EVERY = CFG.lod_every
+SIM_WORKERS = CFG.sim_workers
 
 # Colors
 C_BG = (20, 20, 20)
@@ -37,12 +99,113 @@ def draw_icon(surface, name):
     elif name == 'iron_bar': pygame.draw.rect(surface, (200, 200, 200), (6, 10, w-12, h-20))
     elif name == 'copper_bar': pygame.draw.rect(surface, C_ORANGE, (6, 10, w-12, h-20))
 
+ICONS = {}
+def get_icon(item_id, size):
+    # Icons are drawn once per (item, size) and reused
+    key = (item_id, size)
+    icon = ICONS.get(key)
+    if icon is None:
+        icon = ICONS[key] = tag(pygame.Surface((size, size), pygame.SRCALPHA), 'ui')
+        draw_icon(icon, items.NAMES[item_id])
+    return icon
+
+_fonts = {}
+def get_font(name, size, bold=True):
+    key = (name, size, bold)
+    if key not in _fonts: _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return _fonts[key]
+
+def render_text(font, text, color):
+    return tag(font.render(text, True, color), 'text')
+
+# --- UPGRADE TREE PANEL ---
+NODE_W, NODE_H, NODE_DX, NODE_DY = 170, 48, 190, 60
+
+def upgrade_panel_rect():
+    cols = 1 + max(c for c, r in UPGRADE_LAYOUT.values())
+    rows = 1 + max(r for c, r in UPGRADE_LAYOUT.values())
+    w, h = 20 + cols * NODE_DX, 56 + rows * NODE_DY
+    return pygame.Rect((SCREEN_WIDTH - w) // 2, (SCREEN_HEIGHT - h) // 2, w, h)
+
+def upgrade_node_rect(uid):
+    # Panel-relative
+    c, r = UPGRADE_LAYOUT[uid]
+    return pygame.Rect(20 + c * NODE_DX, 44 + r * NODE_DY, NODE_W, NODE_H)
+
+def upgrade_at(x, y):
+    for uid in UPGRADES:
+        if upgrade_node_rect(uid).move(UPGRADE_PANEL.topleft).collidepoint(x, y): return uid
+    return None
+
+def render_upgrade_tree(owned, points):
+    surf = tag(pygame.Surface(UPGRADE_PANEL.size), 'ui')
+    surf.fill(C_UI_BG)
+    pygame.draw.rect(surf, C_UI_BORDER, surf.get_rect(), 2)
+    font, small = get_font("Arial", 16), get_font("Courier New", 12)
+    surf.blit(render_text(font, f"UPGRADES  |  SCIENCE: {points}  |  [U] CLOSE", C_WHITE), (20, 12))
+    for uid, (_, _, needs, _) in UPGRADES.items():
+        r = upgrade_node_rect(uid)
+        for n in needs:
+            a = upgrade_node_rect(n)
+            pygame.draw.line(surf, C_UI_BORDER if owned[n] else (90, 90, 90), a.midright, r.midleft, 2)
+    colors = {'owned': (40, 110, 40), 'open': (110, 100, 30), 'poor': (70, 70, 70), 'locked': (35, 35, 35)}
+    for uid, (name, cost, _, _) in UPGRADES.items():
+        r = upgrade_node_rect(uid)
+        state = upgrades.status(UPGRADES, owned, uid, points)
+        pygame.draw.rect(surf, colors[state], r)
+        pygame.draw.rect(surf, C_UI_BORDER, r, 1)
+        surf.blit(render_text(small, name, C_WHITE), (r.x + 6, r.y + 6))
+        label = "RESEARCHED" if state == 'owned' else "LOCKED" if state == 'locked' else f"{cost} SCIENCE"
+        surf.blit(render_text(small, label, C_WHITE), (r.x + 6, r.y + 26))
+    return surf
+
+UPGRADE_PANEL = upgrade_panel_rect()
+
+# --- RATE GRAPHS (SKY) ---
+GRAPH_RECT = pygame.Rect(10, 40, 280, 30 + len(telemetry.COUNTERS) * 52)
+
+def render_graphs(tel, level):
+    surf = tag(pygame.Surface(GRAPH_RECT.size), 'ui')
+    surf.fill((10, 10, 30))
+    pygame.draw.rect(surf, C_UI_BORDER, surf.get_rect(), 1)
+    font = get_font("Courier New", 12)
+    surf.blit(render_text(font, f"RATES, {telemetry.LEVELS[level][0]} BUCKETS  [G] NEXT", C_WHITE), (8, 6))
+    for i, name in enumerate(telemetry.COUNTERS):
+        y = 26 + i * 52
+        vals = tel.series(level, i) * 60 # Per minute
+        surf.blit(render_text(font, f"{name.replace('_', ' ').upper()}  {vals[-1]:.1f}/min", C_WHITE), (8, y))
+        box = pygame.Rect(8, y + 16, GRAPH_RECT.w - 16, 30)
+        pygame.draw.rect(surf, (30, 30, 50), box)
+        top = vals.max()
+        if top > 0:
+            step = (box.w - 1) / (len(vals) - 1)
+            pts = [(box.x + k * step, box.bottom - 1 - v / top * (box.h - 2)) for k, v in enumerate(vals.tolist())]
+            pygame.draw.lines(surf, C_GREEN, False, pts)
+    return surf
+
+def read_input():
+    # Drain pygame's queue into plain tuples: (events, held WASD axes, mouse pos). Only drags
+    # of the left button are kept from motion; nothing else about it matters to the game.
+    events = []
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT: events.append(('quit',))
+        elif event.type == pygame.MOUSEBUTTONDOWN: events.append(('down', event.pos[0], event.pos[1], event.button))
+        elif event.type == pygame.MOUSEBUTTONUP: events.append(('up', event.pos[0], event.pos[1], event.button))
+        elif event.type == pygame.MOUSEMOTION and event.buttons[0]: events.append(('drag', event.pos[0], event.pos[1]))
+        elif event.type == pygame.MOUSEWHEEL: events.append(('wheel', event.y))
+        elif event.type == pygame.KEYDOWN: events.append(('key', event.key))
+    keys = pygame.key.get_pressed()
+    held = (keys[pygame.K_d] - keys[pygame.K_a], keys[pygame.K_s] - keys[pygame.K_w])
+    return events, held, pygame.mouse.get_pos()
+
 # --- CLASSES ---
 
+INPUT, OUTPUT = 0, 1 # Building slot indices
+
 class Tile(pygame.sprite.Sprite):
     def __init__(self, x, y, tile_type, group):
         super().__init__(group)
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        self.image = tag(pygame.Surface((TILE_SIZE, TILE_SIZE)), 'tiles')
         self.tile_type = tile_type
         if tile_type == 'grass': self.image.fill((34, 139, 34))
         elif tile_type == 'sand': self.image.fill((238, 214, 175))
@@ -54,95 +217,222 @@ class Resource(pygame.sprite.Sprite):
     def __init__(self, x, y, res_type, group):
         super().__init__(group)
         self.res_type = res_type
-        self.image = pygame.Surface((20, 20), pygame.SRCALPHA)
+        self.image = tag(pygame.Surface((20, 20), pygame.SRCALPHA), 'resources')
         cx, cy = 10, 10
         if res_type == 'rock': 
             pygame.draw.circle(self.image, (100,100,100), (cx,cy), 10)
-            self.yield_item = 'stone'
+            self.yield_item = items.STONE
         elif res_type == 'tree': 
             pygame.draw.circle(self.image, (0,100,0), (cx,cy), 10)
-            self.yield_item = 'wood'
+            self.yield_item = items.WOOD
         elif res_type == 'iron_ore':
             pygame.draw.circle(self.image, (183, 65, 14), (cx,cy), 10)
-            self.yield_item = 'iron_ore'
+            self.yield_item = items.IRON_ORE
         elif res_type == 'copper_ore':
             pygame.draw.circle(self.image, C_ORANGE, (cx,cy), 10)
-            self.yield_item = 'copper_ore'
-        self.rect = self.image.get_rect(center=(x*TILE_SIZE+16, y*TILE_SIZE+16))
+            self.yield_item = items.COPPER_ORE
+        self.rect = self.image.get_rect(center=(x*TILE_SIZE+TILE_SIZE//2, y*TILE_SIZE+TILE_SIZE//2))
+        self.tile = (x, y)
+
+    def hash_state(self):
+        return f"{self.res_type},{self.rect.x},{self.rect.y}"
 
 class Building(pygame.sprite.Sprite):
-    def __init__(self, x, y, b_type, group):
+    def __init__(self, x, y, b_type, group, direction=(1, 0)):
         super().__init__(group)
         self.b_type = b_type
-        self.image = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        self.dir = direction
+        self.image = tag(pygame.Surface((TILE_SIZE, TILE_SIZE)), 'buildings')
         self.rect = self.image.get_rect(topleft=(x*TILE_SIZE, y*TILE_SIZE))
         
-        self.input_slot = None 
-        self.output_slot = None
+        self.slots = Inventory(2) # [INPUT, OUTPUT]
         
         self.energy = 0
-        self.max_energy = 500
+        self.max_energy = MAX_ENERGY
         self.process_timer = 0
-        self.process_max = 120
+        self.process_max = PROCESS_MAX
         self.being_charged = False 
+        self.grid = None # power.Grid this building draws from / feeds, if any
+        self.look = None # (energy bar px, busy) last drawn into self.image
         
         if b_type == 'furnace':
             self.color = (150, 50, 50)
-            self.valid_inputs = ['iron_ore', 'copper_ore']
+            self.valid_inputs = {items.IRON_ORE, items.COPPER_ORE}
         elif b_type == 'solar':
             self.color = (50, 50, 150)
-            self.valid_inputs = []
+            self.valid_inputs = set()
         elif b_type == 'science_lab':
             self.color = (200, 200, 255)
-            self.valid_inputs = ['iron_bar', 'copper_bar']
+            self.valid_inputs = {items.IRON_BAR, items.COPPER_BAR}
+        elif b_type == 'belt':
+            self.color = (90, 90, 90)
+            self.valid_inputs = set()
+        elif b_type == 'pole':
+            self.color = (60, 45, 30)
+            self.valid_inputs = set()
+        elif b_type == 'drill':
+            self.color = (110, 100, 70)
+            self.valid_inputs = set()
+            self.drill_row = None # Row in Game.ore; the field ticks all drills at once
 
         self.redraw()
 
+    def hash_state(self):
+        return f"{self.b_type},{self.rect.x},{self.rect.y},{self.energy!r},{self.process_timer},{self.slots.state()}"
+
     def redraw(self):
+        self.look = (int(TILE_SIZE * self.energy / self.max_energy) if self.energy > 0 else -1, self.process_timer > 0)
         self.image.fill(self.color)
         if self.energy > 0:
             pct = self.energy / self.max_energy
-            pygame.draw.rect(self.image, (0, 255, 0), (0, 28, 32*pct, 4))
+            pygame.draw.rect(self.image, (0, 255, 0), (0, TILE_SIZE-4, TILE_SIZE*pct, 4))
         if self.process_timer > 0:
-            pygame.draw.circle(self.image, (255, 255, 0), (16, 16), 5)
+            pygame.draw.circle(self.image, (255, 255, 0), (TILE_SIZE//2, TILE_SIZE//2), 5)
+        if self.b_type == 'pole':
+            pygame.draw.rect(self.image, (170, 140, 60), (TILE_SIZE//2 - 2, 4, 4, TILE_SIZE - 8))
+            pygame.draw.rect(self.image, (170, 140, 60), (6, 8, TILE_SIZE - 12, 3))
+        if self.b_type == 'drill':
+            c = TILE_SIZE // 2
+            pygame.draw.polygon(self.image, (200, 200, 210), [(c - 7, 6), (c + 7, 6), (c, TILE_SIZE - 6)])
+        if self.b_type == 'belt':
+            c, (dx, dy) = TILE_SIZE // 2, self.dir
+            tip = (c + dx*10, c + dy*10)
+            pygame.draw.polygon(self.image, (140, 140, 140), [tip, (c - dx*6 - dy*8, c - dy*6 + dx*8), (c - dx*6 + dy*8, c - dy*6 - dx*8)])
 
     def update(self, global_state):
+        was = (self.energy, self.process_timer)
+        slots = self.slots
         if self.b_type == 'furnace':
-            if self.energy > 0 and self.input_slot:
-                inp_name = self.input_slot['name']
-                if inp_name in self.valid_inputs:
-                    self.process_timer += 1
-                    speed_mod = 1.5 if global_state.upgrades['efficiency'] else 1.0
-                    self.energy -= (0.5 / speed_mod) 
-                    target = self.process_max / speed_mod
-                    if self.process_timer >= target:
-                        out_name = inp_name.replace('ore', 'bar')
-                        if self.output_slot is None:
-                            self.output_slot = {'name': out_name, 'count': 1}
-                            self.consume_input()
-                        elif self.output_slot['name'] == out_name and self.output_slot['count'] < 64:
-                            self.output_slot['count'] += 1
-                            self.consume_input()
-                        self.process_timer = 0
-                else: self.process_timer = 0
+            inp = slots.ids[INPUT]
+            cost, target = global_state.rates['furnace'] # Per-tick energy and ticks per bar, from the upgrade table
+            if inp != EMPTY and inp in self.valid_inputs and self.draw_power(cost):
+                self.process_timer += 1
+                if self.process_timer >= target:
+                    out = SMELTS_TO[inp]
+                    out_id = slots.ids[OUTPUT]
+                    if out_id == EMPTY or (out_id == out and slots.counts[OUTPUT] < STACK[out]):
+                        slots.set(OUTPUT, out, slots.counts[OUTPUT] + 1)
+                        global_state.telemetry.add(SMELTED[out])
+                        self.consume_input()
+                    self.process_timer = 0
             else: self.process_timer = 0
         
         elif self.b_type == 'science_lab':
-            if self.energy > 0 and self.input_slot:
-                self.energy -= 0.5
+            cost, cycle = global_state.rates['science_lab']
+            if slots.ids[INPUT] != EMPTY and self.draw_power(cost):
                 self.process_timer += 1
-                if self.process_timer >= 180: 
+                if self.process_timer >= cycle:
                     global_state.science_points += 1
                     self.consume_input()
                     self.process_timer = 0
-                    global_state.add_message("Produced 1 Science Data!")
+                    global_state.notes.emit('science', "Science Data")
+        self.settle(was, global_state)
 
-        self.redraw()
+    def advance(self, k, global_state):
+        # k ticks of update() in one go, for buildings off every grid (see lod.py). Only
+        # stretches between completions are stepped; drain() does each one in integer math.
+        was = (self.energy, self.process_timer)
+        slots = self.slots
+        if self.b_type == 'furnace':
+            cost, target = global_state.rates['furnace']
+            while k > 0:
+                inp = slots.ids[INPUT]
+                if inp == EMPTY or inp not in self.valid_inputs or self.energy <= 0:
+                    self.process_timer = 0
+                    break
+                self.energy, n = drain(self.energy, cost, min(k, max(1, target - self.process_timer)))
+                self.process_timer += n
+                k -= n
+                if self.process_timer >= target:
+                    out = SMELTS_TO[inp]
+                    out_id = slots.ids[OUTPUT]
+                    if out_id == EMPTY or (out_id == out and slots.counts[OUTPUT] < STACK[out]):
+                        slots.set(OUTPUT, out, slots.counts[OUTPUT] + 1)
+                        global_state.telemetry.add(SMELTED[out])
+                        self.consume_input()
+                    self.process_timer = 0
+
+        elif self.b_type == 'science_lab':
+            cost, cycle = global_state.rates['science_lab']
+            while k > 0 and slots.ids[INPUT] != EMPTY and self.energy > 0:
+                self.energy, n = drain(self.energy, cost, min(k, max(1, cycle - self.process_timer)))
+                self.process_timer += n
+                k -= n
+                if self.process_timer >= cycle:
+                    global_state.science_points += 1
+                    self.consume_input()
+                    self.process_timer = 0
+                    global_state.notes.emit('science', "Science Data")
+        self.settle(was, global_state)
+
+    def settle(self, was, global_state):
+        if was != (self.energy, self.process_timer): global_state.hasher.touch(('b', self.uid), self)
+        # Only repaint (and report a dirty region) when the visible bar/indicator actually changes
+        if (int(TILE_SIZE * self.energy / self.max_energy) if self.energy > 0 else -1, self.process_timer > 0) != self.look:
+            self.redraw()
+            global_state.world_dirty.append(self.rect)
 
     def consume_input(self):
-        self.input_slot['count'] -= 1
-        if self.input_slot['count'] <= 0:
-            self.input_slot = None
+        self.slots.take(INPUT)
+
+    def draw_power(self, amount):
+        # Own (beamed) buffer first, then the grid's shared pool
+        if self.energy > 0:
+            self.energy -= amount
+            return True
+        return self.grid is not None and self.grid.draw(amount)
+
+    # Belt endpoints (see logistics.py): output slot feeds belts, input slot takes from them
+    def belt_take(self):
+        item_id = self.slots.ids[OUTPUT]
+        if item_id != EMPTY: self.slots.take(OUTPUT)
+        return item_id
+
+    def belt_give(self, item_id):
+        slots = self.slots
+        if item_id not in self.valid_inputs: return False
+        if slots.ids[INPUT] == EMPTY: slots.set(INPUT, item_id, 1)
+        elif slots.ids[INPUT] == item_id and slots.counts[INPUT] < STACK[item_id]: slots.set(INPUT, item_id, slots.counts[INPUT] + 1)
+        else: return False
+        return True
+
+class ShardLink:
+    # RegionLOD offload: furnaces and labs of cold regions become rows of a ShardPool (shard.py),
+    # ticked every frame by worker processes, and are written back when the region is needed.
+    KINDS = {'furnace': FURNACE, 'science_lab': LAB}
+
+    def __init__(self, game, workers):
+        self.game = game
+        self.pool = ShardPool(workers)
+
+    def send(self, members):
+        for b in members:
+            kind = self.KINDS.get(b.b_type)
+            if kind is None: continue # Nothing to tick
+            s = b.slots
+            self.pool.add(b, kind, b.energy, b.process_timer, s.ids[INPUT], s.counts[INPUT], s.ids[OUTPUT], s.counts[OUTPUT])
+
+    def pull(self, members, drop=False):
+        for b in members:
+            if getattr(b, 'shard_row', None) is None: continue
+            was = (b.energy, b.process_timer)
+            b.energy, b.process_timer, in_id, in_n, out_id, out_n = self.pool.row(b)
+            b.slots.set(INPUT, in_id, in_n)
+            b.slots.set(OUTPUT, out_id, out_n)
+            if drop: self.pool.remove(b)
+            b.settle(was, self.game)
+
+    def recall(self, members):
+        self.pull(members, drop=True)
+
+    def tick(self):
+        g = self.game
+        made, iron, copper = self.pool.tick(*g.rates['furnace'], *g.rates['science_lab'])
+        if iron: g.telemetry.add(telemetry.IRON, iron)
+        if copper: g.telemetry.add(telemetry.COPPER, copper)
+        if made:
+            g.science_points += made
+            g.notes.emit('science', "Science Data", made)
 
 # --- UI CLASSES ---
 
@@ -154,24 +444,39 @@ class Slot:
         self.w = size
         self.h = size
         self.rect = pygame.Rect(x, y, size, size)
-        self.item = None 
+        self.local = pygame.Rect(x, y, size, size) # Where it lives on the window's cached surface
+        self.inv = None # Bound (Inventory, index); content is cached until that slot changes
+        self.index = 0
+        self.view = None
         self.hovered = False
 
+    def bind(self, inv, index):
+        self.inv = inv
+        self.index = index
+        self.refresh()
+
+    def refresh(self):
+        item_id = self.inv.ids[self.index] if self.inv else EMPTY
+        if item_id == EMPTY:
+            self.view = None
+            return
+        txt = render_text(get_font("Arial", 12), str(self.inv.counts[self.index]), C_WHITE)
+        self.view = (get_icon(item_id, 24), txt)
+
     def update_rect(self, win_x, win_y):
         self.rect.x = win_x + self.rel_x
         self.rect.y = win_y + self.rel_y
 
     def draw(self, surface):
+        # Draws onto the owning window's surface, in window coordinates
+        r = self.local
         col = C_SLOT_HOVER if self.hovered else C_SLOT
-        pygame.draw.rect(surface, col, self.rect)
-        pygame.draw.rect(surface, C_UI_BORDER, self.rect, 2)
-        if self.item:
-            icon_surf = pygame.Surface((24, 24), pygame.SRCALPHA)
-            draw_icon(icon_surf, self.item['name'])
-            surface.blit(icon_surf, (self.rect.x+8, self.rect.y+8))
-            font = pygame.font.SysFont("Arial", 12, bold=True)
-            txt = font.render(str(self.item['count']), True, C_WHITE)
-            surface.blit(txt, (self.rect.right - txt.get_width()-2, self.rect.bottom - txt.get_height()))
+        pygame.draw.rect(surface, col, r)
+        pygame.draw.rect(surface, C_UI_BORDER, r, 2)
+        if self.view:
+            icon, txt = self.view
+            surface.blit(icon, (r.x+8, r.y+8))
+            surface.blit(txt, (r.right - txt.get_width()-2, r.bottom - txt.get_height()))
 
 class DraggableWindow:
     def __init__(self, title, x, y, w, h):
@@ -182,52 +487,70 @@ class DraggableWindow:
         self.visible = False
         self.title_bar = pygame.Rect(x, y, w, 30)
         self.font = pygame.font.SysFont("Arial", 16, bold=True)
+        # Retained rendering: the window is drawn into its own surface and only
+        # re-rendered when invalidated; moving it just blits the cache elsewhere.
+        self.surface = None
+        self.dirty = True
 
-    def handle_event(self, event):
-        if not self.visible: return False
-        
-        mx, my = pygame.mouse.get_pos()
-        
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                # Check Title Bar click
-                if self.title_bar.collidepoint(mx, my):
-                    self.dragging = True
-                    self.drag_offset = (mx - self.rect.x, my - self.rect.y)
-                    return True # Captured event
-        
-        elif event.type == pygame.MOUSEBUTTONUP:
-            self.dragging = False
-
-        elif event.type == pygame.MOUSEMOTION:
-            if self.dragging:
-                self.rect.x = mx - self.drag_offset[0]
-                self.rect.y = my - self.drag_offset[1]
-                # Clamp to screen
-                self.rect.x = max(0, min(SCREEN_WIDTH-self.rect.width, self.rect.x))
-                self.rect.y = max(0, min(SCREEN_HEIGHT-self.rect.height, self.rect.y))
-                self.title_bar.x = self.rect.x
-                self.title_bar.y = self.rect.y
-                self.on_move() # Callback for children to update slot positions
-
-        return False
+    def begin_drag(self, mx, my):
+        self.dragging = True
+        self.drag_offset = (mx - self.rect.x, my - self.rect.y)
+
+    def drag_to(self, mx, my):
+        self.rect.x = mx - self.drag_offset[0]
+        self.rect.y = my - self.drag_offset[1]
+        # Clamp to screen
+        self.rect.x = max(0, min(SCREEN_WIDTH-self.rect.width, self.rect.x))
+        self.rect.y = max(0, min(SCREEN_HEIGHT-self.rect.height, self.rect.y))
+        self.title_bar.x = self.rect.x
+        self.title_bar.y = self.rect.y
+        self.on_move() # Callback for children to update slot positions
 
     def on_move(self):
         pass # Override in children
 
-    def draw_window(self, screen):
+    def invalidate(self):
+        self.dirty = True
+
+    def prepare(self):
+        # Bring the cached surface up to date; True if any of its pixels changed
+        if self.surface is None or self.surface.get_size() != self.rect.size:
+            self.surface = tag(pygame.Surface(self.rect.size), 'ui')
+            self.dirty = True
+        patched = self.update_view()
+        if self.dirty:
+            self.render(self.surface)
+            self.dirty = False
+            return True
+        return bool(patched)
+
+    def blit(self, screen):
+        screen.blit(self.surface, self.rect)
+
+    def draw(self, screen):
+        self.prepare()
+        self.blit(screen)
+
+    def update_view(self):
+        return False # Override: patch the cached surface or invalidate() it
+
+    def render(self, surf):
+        self.draw_window(surf)
+
+    def draw_window(self, surf):
+        w, h = self.rect.size
         # Draw Body
-        pygame.draw.rect(screen, C_UI_BG, self.rect)
-        pygame.draw.rect(screen, C_UI_BORDER, self.rect, 2)
+        pygame.draw.rect(surf, C_UI_BG, (0, 0, w, h))
+        pygame.draw.rect(surf, C_UI_BORDER, (0, 0, w, h), 2)
         # Draw Title Bar
-        pygame.draw.rect(screen, C_UI_TITLE, self.title_bar)
-        pygame.draw.rect(screen, C_UI_BORDER, self.title_bar, 2)
+        pygame.draw.rect(surf, C_UI_TITLE, (0, 0, w, self.title_bar.h))
+        pygame.draw.rect(surf, C_UI_BORDER, (0, 0, w, self.title_bar.h), 2)
         # Draw Text
-        txt = self.font.render(self.title, True, C_WHITE)
-        screen.blit(txt, (self.rect.x + 10, self.rect.y + 5))
+        txt = render_text(self.font, self.title, C_WHITE)
+        surf.blit(txt, (10, 5))
         # Draw Close 'X'
-        pygame.draw.line(screen, C_WHITE, (self.rect.right-20, self.rect.y+5), (self.rect.right-5, self.rect.y+20), 2)
-        pygame.draw.line(screen, C_WHITE, (self.rect.right-5, self.rect.y+5), (self.rect.right-20, self.rect.y+20), 2)
+        pygame.draw.line(surf, C_WHITE, (w-20, 5), (w-5, 20), 2)
+        pygame.draw.line(surf, C_WHITE, (w-5, 5), (w-20, 20), 2)
 
     def is_close_button_clicked(self, pos):
         # Simple check for top right corner
@@ -235,18 +558,25 @@ class DraggableWindow:
         return cr.collidepoint(pos)
 
 class InventoryWindow(DraggableWindow):
+    # Player grid layout (window-relative); slot_at() inverts it arithmetically
+    GRID_X, GRID_Y, PITCH, SLOT, COLS, COUNT = 20, 150, 44, 40, 8, 30
+
     def __init__(self, player):
         super().__init__("INVENTORY & MACHINE", 100, 100, 400, 350)
         self.player = player
         self.target_machine = None
+        self.changed = set() # Slots whose inventory cell changed since the last draw
+        self.hover = None
         
         # Player Slots
         self.inv_slots = []
         for r in range(4):
-            for c in range(8):
-                if len(self.inv_slots) < 30:
-                    s = Slot(20 + c*44, 150 + r*44)
+            for c in range(self.COLS):
+                if len(self.inv_slots) < self.COUNT:
+                    s = Slot(self.GRID_X + c*self.PITCH, self.GRID_Y + r*self.PITCH, self.SLOT)
+                    s.bind(player.inventory, len(self.inv_slots))
                     self.inv_slots.append(s)
+        player.inventory.listeners.append(self.on_inv_change)
         
         # Machine Slots
         self.mach_in = Slot(80, 60, 50)
@@ -259,195 +589,234 @@ class InventoryWindow(DraggableWindow):
         self.mach_in.update_rect(self.rect.x, self.rect.y)
         self.mach_out.update_rect(self.rect.x, self.rect.y)
 
-    def sync(self):
-        # Sync Player
-        idx = 0
-        for name, count in self.player.inventory.items():
-            if count > 0:
-                self.inv_slots[idx].item = {'name': name, 'count': count}
-                idx += 1
-        for i in range(idx, len(self.inv_slots)): self.inv_slots[i].item = None
+    def on_inv_change(self, inv, i):
+        self.changed.add(self.inv_slots[i])
 
-        # Sync Machine
-        if self.target_machine:
-            self.mach_in.item = self.target_machine.input_slot
-            self.mach_out.item = self.target_machine.output_slot
-
-    def write_back(self):
-        # Rebuild Player Inv
-        new_inv = {'wood': 0, 'stone': 0, 'iron_ore': 0, 'copper_ore': 0, 'iron_bar': 0, 'copper_bar': 0}
-        for s in self.inv_slots:
-            if s.item:
-                n, c = s.item['name'], s.item['count']
-                new_inv[n] = new_inv.get(n, 0) + c
-        self.player.inventory = new_inv
-        
-        # Machine
-        if self.target_machine:
-            self.target_machine.input_slot = self.mach_in.item
-            self.target_machine.output_slot = self.mach_out.item
+    def on_machine_change(self, inv, i):
+        self.changed.add(self.mach_in if i == INPUT else self.mach_out)
 
-    def handle_click_content(self, cursor_item):
-        mx, my = pygame.mouse.get_pos()
-        
-        for s in self.inv_slots:
-            if s.rect.collidepoint(mx, my):
-                return self.swap_logic(s, cursor_item, False)
+    def set_target(self, machine):
+        if self.target_machine: self.target_machine.slots.listeners.remove(self.on_machine_change)
+        self.target_machine = machine
+        self.invalidate()
+        if machine:
+            machine.slots.listeners.append(self.on_machine_change)
+            self.mach_in.bind(machine.slots, INPUT)
+            self.mach_out.bind(machine.slots, OUTPUT)
 
-        if self.target_machine:
-            if self.mach_in.rect.collidepoint(mx, my):
-                res = self.swap_logic(self.mach_in, cursor_item, True)
-                self.write_back()
-                return res
-            if self.mach_out.rect.collidepoint(mx, my):
-                # Output take-only/stack logic
-                if not cursor_item and self.mach_out.item:
-                    cursor_item = self.mach_out.item
-                    self.mach_out.item = None
-                    self.write_back()
-                    return cursor_item
-                elif cursor_item and self.mach_out.item:
-                    if cursor_item['name'] == self.mach_out.item['name']:
-                         cursor_item['count'] += self.mach_out.item['count']
-                         self.mach_out.item = None
-                         self.write_back()
-                         return cursor_item
-        return cursor_item
-
-    def swap_logic(self, slot, cursor, is_machine):
-        if not cursor and slot.item: # Pick up
-            cursor = slot.item
-            slot.item = None
-        elif cursor and not slot.item: # Place
-            slot.item = cursor
-            cursor = None
-        elif cursor and slot.item: # Stack/Swap
-            if cursor['name'] == slot.item['name']:
-                slot.item['count'] += cursor['count']
-                cursor = None
-            else:
-                temp = slot.item
-                slot.item = cursor
-                cursor = temp
-        
-        if not is_machine: self.write_back()
+    def handle_click_content(self, cursor, pos):
+        s = self.slot_at(*pos)
+        if s is self.mach_out:
+            # Output take-only/stack logic
+            items.take_slot(cursor, s.inv, s.index)
+        elif s:
+            items.click_slot(cursor, s.inv, s.index)
         return cursor
 
-    def draw(self, screen):
-        self.sync()
-        self.draw_window(screen)
-        
-        mx, my = pygame.mouse.get_pos()
+    def slot_at(self, mx, my):
+        lx, ly = mx - self.rect.x - self.GRID_X, my - self.rect.y - self.GRID_Y
+        if lx >= 0 and ly >= 0 and lx % self.PITCH < self.SLOT and ly % self.PITCH < self.SLOT:
+            c, i = lx // self.PITCH, (ly // self.PITCH) * self.COLS + lx // self.PITCH
+            if c < self.COLS and i < len(self.inv_slots): return self.inv_slots[i]
+        if self.target_machine:
+            if self.mach_in.rect.collidepoint(mx, my): return self.mach_in
+            if self.mach_out.rect.collidepoint(mx, my): return self.mach_out
+        return None
+
+    def update_view(self):
+        repaint = set()
+        for s in self.changed: s.refresh()
+        repaint |= self.changed
+        self.changed.clear()
+
+        hover = self.slot_at(*pygame.mouse.get_pos())
+        if hover is not self.hover:
+            for s in (self.hover, hover):
+                if s:
+                    s.hovered = s is hover
+                    repaint.add(s)
+            self.hover = hover
+
+        # Patch just the affected slots into the cache unless it is being rebuilt anyway
+        if self.dirty: return False
+        for s in repaint:
+            if self.target_machine or s in self.inv_slots: s.draw(self.surface)
+        return bool(repaint)
+
+    def render(self, surf):
+        self.draw_window(surf)
         
         # Inv Slots
-        for s in self.inv_slots:
-            s.hovered = s.rect.collidepoint(mx, my)
-            s.draw(screen)
+        for s in self.inv_slots: s.draw(surf)
             
         # Machine
         if self.target_machine:
-            font = pygame.font.SysFont("Arial", 16, bold=True)
-            lbl = font.render(self.target_machine.b_type.upper(), True, C_WHITE)
-            screen.blit(lbl, (self.rect.x+20, self.rect.y+40))
+            lbl = render_text(get_font("Arial", 16), self.target_machine.b_type.upper(), C_WHITE)
+            surf.blit(lbl, (20, 40))
             
-            self.mach_in.hovered = self.mach_in.rect.collidepoint(mx, my)
-            self.mach_out.hovered = self.mach_out.rect.collidepoint(mx, my)
-            self.mach_in.draw(screen)
-            self.mach_out.draw(screen)
+            self.mach_in.draw(surf)
+            self.mach_out.draw(surf)
             
             # Arrow
-            sx, sy = self.rect.x + 160, self.rect.y + 80
-            pygame.draw.polygon(screen, C_WHITE, [(sx, sy-10), (sx+30, sy), (sx, sy+10)])
+            sx, sy = 160, 80
+            pygame.draw.polygon(surf, C_WHITE, [(sx, sy-10), (sx+30, sy), (sx, sy+10)])
+
+class UIDispatcher:
+    # Routes mouse commands to windows: one top-down hit test per press, and
+    # motion/release go straight to the window holding the drag capture.
+    def __init__(self, windows):
+        self.windows = windows # Shared z-ordered list (last = top)
+        self.capture = None
+
+    def window_at(self, mx, my):
+        for win in reversed(self.windows):
+            if win.visible and win.rect.collidepoint(mx, my): return win
+        return None
+
+    def bring_to_front(self, win):
+        if self.windows[-1] is not win:
+            self.windows.remove(win)
+            self.windows.append(win)
+
+    def mouse_down(self, mx, my, button):
+        # Returns the window whose content was clicked, if any
+        win = self.window_at(mx, my)
+        if win is None: return None
+        if button == 1 and win.title_bar.collidepoint(mx, my):
+            self.bring_to_front(win)
+            if win.is_close_button_clicked((mx, my)): win.visible = False
+            else:
+                win.begin_drag(mx, my)
+                self.capture = win
+            return None
+        return win if button == 1 else None
+
+    def mouse_up(self):
+        if self.capture: self.capture.dragging = False
+        self.capture = None
+
+    def mouse_move(self, mx, my):
+        if self.capture: self.capture.drag_to(mx, my)
+
+RECIPES = [ # Construction window rows, top to bottom (bots.py clicks them by index)
+    ('furnace', {'wood': 5, 'stone': 5}),
+    ('solar', {'iron_bar': 5, 'copper_bar': 5}),
+    ('science_lab', {'stone': 10, 'iron_bar': 2}),
+    ('belt', {'stone': 1}),
+    ('pole', {'wood': 2, 'stone': 1}),
+    ('drill', {'stone': 5, 'iron_bar': 3})
+]
 
 class RecipeWindow(DraggableWindow):
     def __init__(self, game_ref):
         super().__init__("CONSTRUCTION", 550, 100, 500, 400)
         self.game = game_ref
-        self.recipes = [
-            ('furnace', {'wood': 5, 'stone': 5}),
-            ('solar', {'iron_bar': 5, 'copper_bar': 5}),
-            ('science_lab', {'stone': 10, 'iron_bar': 2})
-        ]
+        self.recipes = RECIPES
+        self.costs = [[(items.IDS[r], c) for r, c in cost.items()] for _, cost in self.recipes]
+        self.cost_of = {name: c for (name, _), c in zip(self.recipes, self.costs)}
         self.buttons = [] # List of Rects relative to window
         for i in range(len(self.recipes)):
             self.buttons.append(pygame.Rect(10, 50 + i*50, 480, 40))
 
-    def handle_click_content(self, cursor_item):
-        mx, my = pygame.mouse.get_pos()
+    def handle_click_content(self, cursor_item, pos):
+        mx, my = pos
         # Convert mouse to relative
         rel_x = mx - self.rect.x
         rel_y = my - self.rect.y
         
         for i, btn in enumerate(self.buttons):
             if btn.collidepoint(rel_x, rel_y):
-                name, cost = self.recipes[i]
-                # Check cost
-                can = True
-                for r, c in cost.items():
-                    if self.game.player.inventory.get(r, 0) < c: can = False
-                
-                if can:
-                    for r, c in cost.items(): self.game.player.inventory[r] -= c
-                    gx, gy = round(self.game.player.rect.x/TILE_SIZE), round(self.game.player.rect.y/TILE_SIZE)
-                    Building(gx, gy, name, self.game.buildings)
-                    self.game.add_message(f"Built {name}!")
-                else:
-                    self.game.add_message("Missing Resources!")
+                name = self.recipes[i][0]
+                gx, gy = self.game.player_tile()
+                err = self.game.build([(gx, gy, name, self.game.facing)])
+                if err: self.game.add_message(err, 'warn')
+                else: self.game.add_message(f"Built {name}!")
         return cursor_item # Pass through
 
-    def draw(self, screen):
-        self.draw_window(screen)
-        font = pygame.font.SysFont("Courier New", 14, bold=True)
+    def render(self, surf):
+        self.draw_window(surf)
+        font = get_font("Courier New", 14)
         
         for i, (name, cost) in enumerate(self.recipes):
-            # Draw button background relative to window
+            # Buttons are stored relative to the window, which is what the cache uses
             r = self.buttons[i]
-            abs_r = pygame.Rect(self.rect.x + r.x, self.rect.y + r.y, r.w, r.h)
             
-            pygame.draw.rect(screen, C_SLOT, abs_r)
-            pygame.draw.rect(screen, C_UI_BORDER, abs_r, 1)
+            pygame.draw.rect(surf, C_SLOT, r)
+            pygame.draw.rect(surf, C_UI_BORDER, r, 1)
             
-            name_txt = font.render(name.upper(), True, C_ORANGE)
-            screen.blit(name_txt, (abs_r.x + 10, abs_r.y + 12))
+            name_txt = render_text(font, name.upper(), C_ORANGE)
+            surf.blit(name_txt, (r.x + 10, r.y + 12))
             
             c_str = ", ".join([f"{v} {k}" for k,v in cost.items()])
-            c_txt = font.render(c_str, True, (200, 200, 200))
-            screen.blit(c_txt, (abs_r.x + 130, abs_r.y + 12))
+            c_txt = render_text(font, c_str, (200, 200, 200))
+            surf.blit(c_txt, (r.x + 130, r.y + 12))
 
 # --- GAME ENGINE ---
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, seed=None):
         pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("TerraSky: Desktop Window System")
+        self.headless = headless
+        # All simulation randomness comes from this instance so a seed reproduces a run
+        if seed is None: seed = CFG.seed if CFG.seed >= 0 else random.randrange(1 << 31)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if headless: # Server / tools: simulate without opening a window
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("TerraSky: Desktop Window System")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("Courier New", 14, bold=True)
         
-        self.map_w = 80
-        self.map_h = 80
+        self.map_w = MAP_W
+        self.map_h = MAP_H
         self.tiles = pygame.sprite.Group()
         self.resources = pygame.sprite.Group()
         self.buildings = pygame.sprite.Group()
+        self.ticking = pygame.sprite.Group() # Buildings with a per-tick update (drills tick in self.ore)
+        self.lod = RegionLOD(LOD_REGION, LOD_EVERY, ShardLink(self, SIM_WORKERS) if SIM_WORKERS else None)
+        self.lod_pins = None # Regions that must tick every frame; None = recompute (see pinned_regions)
         self.player_grp = pygame.sprite.Group()
         self.tile_map = {}
+        self.tile_sprites = {}
+        self.hasher = StateHash()
+        self.next_uid = 0
+        self.occupancy = {} # (tx, ty) -> Building
+        self.logistics = LogisticsNetwork(self.machine_at, TILE_SIZE, self.hasher)
+        self.facing = (1, 0) # Last walking direction; new belts point this way
+        self.power = PowerNetwork(self.occupancy.get, TILE_SIZE, POLE_REACH, POLE_SUPPLY, SOLAR_POWER, self.hasher)
+        self.ore = OreField(self.map_w, self.map_h, DRILL_PERIOD)
+        self.ore_sprites = {} # tile -> Resource marking an ore tile, removed when it runs dry
+        self.res_sprites = {} # tile -> Resource, any kind; draw_scene looks them up per dirty area
         
         self.generate_world()
+        # Walkability for collision and click-to-move; buildings (except belts) are solid
+        self.walk = bytearray(self.tile_map[(x, y)] != 'water' for y in range(self.map_h) for x in range(self.map_w))
+        self.pathfinder = Pathfinder(self.map_w, self.map_h, self.walk)
+        self.route = [] # Waypoint tiles for click-to-move (input side only)
+        self.route_job = None
+        self.route_last = None
         
         px, py = (self.map_w*TILE_SIZE)//2, (self.map_h*TILE_SIZE)//2
         self.player = type('Player', (), {})()
         self.player.rect = pygame.Rect(px, py, 20, 20)
         self.player.image = pygame.Surface((20,20)); self.player.image.fill(C_WHITE)
-        self.player.inventory = {'wood': 10, 'stone': 10, 'iron_ore': 0, 'copper_ore': 0, 'iron_bar': 0, 'copper_bar': 0}
+        self.player.inventory = Inventory(30)
+        self.player.inventory.add(items.WOOD, 10)
+        self.player.inventory.add(items.STONE, 10)
         self.player_sprite = pygame.sprite.Sprite(self.player_grp)
         self.player_sprite.image = self.player.image
         self.player_sprite.rect = self.player.rect
         
         self.role = 'GROUND'
-        self.messages = []
-        self.global_energy = 100
+        self.notes = NotificationBus(HUD_MESSAGES)
+        self.telemetry = Telemetry(FPS)
+        self.notes.subscribe(self.telemetry.on_event) # Science and hand harvesting arrive as notices
+        self.global_energy = START_ENERGY
         self.science_points = 0
-        self.upgrades = {'regen': False, 'capacity': False, 'efficiency': False}
+        self.upgrades = dict.fromkeys(UPGRADES, False)
+        self.apply_upgrades()
 
         self.ui_sky_tree_open = False
         
@@ -455,42 +824,327 @@ class Game:
         self.win_inv = InventoryWindow(self.player)
         self.win_recipe = RecipeWindow(self)
         self.windows = [self.win_inv, self.win_recipe] # List allows z-order (last = top)
+        self.ui = UIDispatcher(self.windows)
         
-        self.held_item = None 
+        self.cursor = Inventory(1) # Item stack held on the mouse
+        self.blueprint = None # Last copied blueprint.Blueprint; pasted with its corner on the player
+        self.bp_mark = None   # First corner of a copy in progress (input side only)
         
         # Sky Camera
         self.sky_zoom = 1.0
         self.sky_cam_pos = [px, py]
 
+        # Dirty-rect presentation state (see collect_dirty)
+        self.renderer = DirtyRects((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.world_dirty = [] # World-space rects whose pixels changed
+        self.view_sig = None
+        self.win_order = ()
+        self.win_sig = {}
+        self.cursor_sig = None
+        self.hud_sig = None
+        self.hud_surfs = (None, [])
+        self.beam_frames = 0
+
+        # Frame profiler (F3); sections are timed in input/update/draw
+        self.prof = FrameProfiler()
+        self.prof_sig = None
+        self.prof_surf = None
+        self.prof_rect = pygame.Rect(0, 0, 0, 0)
+        self.tree_sig = None
+        self.tree_surf = None
+        self.graph_level = None # Rate graphs in SKY ([G]): index into telemetry.LEVELS, or None
+        self.graph_sig = None
+        self.graph_surf = None
+        self.phase = 'init' # input / update / draw / sleep, read by the stack sampler
+        self.sampler = None
+        self.sample_path = None
+
     def generate_world(self):
-        print("Generating...")
-        seed = random.randint(0, 100)
+        print(f"Generating... (seed {self.seed})")
+        rng = self.rng
         for x in range(self.map_w):
             for y in range(self.map_h):
                 dx = x - self.map_w // 2
                 dy = y - self.map_h // 2
                 dist = math.sqrt(dx*dx + dy*dy)
                 island_mask = 1.0 - (dist / (self.map_w * 0.4)) 
-                noise_val = random.uniform(-0.2, 0.2)
+                noise_val = rng.uniform(-0.2, 0.2)
                 height = island_mask + noise_val
                 
                 t_type = 'water'
                 if height > 0.1: t_type = 'sand'
                 if height > 0.4: t_type = 'grass'
                 
-                Tile(x, y, t_type, self.tiles)
+                self.tile_sprites[(x,y)] = Tile(x, y, t_type, self.tiles)
                 self.tile_map[(x,y)] = t_type
                 
                 if t_type != 'water':
-                    if random.random() < 0.1: Resource(x, y, 'tree', self.resources)
-                    elif random.random() < 0.05:
-                        rnd = random.random()
+                    if rng.random() < 0.1: Resource(x, y, 'tree', self.resources)
+                    elif rng.random() < 0.05:
+                        rnd = rng.random()
                         if rnd < 0.5: Resource(x, y, 'rock', self.resources)
                         elif rnd < 0.8: Resource(x, y, 'iron_ore', self.resources)
                         else: Resource(x, y, 'copper_ore', self.resources)
 
-    def add_message(self, txt):
-        self.messages.append([txt, 120])
+        # Terrain is static, so it enters the state hash once
+        self.hasher.set(('terrain',), repr(sorted(self.tile_map.items())))
+        for i, r in enumerate(self.resources):
+            r.uid = i
+            self.res_sprites[r.tile] = r
+            self.hasher.touch(('r', i), r)
+            if r.res_type != 'tree':
+                self.ore.seed(r.tile, r.yield_item, max(1, int(ORE_AMOUNT * rng.uniform(0.5, 1.5))))
+                self.ore_sprites[r.tile] = r
+        self.hasher.touch(('ore',), self.ore)
+
+    def build(self, cells):
+        # Player construction as one transaction: every tile free and buildable, the whole bill
+        # affordable, then paid once per item and inserted in one pass. Returns an error or None.
+        occ, ore = self.occupancy, self.ore
+        for gx, gy, b_type, _ in cells:
+            if not (0 <= gx < self.map_w and 0 <= gy < self.map_h): return "Off the map!"
+            if (gx, gy) in occ: return "Tile occupied!"
+            if b_type == 'drill' and ore.yield_at((gx, gy)) == EMPTY: return "No ore here!"
+        inv = self.player.inventory
+        bill = blueprint.bill((c[2] for c in cells), self.win_recipe.cost_of)
+        if any(inv.count(r) < c for r, c in bill.items()): return "Missing Resources!"
+        for r, c in bill.items(): inv.remove(r, c)
+        self.add_buildings(cells)
+        return None
+
+    def add_building(self, gx, gy, b_type, direction=(1, 0)):
+        return self.add_buildings([(gx, gy, b_type, direction)])[0]
+
+    def add_buildings(self, cells):
+        # [(gx, gy, b_type, dir)] -> buildings. Tiles must be free. Every index is updated in bulk:
+        # one LOD catch-up, power grids and belt lines joined once after all tiles are occupied.
+        self.lod.sync(self.advance_buildings) # Grids and belts may change under buildings that are behind
+        self.lod_pins = None
+        new = []
+        for gx, gy, b_type, direction in cells:
+            b = Building(gx, gy, b_type, self.buildings, direction)
+            if self.mods[b_type][CAPACITY] != 1.0: b.max_energy = round(MAX_ENERGY * self.mods[b_type][CAPACITY])
+            if b_type == 'drill':
+                self.ore.add_drill(b, (gx, gy))
+                b.slots.listeners.append(lambda inv, i, b=b: self.ore.set_full(b, inv.ids[OUTPUT] != EMPTY and inv.counts[OUTPUT] >= STACK[inv.ids[OUTPUT]]))
+                self.hasher.touch(('ore',), self.ore)
+            else:
+                self.ticking.add(b)
+                self.lod.add(b, (gx, gy))
+            self.world_dirty.append(b.rect)
+            b.uid = self.next_uid
+            self.next_uid += 1
+            self.hasher.touch(('b', b.uid), b)
+            b.slots.listeners.append(lambda inv, i, b=b: self.hasher.touch(('b', b.uid), b))
+            self.occupancy[(gx, gy)] = b
+            new.append(b)
+        self.power.add_many(new)
+        belts = []
+        for b, (gx, gy, b_type, direction) in zip(new, cells):
+            if b_type == 'belt': belts.append(((gx, gy), direction))
+            else: self.set_walk(gx, gy)
+        if belts:
+            self.logistics.place_many(belts)
+            self.renderer.invalidate_all() # Items may be re-homed along the whole line
+        for b, (gx, gy, b_type, _) in zip(new, cells):
+            if b_type != 'belt': self.logistics.endpoint_changed((gx, gy))
+        return new
+
+    def copy_blueprint(self, x0, y0, x1, y1):
+        bp = blueprint.Blueprint.capture(self.occupancy, x0, y0, x1, y1)
+        if not bp: return self.add_message("Nothing to copy!", 'warn')
+        self.blueprint = bp
+        cost = ", ".join(f"{n} {items.NAMES[i]}" for i, n in bp.bill(self.win_recipe.cost_of).items())
+        self.add_message(f"Copied {len(bp)} buildings ({cost})")
+
+    def paste_blueprint(self):
+        if self.blueprint is None: return self.add_message("No blueprint ([B] twice to copy one)", 'warn')
+        gx, gy = self.player_tile()
+        err = self.build(self.blueprint.cells(gx, gy))
+        if err: self.add_message(err, 'warn')
+        else: self.add_message(f"Built {len(self.blueprint)} buildings!")
+
+    def remove_building(self, b):
+        # Contents (and anything riding on a belt tile) go back to the player
+        tile = (b.rect.x // TILE_SIZE, b.rect.y // TILE_SIZE)
+        self.lod.sync(self.advance_buildings)
+        self.lod_pins = None
+        if b in self.ticking: self.lod.remove(b, tile) # Takes an offloaded region back first
+        del self.occupancy[tile]
+        self.power.remove(b)
+        if b.b_type == 'drill':
+            self.ore.remove_drill(b)
+            self.hasher.touch(('ore',), self.ore)
+        if b.b_type != 'belt': self.set_walk(*tile)
+        b.kill()
+        self.world_dirty.append(b.rect)
+        self.hasher.remove(('b', b.uid))
+        if self.win_inv.target_machine is b:
+            self.win_inv.set_target(None)
+            self.win_inv.visible = False
+        back = [(b.slots.ids[i], b.slots.counts[i]) for i in (INPUT, OUTPUT) if b.slots.ids[i] != EMPTY]
+        if b.b_type == 'belt':
+            back += [(item_id, 1) for item_id in self.logistics.remove(tile)]
+            self.renderer.invalidate_all()
+        else: self.logistics.endpoint_changed(tile)
+        for item_id, n in back: self.player.inventory.add(item_id, n)
+
+    # --- Simulation LOD ---
+
+    def advance_buildings(self, members, k):
+        for b in members: b.advance(k, self)
+
+    def apply_upgrades(self):
+        # Compile owned upgrades into the flat numbers the tick reads; runs only when one is bought.
+        # Multipliers are floats, so each product is rounded to fixed-point (ticks: rounded up) here.
+        m = self.mods = upgrades.compile_table(UPGRADES, self.upgrades)
+        f, lab = m['furnace'], m['science_lab']
+        self.rates = {'furnace': (round(DRAW_COST * f[ENERGY] / f[SPEED]), math.ceil(PROCESS_MAX / f[SPEED])),
+                      'science_lab': (round(DRAW_COST * lab[ENERGY] / lab[SPEED]), math.ceil(LAB_CYCLE / lab[SPEED]))}
+        self.regen = round(REGEN_BASE * m['player'][REGEN])
+        self.energy_cap = round(ENERGY_CAP * m['player'][CAPACITY])
+        self.solar_regen = round(SOLAR_REGEN * m['solar'][REGEN])
+        for b in self.buildings:
+            cap = round(MAX_ENERGY * m[b.b_type][CAPACITY])
+            if cap != b.max_energy:
+                was = (b.energy, b.process_timer)
+                b.max_energy = cap
+                b.settle(was, self) # Redraw the bar at the new scale
+        self.power.restat(round(SOLAR_POWER * m['solar'][REGEN]))
+
+    def buy_upgrade(self, uid):
+        if uid not in UPGRADES: return
+        name, cost, needs, _ = UPGRADES[uid]
+        # Buildings behind catch up first: under the old rules, and their science counts toward the cost
+        self.lod.sync(self.advance_buildings)
+        state = upgrades.status(UPGRADES, self.upgrades, uid, self.science_points)
+        if state == 'owned': return self.add_message(f"{name}: already researched")
+        if state == 'locked': return self.add_message(f"{name} needs " + ", ".join(UPGRADES[n][0] for n in needs), 'warn')
+        if state == 'poor': return self.add_message(f"{name} costs {cost} science ({self.science_points})", 'warn')
+        self.science_points -= cost
+        self.upgrades[uid] = True
+        self.apply_upgrades()
+        self.add_message(f"Researched {name}!")
+
+    def sync_sim(self, b=None):
+        # Catch up cold regions (or just b's) before anything outside the tick reads or edits them
+        if b is None: self.lod.sync(self.advance_buildings, pull=True)
+        else: self.lod.sync(self.advance_buildings, self.lod.region_of((b.rect.x // TILE_SIZE, b.rect.y // TILE_SIZE)))
+
+    def pinned_regions(self):
+        pins = set()
+        belts = self.logistics.belts
+        for b in self.ticking:
+            x, y = b.rect.x // TILE_SIZE, b.rect.y // TILE_SIZE
+            if b.grid is not None or any(t in belts for t in ((x+1, y), (x-1, y), (x, y+1), (x, y-1))):
+                pins.add(self.lod.region_of((x, y)))
+        return pins
+
+    def lod_views(self):
+        r = self.player.rect
+        ground = (r.centerx - SCREEN_WIDTH // 2, r.centery - SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT)
+        x0, y0 = self.screen_to_world(0, 0)
+        x1, y1 = self.screen_to_world(SCREEN_WIDTH, SCREEN_HEIGHT)
+        return [self.lod.view(ground, TILE_SIZE), self.lod.view((int(x0), int(y0), int(x1 - x0) + 1, int(y1 - y0) + 1), TILE_SIZE)]
+
+    def ore_depleted(self, tile):
+        r = self.ore_sprites.pop(tile)
+        del self.res_sprites[tile]
+        r.kill()
+        self.world_dirty.append(r.rect)
+        self.hasher.remove(('r', r.uid))
+
+    def machine_at(self, tile):
+        b = self.occupancy.get(tile)
+        return b if b is not None and b.b_type != 'belt' else None
+
+    def player_tile(self):
+        return round(self.player.rect.x/TILE_SIZE), round(self.player.rect.y/TILE_SIZE)
+
+    # --- Collision / Pathing ---
+
+    def set_walk(self, gx, gy):
+        if not (0 <= gx < self.map_w and 0 <= gy < self.map_h): return
+        b = self.occupancy.get((gx, gy))
+        self.walk[gy*self.map_w + gx] = self.tile_map[(gx, gy)] != 'water' and (b is None or b.b_type == 'belt')
+        self.pathfinder.mark(gx, gy)
+
+    def walkable(self, tile):
+        x, y = tile
+        return 0 <= x < self.map_w and 0 <= y < self.map_h and self.walk[y*self.map_w + x]
+
+    def blocked(self, rect):
+        # Solid tiles under rect (at most 4 for the player)
+        return {(x, y) for x in range(rect.left // TILE_SIZE, (rect.right - 1) // TILE_SIZE + 1)
+                for y in range(rect.top // TILE_SIZE, (rect.bottom - 1) // TILE_SIZE + 1) if not self.walkable((x, y))}
+
+    def move_player(self, dx, dy):
+        # Per axis, so walls can be slid along. A step may leave solid tiles but never enter new ones,
+        # so a player standing on a freshly placed machine can still walk off it.
+        r = self.player.rect
+        for mx, my in ((dx, 0), (0, dy)):
+            if not (mx or my): continue
+            moved = r.move(mx, my)
+            if self.blocked(moved) <= self.blocked(r): r.topleft = moved.topleft
+
+    def building_near_player(self):
+        # Nearest building under the player's (slightly grown) rect, ties broken by tile
+        r = self.player.rect.inflate(16, 16)
+        best = None
+        for x in range(r.left // TILE_SIZE, (r.right - 1) // TILE_SIZE + 1):
+            for y in range(r.top // TILE_SIZE, (r.bottom - 1) // TILE_SIZE + 1):
+                b = self.occupancy.get((x, y))
+                if b is None: continue
+                d = (b.rect.centerx - r.centerx)**2 + (b.rect.centery - r.centery)**2
+                if best is None or d < best[0]: best = (d, b)
+        return best[1] if best else None
+
+    def route_to(self, sx, sy):
+        # Right-click in GROUND: plan on the worker thread, walk it from poll_commands
+        cam = self.get_ground_camera(self.player_sprite)
+        goal = ((sx - cam[0]) // TILE_SIZE, (sy - cam[1]) // TILE_SIZE)
+        r = self.player.rect
+        start = (r.centerx // TILE_SIZE, r.centery // TILE_SIZE)
+        if not self.walkable(goal): # Clicked a machine: walk next to it
+            near = [t for t in ((goal[0] + d[0], goal[1] + d[1]) for d in ((1, 0), (0, 1), (-1, 0), (0, -1))) if self.walkable(t)]
+            if not near:
+                self.add_message("Can't walk there", 'warn')
+                return
+            goal = min(near, key=lambda t: (abs(t[0] - start[0]) + abs(t[1] - start[1]), t))
+        if not self.walkable(start):
+            near = [t for t in self.blocked(r) ^ {start} if self.walkable(t)] or [start]
+            start = near[0]
+        self.route = []
+        self.route_job = self.pathfinder.request(start, goal)
+
+    def follow_route(self):
+        # Next ('move', dx, dy) towards the current waypoint, or None when there is nothing to do
+        if self.route_job is not None and self.route_job.done():
+            path = self.route_job.result()
+            self.route_job = None
+            if path is None: self.add_message("No path", 'warn')
+            self.route = path or []
+            self.route_last = None
+        r = self.player.rect
+        if self.route and self.route_last == r.topleft: # Last step went nowhere
+            self.route = []
+            self.add_message("Path blocked", 'warn')
+        while self.route:
+            tx, ty = self.route[0]
+            dx = tx*TILE_SIZE + (TILE_SIZE - r.w)//2 - r.x
+            dy = ty*TILE_SIZE + (TILE_SIZE - r.h)//2 - r.y
+            if dx or dy:
+                s = PLAYER_SPEED
+                self.route_last = r.topleft
+                return ('move', max(-s, min(s, dx)), max(-s, min(s, dy)))
+            self.route.pop(0)
+        return None
+
+    def hash_state(self):
+        return f"{self.global_energy!r},{self.science_points},{sorted(self.upgrades.items())},{self.player.rect.x},{self.player.rect.y},{self.player.inventory.state()},{self.cursor.state()}"
+
+    def add_message(self, txt, category='info'):
+        self.notes.emit(category, txt)
 
     def get_ground_camera(self, target):
         x = -target.rect.x + SCREEN_WIDTH // 2
@@ -498,137 +1152,239 @@ class Game:
         return (x, y)
 
     def input(self):
-        keys = pygame.key.get_pressed()
-        mx, my = pygame.mouse.get_pos()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: sys.exit()
-            
-            # 1. Handle Window Dragging First (Top-level)
-            event_handled = False
-            
-            if event.type in [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION]:
-                # Iterate windows in reverse order (Top to Bottom) for clicks
-                for win in reversed(self.windows):
-                    if win.handle_event(event):
-                        # Bring to front
-                        if event.type == pygame.MOUSEBUTTONDOWN:
-                            self.windows.remove(win)
-                            self.windows.append(win)
-                            
-                            # Check close button
-                            if win.is_close_button_clicked(event.pos):
-                                win.visible = False
-                        event_handled = True
-                        break # Stop propagation if window caught it
-            
-            if event_handled: continue
+        t = self.prof.clock()
+        cmds = self.poll_commands()
+        self.apply_commands(cmds)
+        self.prof.lap('input', t)
+        return cmds
+
+    def dump_samples(self):
+        if not self.sampler:
+            self.add_message("Sampler off (start with --sample PATH)")
+            return
+        root, ext = os.path.splitext(self.sample_path)
+        path, n = self.sampler.dump(f"{root}-{time.strftime('%Y%m%d-%H%M%S')}{ext or '.collapsed'}")
+        self.add_message(f"{n} samples -> {path}")
+
+    def poll_commands(self):
+        return self.translate(*read_input())
+
+    def translate(self, events, held, mouse):
+        # Raw input (see read_input) -> plain, serialisable commands. Runs wherever the Game
+        # lives, so a split client (split.py) only has to forward its input.
+        mx, my = mouse
+        cmds = []
+
+        for ev in events:
+            kind = ev[0]
+            if kind == 'quit': sys.exit()
+            if kind == 'down' and self.role == 'SKY' and self.ui_sky_tree_open and UPGRADE_PANEL.collidepoint(ev[1], ev[2]):
+                uid = upgrade_at(ev[1], ev[2])
+                if uid: cmds.append(('upgrade', uid))
+            elif kind == 'down':
+                # Right-click on the ground is click-to-move: local routing that turns into plain 'move' commands
+                if ev[3] == 3 and self.role == 'GROUND' and self.ui.window_at(ev[1], ev[2]) is None: self.route_to(ev[1], ev[2])
+                else: cmds.append(('mdown', ev[1], ev[2], ev[3]))
+            elif kind == 'up': cmds.append(('mup', ev[1], ev[2], ev[3]))
+            elif kind == 'drag':
+                # A burst of drag motion collapses to its last position
+                if cmds and cmds[-1][0] == 'mmove': cmds[-1] = ('mmove', ev[1], ev[2])
+                else: cmds.append(('mmove', ev[1], ev[2]))
+            elif kind == 'wheel': cmds.append(('zoom', ev[1]))
+            elif kind == 'key':
+                key = ev[1]
+                if key == pygame.K_TAB: cmds.append(('role',))
+                elif key == pygame.K_r: cmds.append(('recipes',))
+                elif key == pygame.K_e: cmds.append(('inv',))
+                elif key == pygame.K_SPACE: cmds.append(('harvest',))
+                elif key == pygame.K_x: cmds.append(('dismantle',))
+                elif key == pygame.K_u: cmds.append(('tree',))
+                elif key == pygame.K_b and self.role == 'GROUND':
+                    # Two presses: the player's tile at each is a corner of the copied rectangle
+                    if self.bp_mark is None:
+                        self.bp_mark = self.player_tile()
+                        self.add_message("Blueprint corner set, [B] at the opposite corner")
+                    else:
+                        cmds.append(('copy', *self.bp_mark, *self.player_tile()))
+                        self.bp_mark = None
+                elif key == pygame.K_v: cmds.append(('paste',))
+                elif key == pygame.K_F3: self.prof.enable(not self.prof.on) # Local view only, not a command
+                elif key == pygame.K_F4: self.dump_samples()
+                elif key == pygame.K_g: # Local view only: cycle 1 s / 1 min / 10 min / off
+                    lv = self.graph_level
+                    self.graph_level = 0 if lv is None else lv + 1 if lv + 1 < len(telemetry.LEVELS) else None
+                elif key == pygame.K_3:
+                    wx, wy = self.screen_to_world(mx, my)
+                    cmds.append(('beam', round(wx), round(wy))) # Whole world px: commands carry no float state
+
+        # Mouse Pan in Sky
+        if self.role == 'SKY':
+            spd = 10 / self.sky_zoom
+            dx = dy = 0
+            if mx < 50: dx -= spd
+            if mx > SCREEN_WIDTH - 50: dx += spd
+            if my < 50: dy -= spd
+            if my > SCREEN_HEIGHT - 50: dy += spd
+            if dx or dy: cmds.append(('pan', dx, dy))
+
+        if self.role == 'GROUND':
+            s = PLAYER_SPEED
+            dx, dy = held[0] * s, held[1] * s
+            if dx or dy:
+                cmds.append(('move', dx, dy))
+                self.route, self.route_job = [], None # Manual input cancels click-to-move
+            else:
+                step = self.follow_route()
+                if step: cmds.append(step)
+        return cmds
+
+    def apply_commands(self, cmds):
+        for cmd in cmds:
+            op = cmd[0]
+
+            # 1. Mouse goes to the UI first. The windows are GROUND's: in co-op (network.Session,
+            # lockstep) they are shared state, and SKY, who can't see them, must not click into them.
+            if op in ('mdown', 'mup', 'mmove'):
+                if self.role != 'GROUND': continue
+                if op == 'mdown':
+                    win = self.ui.mouse_down(cmd[1], cmd[2], cmd[3])
+                    if win: self.handle_click(win, cmd[1], cmd[2])
+                elif op == 'mup': self.ui.mouse_up()
+                else: self.ui.mouse_move(cmd[1], cmd[2])
 
             # 2. Standard Input
-            if event.type == pygame.MOUSEWHEEL:
+            elif op == 'zoom':
                 if self.role == 'SKY':
-                    self.sky_zoom += event.y * 0.1
+                    self.sky_zoom += cmd[1] * 0.1
                     self.sky_zoom = max(0.5, min(3.0, self.sky_zoom))
 
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_TAB:
-                    self.role = 'SKY' if self.role == 'GROUND' else 'GROUND'
-                    self.add_message(f"Role: {self.role}")
-                    # Hide windows in Sky? Or allow them? Let's hide them for immersion
-                    if self.role == 'SKY':
-                        for w in self.windows: w.visible = False
-
-                if self.role == 'GROUND':
-                    if event.key == pygame.K_r: 
-                        self.win_recipe.visible = not self.win_recipe.visible
-                        if self.win_recipe.visible: # Bring to front
-                            self.windows.remove(self.win_recipe)
-                            self.windows.append(self.win_recipe)
-                    
-                    if event.key == pygame.K_e:
-                        if self.win_inv.visible:
-                            self.win_inv.visible = False
+            elif op == 'role':
+                self.role = 'SKY' if self.role == 'GROUND' else 'GROUND'
+                self.add_message(f"Role: {self.role}")
+                # Hide windows in Sky? Or allow them? Let's hide them for immersion
+                if self.role == 'SKY':
+                    for w in self.windows: w.visible = False
+                    self.ui.mouse_up() # A drag in progress can't be finished from SKY
+
+            elif self.role == 'GROUND':
+                if op == 'recipes':
+                    self.win_recipe.visible = not self.win_recipe.visible
+                    if self.win_recipe.visible: self.ui.bring_to_front(self.win_recipe)
+                
+                elif op == 'inv':
+                    if self.win_inv.visible:
+                        self.win_inv.visible = False
+                    else:
+                        b = self.building_near_player()
+                        if b is not None: self.sync_sim(b)
+                        self.win_inv.set_target(b)
+                        self.win_inv.visible = True
+                        self.ui.bring_to_front(self.win_inv)
+
+                elif op == 'harvest':
+                    hits = pygame.sprite.spritecollide(self.player_sprite, self.resources, False)
+                    for h in hits:
+                        if self.player.inventory.add(h.yield_item, 1):
+                            self.add_message("Inventory full!", 'warn')
+                            break
+                        if h.tile in self.ore_sprites: # Ore: one unit off the field, the marker stays until it is dry
+                            self.ore.take(h.tile)
+                            self.hasher.touch(('ore',), self.ore)
+                            if self.ore.remaining(h.tile) == 0: self.ore_depleted(h.tile)
                         else:
-                            # Check building
-                            hits = pygame.sprite.spritecollide(self.player_sprite, self.buildings, False)
-                            if hits:
-                                self.win_inv.target_machine = hits[0]
-                            else:
-                                self.win_inv.target_machine = None
-                            self.win_inv.visible = True
-                            self.windows.remove(self.win_inv)
-                            self.windows.append(self.win_inv)
-
-                    if event.key == pygame.K_SPACE:
-                        hits = pygame.sprite.spritecollide(self.player_sprite, self.resources, True)
-                        for h in hits:
-                            self.player.inventory[h.yield_item] += 1
-                            self.add_message(f"+1 {h.yield_item}")
+                            h.kill()
+                            del self.res_sprites[h.tile]
+                            self.world_dirty.append(h.rect)
+                            self.hasher.remove(('r', h.uid))
+                        self.notes.emit('loot', items.NAMES[h.yield_item])
 
-                if self.role == 'SKY':
-                    if event.key == pygame.K_3: self.input_sky_beam(mx, my)
+                elif op == 'copy': self.copy_blueprint(*cmd[1:])
+                elif op == 'paste': self.paste_blueprint()
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1: self.handle_click(mx, my)
-        
-        # Mouse Pan in Sky
-        if self.role == 'SKY':
-            spd = 10 / self.sky_zoom
-            if mx < 50: self.sky_cam_pos[0] -= spd
-            if mx > SCREEN_WIDTH - 50: self.sky_cam_pos[0] += spd
-            if my < 50: self.sky_cam_pos[1] -= spd
-            if my > SCREEN_HEIGHT - 50: self.sky_cam_pos[1] += spd
-
-        # Movement blocked if interacting with top window?
-        # For fluid gameplay, we allow movement unless dragging
-        dragging = any(w.dragging for w in self.windows)
-        if self.role == 'GROUND' and not dragging:
-            s = 4
-            if keys[pygame.K_w]: self.player.rect.y -= s
-            if keys[pygame.K_s]: self.player.rect.y += s
-            if keys[pygame.K_a]: self.player.rect.x -= s
-            if keys[pygame.K_d]: self.player.rect.x += s
-            self.player_sprite.rect = self.player.rect
-
-    def handle_click(self, mx, my):
-        # Click content of top-most visible window
-        for win in reversed(self.windows):
-            if win.visible and win.rect.collidepoint(mx, my):
-                # We are clicking inside this window
-                # Check for Close button logic again just in case (handled in events usually)
-                if not win.is_close_button_clicked((mx,my)):
-                    self.held_item = win.handle_click_content(self.held_item)
-                return
+                elif op == 'dismantle':
+                    b = self.building_near_player()
+                    if b:
+                        self.remove_building(b)
+                        self.add_message(f"Dismantled {b.b_type}")
+
+                # Movement blocked if interacting with top window?
+                # For fluid gameplay, we allow movement unless dragging
+                elif op == 'move':
+                    if self.ui.capture is None:
+                        s = PLAYER_SPEED # Never more than a step a command, whoever sent it
+                        dx, dy = max(-s, min(s, cmd[1])), max(-s, min(s, cmd[2]))
+                        self.move_player(dx, dy)
+                        if abs(dx) >= abs(dy): self.facing = (1 if dx > 0 else -1, 0)
+                        else: self.facing = (0, 1 if dy > 0 else -1)
+                        self.player_sprite.rect = self.player.rect
+
+            elif self.role == 'SKY':
+                if op == 'beam': self.input_sky_beam(cmd[1], cmd[2])
+                elif op == 'tree': self.ui_sky_tree_open = not self.ui_sky_tree_open
+                elif op == 'upgrade': self.buy_upgrade(cmd[1])
+                elif op == 'pan':
+                    self.sky_cam_pos[0] += cmd[1]
+                    self.sky_cam_pos[1] += cmd[2]
 
-    def input_sky_beam(self, mx, my):
-        wx, wy = self.screen_to_world(mx, my)
-        beam_range = 150 
+    def handle_click(self, win, mx, my):
+        # Content click on the top-most window under the mouse (already hit-tested)
+        self.cursor = win.handle_click_content(self.cursor, (mx, my))
+
+    def input_sky_beam(self, wx, wy):
         closest_building = None
-        min_dist = beam_range
+        min_dist = BEAM_RANGE * BEAM_RANGE # Squared: no sqrt in the simulation
         
-        for b in self.buildings:
-            dist = ((b.rect.centerx - wx)**2 + (b.rect.centery - wy)**2)**0.5
+        for b in self.ticking: # Drills run on nothing but ore
+            dist = (b.rect.centerx - wx)**2 + (b.rect.centery - wy)**2
             if dist < min_dist:
                 closest_building = b
                 min_dist = dist
         
         if closest_building:
-            give = 5
+            self.sync_sim(closest_building)
+            give = BEAM_AMOUNT
             if self.global_energy >= give:
                 closest_building.energy = min(closest_building.max_energy, closest_building.energy + give)
                 self.global_energy -= give
+                self.telemetry.add(telemetry.BEAMED, give / ENERGY_ONE)
                 closest_building.being_charged = True 
+                self.beam_frames = 2 # Draw the beam, then erase it
+                self.hasher.touch(('b', closest_building.uid), closest_building)
 
     def update(self):
-        self.messages = [[m, t-1] for m, t in self.messages if t > 0]
-        self.buildings.update(self)
+        P = self.prof
+        pt = P.clock()
+        self.notes.tick()
+        self.power.update() # Top up each grid's pool once, then machines draw from it
+        pt = P.lap('update.power', pt)
+        if self.lod_pins is None: self.lod_pins = self.pinned_regions()
+        pins = self.lod_pins
+        t = self.win_inv.target_machine
+        if self.win_inv.visible and t is not None and t in self.ticking:
+            pins = pins | {self.lod.region_of((t.rect.x // TILE_SIZE, t.rect.y // TILE_SIZE))}
+        for b in self.lod.step(self.lod_views(), pins, self.advance_buildings): b.update(self)
+        pt = P.lap('update.buildings', pt)
+        mined = self.ore.update()
+        for b, item_id in mined: b.slots.set(OUTPUT, item_id, b.slots.counts[OUTPUT] + 1)
+        for tile in self.ore.depleted: self.ore_depleted(tile)
+        if mined:
+            self.hasher.touch(('ore',), self.ore)
+            self.telemetry.add(telemetry.HARVESTED, len(mined))
+        pt = P.lap('update.ore', pt)
+        self.logistics.update()
+        for seg in self.logistics.moving: self.world_dirty.append(pygame.Rect(seg.bounds))
+        pt = P.lap('update.logistics', pt)
         
-        regen = 0.5 if self.upgrades['regen'] else 0.1
-        solars = [b for b in self.buildings if b.b_type == 'solar']
-        regen += (len(solars) * 0.2)
-        
-        cap = 200 if self.upgrades['capacity'] else 100
-        self.global_energy = min(cap, self.global_energy + regen)
+        regen = self.regen + self.power.loose_solars() * self.solar_regen
+        was = self.global_energy
+        self.global_energy = min(self.energy_cap, self.global_energy + regen)
+        if self.global_energy > was: self.telemetry.add(telemetry.REGEN, (self.global_energy - was) / ENERGY_ONE)
+        self.telemetry.tick()
+        self.hasher.touch(('g',), self) # Globals + player; re-hashed lazily
+        if len(self.world_dirty) > 1024: # Nobody is drawing (headless) or a huge change: repaint all
+            self.world_dirty.clear()
+            self.renderer.invalidate_all()
+        P.lap('update.regen', pt)
 
     def world_to_screen(self, wx, wy):
         off_x = wx - self.sky_cam_pos[0]
@@ -644,54 +1400,185 @@ class Game:
         wy = off_y + self.sky_cam_pos[1]
         return wx, wy
 
+    def world_rect_to_screen(self, wr):
+        if self.role == 'GROUND':
+            return wr.move(self.view_sig[1])
+        sx, sy = self.world_to_screen(wr.x, wr.y)
+        pad = 8 # Charging ring + outline around the sky marker
+        return pygame.Rect(sx - pad, sy - pad, wr.w * self.sky_zoom + 2*pad, wr.h * self.sky_zoom + 2*pad)
+
+    def collect_dirty(self):
+        R = self.renderer
+        # Camera scroll, zoom or role switch: everything moves, so repaint it all
+        if self.role == 'GROUND': view = ('GROUND', self.get_ground_camera(self.player_sprite))
+        else: view = ('SKY', tuple(self.sky_cam_pos), self.sky_zoom)
+        if view != self.view_sig or self.beam_frames: R.invalidate_all()
+        self.view_sig = view
+
+        # Buildings that animated, resources harvested, new buildings
+        for wr in self.world_dirty: R.add(self.world_rect_to_screen(wr))
+        self.world_dirty.clear()
+
+        # Windows: moved / shown / hidden / re-rendered / re-stacked
+        order = tuple(id(w) for w in self.windows)
+        restacked = order != self.win_order
+        self.win_order = order
+        for w in self.windows:
+            show = w.visible and self.role == 'GROUND'
+            changed = w.prepare() if show else False
+            sig = (show, tuple(w.rect))
+            old = self.win_sig.get(id(w))
+            if old != sig:
+                if old and old[0]: R.add(old[1])
+                if show: R.add(w.rect)
+            elif show and (changed or restacked): R.add(w.rect)
+            self.win_sig[id(w)] = sig
+
+        # Held item follows the mouse
+        cur = None
+        if self.role == 'GROUND' and self.cursor.ids[0] != EMPTY:
+            mx, my = pygame.mouse.get_pos()
+            cur = (mx-16, my-16, 32, 32, self.cursor.ids[0])
+        if cur != self.cursor_sig:
+            if self.cursor_sig: R.add(self.cursor_sig[:4])
+            if cur: R.add(cur[:4])
+        self.cursor_sig = cur
+
+        # HUD text only re-renders when its content changes
+        sig = self.hud_text()
+        if sig != self.hud_sig:
+            old = self.hud_rects()
+            self.hud_sig = sig
+            info, msgs = sig
+            self.hud_surfs = (render_text(self.font, info, C_WHITE), [render_text(self.font, m, C_WHITE) for m in msgs])
+            for r in old + self.hud_rects(): R.add(r)
+
+        # Profiler overlay re-renders every few frames while shown
+        sig = self.prof.rev if self.prof.on else None
+        if sig != self.prof_sig:
+            if self.prof_surf: R.add(self.prof_rect)
+            self.prof_sig = sig
+            self.prof_surf = self.render_profile() if self.prof.on else None
+            if self.prof_surf: R.add(self.prof_rect)
+
+        # Upgrade tree (SKY, [U]) re-renders when research or science points change
+        sig = (tuple(self.upgrades.values()), self.science_points) if self.role == 'SKY' and self.ui_sky_tree_open else None
+        if sig != self.tree_sig:
+            self.tree_sig = sig
+            self.tree_surf = render_upgrade_tree(self.upgrades, self.science_points) if sig else None
+            R.add(UPGRADE_PANEL)
+
+        # Rate graphs (SKY, [G]) re-render once per completed bucket of the chosen resolution
+        lv = self.graph_level
+        sig = (lv, self.telemetry.bucket(lv)) if self.role == 'SKY' and lv is not None else None
+        if sig != self.graph_sig:
+            self.graph_sig = sig
+            self.graph_surf = render_graphs(self.telemetry, lv) if sig else None
+            R.add(GRAPH_RECT)
+
+    def render_profile(self):
+        font = get_font("Courier New", 12)
+        lines = [render_text(font, l, C_WHITE) for l in self.prof.overlay_lines()]
+        w, h = max(l.get_width() for l in lines) + 12, len(lines) * 15 + 8
+        surf = tag(pygame.Surface((w, h)), 'ui')
+        surf.fill((10, 10, 30))
+        pygame.draw.rect(surf, C_UI_BORDER, surf.get_rect(), 1)
+        for i, l in enumerate(lines): surf.blit(l, (6, 4 + i*15))
+        self.prof_rect = pygame.Rect(SCREEN_WIDTH - w - 10, 40, w, h)
+        return surf
+
     def draw(self):
-        self.screen.fill(C_BG)
+        P = self.prof
+        t = P.clock()
+        self.collect_dirty()
+        full, rects = self.renderer.take()
+        P.lap('draw.collect', t)
+        for area in rects:
+            self.screen.set_clip(area)
+            self.draw_scene(area)
+        self.screen.set_clip(None)
+        if self.beam_frames: self.beam_frames -= 1
+
+        if self.headless: return
+        t = P.clock()
+        if full: pygame.display.flip()
+        elif rects: pygame.display.update(rects)
+        P.lap('flip', t)
+
+    def draw_scene(self, area):
+        P = self.prof
+        t = P.clock()
+        self.screen.fill(C_BG, area)
         
         if self.role == 'GROUND':
-            cam_off = self.get_ground_camera(self.player_sprite)
-            for t in self.tiles:
-                r = t.rect.move(cam_off)
-                if self.screen.get_rect().colliderect(r): self.screen.blit(t.image, r)
-            for g in [self.resources, self.buildings]:
-                for e in g:
-                    r = e.rect.move(cam_off)
-                    if self.screen.get_rect().colliderect(r): self.screen.blit(e.image, r)
+            cam_off = self.view_sig[1]
+            # Tiles: only the grid cells under this area
+            x0, y0 = (area.left - cam_off[0]) // TILE_SIZE, (area.top - cam_off[1]) // TILE_SIZE
+            x1, y1 = (area.right - 1 - cam_off[0]) // TILE_SIZE, (area.bottom - 1 - cam_off[1]) // TILE_SIZE
+            grid = self.tile_sprites
+            for ty in range(y0, y1+1):
+                for tx in range(x0, x1+1):
+                    tile = grid.get((tx, ty))
+                    if tile: self.screen.blit(tile.image, (tx*TILE_SIZE + cam_off[0], ty*TILE_SIZE + cam_off[1]))
+            t = P.lap('draw.terrain', t)
+            # Resources, then buildings: looked up by tile like the terrain, so the cost follows
+            # the area, not the size of the base (resources may overhang tiles smaller than them)
+            for g, pad in ((self.res_sprites, RES_PAD), (self.occupancy, 0)):
+                for ty in range(y0 - pad, y1 + pad + 1):
+                    for tx in range(x0 - pad, x1 + pad + 1):
+                        e = g.get((tx, ty))
+                        if e: self.screen.blit(e.image, e.rect.move(cam_off))
+            self.draw_belt_items(area, cam_off)
             self.screen.blit(self.player_sprite.image, self.player_sprite.rect.move(cam_off))
+            t = P.lap('draw.entities', t)
             
             # Draw Windows (Order matters: Bottom to Top)
             for win in self.windows:
-                if win.visible: win.draw(self.screen)
+                if win.visible and area.colliderect(win.rect): win.blit(self.screen)
             
-            if self.held_item:
-                mx, my = pygame.mouse.get_pos()
-                icon = pygame.Surface((32,32), pygame.SRCALPHA); 
-                draw_icon(icon, self.held_item['name'])
-                self.screen.blit(icon, (mx-16, my-16))
+            if self.cursor_sig:
+                self.screen.blit(get_icon(self.cursor_sig[4], 32), self.cursor_sig[:2])
+            t = P.lap('draw.windows', t)
                 
         elif self.role == 'SKY':
-            self.draw_sky_view()
-            if self.ui_sky_tree_open: self.draw_sky_upgrades()
+            self.draw_sky_view(area)
+            if self.graph_surf: self.screen.blit(self.graph_surf, GRAPH_RECT)
+            if self.tree_surf: self.draw_sky_upgrades()
+            t = P.lap('draw.sky', t)
 
         self.draw_hud()
-        pygame.display.flip()
+        P.lap('draw.hud', t)
 
-    def draw_sky_view(self):
-        tl_w = self.screen_to_world(0, 0)
-        br_w = self.screen_to_world(SCREEN_WIDTH, SCREEN_HEIGHT)
+    def draw_belt_items(self, area, cam_off):
+        net = self.logistics
+        half = TILE_SIZE // 2
+        for seg in net.segments:
+            if not seg.items or not area.colliderect(pygame.Rect(seg.bounds).move(cam_off)): continue
+            path, last = seg.path, len(seg.path) - 1
+            for item_id, p in seg.positions(net.now):
+                k = min(int(p // TICKS_PER_TILE), last)
+                f = (p - k * TICKS_PER_TILE) / TICKS_PER_TILE - 0.5
+                (tx, ty), (dx, dy) = path[k], net.belts[path[k]][0]
+                x = tx*TILE_SIZE + half + f*TILE_SIZE*dx + cam_off[0]
+                y = ty*TILE_SIZE + half + f*TILE_SIZE*dy + cam_off[1]
+                self.screen.blit(get_icon(item_id, 12), (x - 6, y - 6))
+
+    def draw_sky_view(self, area):
+        tl_w = self.screen_to_world(area.left, area.top)
+        br_w = self.screen_to_world(area.right, area.bottom)
         vis_rect = pygame.Rect(tl_w[0], tl_w[1], br_w[0]-tl_w[0], br_w[1]-tl_w[1])
         
         tile_size_z = TILE_SIZE * self.sky_zoom
         if tile_size_z < 2: return 
         
-        for t in self.tiles:
-            if vis_rect.colliderect(t.rect):
-                sx, sy = self.world_to_screen(t.rect.x, t.rect.y)
+        colors = {'grass': (34, 139, 34), 'sand': (238, 214, 175), 'water': (0, 105, 148)}
+        for ty in range(int(tl_w[1] // TILE_SIZE), int(br_w[1] // TILE_SIZE) + 1):
+            for tx in range(int(tl_w[0] // TILE_SIZE), int(br_w[0] // TILE_SIZE) + 1):
+                t_type = self.tile_map.get((tx, ty))
+                if t_type is None: continue
+                sx, sy = self.world_to_screen(tx*TILE_SIZE, ty*TILE_SIZE)
                 r = pygame.Rect(sx, sy, tile_size_z+1, tile_size_z+1)
-                col = (0,0,0)
-                if t.tile_type == 'grass': col = (34, 139, 34)
-                elif t.tile_type == 'sand': col = (238, 214, 175)
-                elif t.tile_type == 'water': col = (0, 105, 148)
-                pygame.draw.rect(self.screen, col, r)
+                pygame.draw.rect(self.screen, colors.get(t_type, (0,0,0)), r)
         
         mx, my = pygame.mouse.get_pos()
         for b in self.buildings:
@@ -700,9 +1587,9 @@ class Game:
                 rad = 6 * self.sky_zoom
                 col = C_RED
                 if b.b_type == 'solar': col = C_BLUE
-                elif b.energy > 0: col = C_GREEN
+                elif b.energy > 0 or (b.grid and b.grid.stored > 0): col = C_GREEN
                 
-                if getattr(b, 'being_charged', False):
+                if b.being_charged:
                     pygame.draw.line(self.screen, (0, 255, 255), (mx, my), (sx, sy), 3)
                     pygame.draw.circle(self.screen, (200, 255, 255), (sx, sy), rad + 4, 2)
                     col = (0, 255, 255)
@@ -715,23 +1602,85 @@ class Game:
         pygame.draw.rect(self.screen, C_WHITE, (sx, sy, w, h), 2)
 
     def draw_sky_upgrades(self):
-        # Placeholder for Sky Upgrade Tree UI (could be made into a window too!)
-        pass
+        self.screen.blit(self.tree_surf, UPGRADE_PANEL)
+
+    def hud_text(self):
+        info = f"ROLE: {self.role} | ENERGY: {self.global_energy // ENERGY_ONE} | SCIENCE: {self.science_points}"
+        if self.power.grids:
+            sup = sum(g.supply for g in self.power.grids) * FPS / ENERGY_ONE
+            dem = sum(g.last_demand for g in self.power.grids) * FPS / ENERGY_ONE
+            info += f" | POWER: {dem:.0f}/{sup:.0f}/s"
+        if self.role == 'GROUND': info += " | [R] RECIPES | [E] INV/MACHINE | [X] DISMANTLE | [B]/[V] BLUEPRINT | [RMB] WALK TO | [TAB] SKY"
+        else: info += " | SCROLL: ZOOM | [3] BEAM | [U] UPGRADES | [G] RATES | [TAB] GROUND"
+        return info, self.notes.lines()
+
+    def hud_rects(self):
+        rects = [pygame.Rect(0, 0, SCREEN_WIDTH, 30)]
+        for i, txt in enumerate(self.hud_surfs[1]):
+            rects.append(pygame.Rect(SCREEN_WIDTH//2 - txt.get_width()//2, 100 + i*20, txt.get_width(), txt.get_height()))
+        return rects
 
     def draw_hud(self):
-        for i, (msg, t) in enumerate(self.messages):
-            txt = self.font.render(msg, True, C_WHITE)
+        info, msgs = self.hud_surfs
+        for i, txt in enumerate(msgs):
             self.screen.blit(txt, (SCREEN_WIDTH//2 - txt.get_width()//2, 100 + i*20))
-        info = f"ROLE: {self.role} | ENERGY: {int(self.global_energy)}"
-        if self.role == 'GROUND': info += " | [R] RECIPES | [E] INV/MACHINE | [TAB] SKY"
-        else: info += " | SCROLL: ZOOM | [3] BEAM | [U] UPGRADES | [TAB] GROUND"
         pygame.draw.rect(self.screen, C_BG, (0,0,SCREEN_WIDTH, 30))
-        self.screen.blit(self.font.render(info, True, C_WHITE), (10, 5))
+        if info: self.screen.blit(info, (10, 5))
+        if self.prof_surf: self.screen.blit(self.prof_surf, self.prof_rect)
 
-if __name__ == "__main__":
+def main(argv=None):
+    p = argparse.ArgumentParser(allow_abbrev=False)
+    p.add_argument('--record', metavar='PATH', help="Record seed + per-tick input to a replay log")
+    p.add_argument('--profile', metavar='PATH', help="Profile from the start; write PATH.csv/.json/.trace.json on exit")
+    p.add_argument('--sample', metavar='PATH', help="Run the stack sampler; F4 and exit dump collapsed stacks next to PATH")
+    p.add_argument('--sample-ms', type=float, default=5, help="Sampling interval in ms")
+    p.add_argument('--sample-minutes', type=float, default=10, help="How much history a dump covers")
+    p.add_argument('--memstats', metavar='PATH', help="Append surface/entity/tracemalloc reports to PATH (JSON lines)")
+    p.add_argument('--memstats-every', type=float, default=10, help="Seconds between memory reports")
+    p.add_argument('--split', action='store_true', help="Simulate in a separate process; this one only draws (see split.py)")
+    p.add_argument('--lockstep-host', type=int, metavar='PORT', help="Lockstep co-op: wait for the other player on PORT (see lockstep.py)")
+    p.add_argument('--lockstep-join', metavar='HOST:PORT', help="Lockstep co-op: join a waiting host")
+    p.add_argument('--lockstep-role', choices=('GROUND', 'SKY'), default='GROUND', help="Host's role; the joiner gets the other")
+    args, _ = p.parse_known_args(argv)
+    if args.split:
+        import split
+        return split.run(args.record)
+    if args.lockstep_host or args.lockstep_join:
+        import lockstep
+        return lockstep.run(args.lockstep_host, args.lockstep_join, args.lockstep_role)
+
+    # Before Game(): world generation allocates most of the tagged surfaces
+    mem = memstats.MemoryMonitor(args.memstats, args.memstats_every) if args.memstats else None
     g = Game()
-    while True:
-        g.input()
-        g.update()
-        g.draw()
-        g.clock.tick(FPS)
\ No newline at end of file
+    rec = replay.Recorder(args.record, g) if args.record else None
+    if args.profile: g.prof.enable(True)
+    if args.sample:
+        g.sample_path = args.sample
+        g.sampler = StackSampler(args.sample_ms, args.sample_minutes, lambda: g.phase)
+        g.sampler.start()
+    try:
+        while True:
+            g.phase = 'input'
+            cmds = g.input()
+            if rec: rec.record(cmds)
+            g.phase = 'update'
+            g.update()
+            g.phase = 'draw'
+            g.draw()
+            g.phase = 'sleep'
+            t = g.prof.clock()
+            g.clock.tick(FPS)
+            g.prof.lap('sleep', t)
+            g.prof.end_frame()
+            if mem: mem.tick(g)
+    finally:
+        g.pathfinder.close()
+        if rec: rec.close()
+        if mem: mem.report(g)
+        if args.profile: print("Profile written:", *g.prof.export(args.profile))
+        if g.sampler:
+            g.sampler.stop()
+            print("Stack samples written: %s (%d)" % g.sampler.dump(args.sample))
+
+if __name__ == "__main__":
+    main()
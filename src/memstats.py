@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import Counter, deque
+
+# --- MEMORY ACCOUNTING ---
+# Surfaces are tagged with their origin where they are created. Tagging is a
+# no-op until enable() is called, after that each origin keeps a WeakSet of
+# its live Surfaces plus a running allocation count, so per-frame churn
+# (text renders) shows up next to resident memory (tiles, icons).
+ORIGINS = ('tiles', 'resources', 'buildings', 'ui', 'text')
+
+_live = None  # origin -> WeakSet of Surfaces (None while disabled)
+_made = None  # origin -> Surfaces created since enable()
+
+def enable():
+    global _live, _made
+    if _live is None:
+        _live = {o: weakref.WeakSet() for o in ORIGINS}
+        _made = Counter()
+
+def tag(surface, origin):
+    if _live is not None:
+        _live[origin].add(surface)
+        _made[origin] += 1
+    return surface
+
+def surface_stats():
+    # origin -> (live count, pixel bytes)
+    out = {}
+    for origin, live in (_live or {}).items():
+        surfs = list(live)
+        out[origin] = (len(surfs), sum(s.get_width() * s.get_height() * s.get_bytesize() for s in surfs))
+    return out
+
+def entity_stats(game):
+    return {'tiles': len(game.tiles), 'resources': len(game.resources), 'buildings': len(game.buildings),
+            'belts': len(game.logistics.belts), 'belt_segments': len(game.logistics.segments),
+            'items_in_transit': game.logistics.items_in_transit(), 'grids': len(game.power.grids), 'drills': game.ore.n,
+            'messages': len(game.notes.entries), 'hash_entries': len(game.hasher.parts)}
+
+class MemoryMonitor:
+    # Every `every` seconds: surfaces by origin, entity counts and the top
+    # tracemalloc growth since the previous report, appended as one JSON line
+    # to `path`. The last `keep` reports stay in memory for tools/tests.
+    # Only the snapshot itself is taken on the caller's thread; grouping and
+    # diffing it (seconds on a big heap) happens on a background thread.
+    def __init__(self, path, every=10.0, keep=60, top=10, frames=1):
+        enable()
+        if not tracemalloc.is_tracing(): tracemalloc.start(frames)
+        self.path = path
+        self.every = every
+        self.top = top
+        self.reports = deque(maxlen=keep)
+        self.t0 = self.last_t = time.perf_counter()
+        self.last_snap = tracemalloc.take_snapshot()
+        self.base = tracemalloc.get_traced_memory()[0]
+        self.last_made = Counter()
+        self.worker = None
+
+    def tick(self, game):
+        if time.perf_counter() - self.last_t >= self.every and not (self.worker and self.worker.is_alive()):
+            self.report(game, wait=False)
+
+    def report(self, game, wait=True):
+        now = time.perf_counter()
+        snap = tracemalloc.take_snapshot()
+        cur, peak = tracemalloc.get_traced_memory()
+        made = Counter(_made)
+        rep = {'t': round(now - self.t0, 1),
+               'traced_kib': cur // 1024, 'peak_kib': peak // 1024, 'growth_since_start_kib': (cur - self.base) // 1024,
+               'surfaces': {o: {'live': n, 'kib': b // 1024, 'made': made[o] - self.last_made[o]}
+                            for o, (n, b) in surface_stats().items()},
+               'entities': entity_stats(game)}
+        prev, self.last_snap, self.last_t, self.last_made = self.last_snap, snap, now, made
+        if self.worker: self.worker.join()
+        self.worker = threading.Thread(target=self._finish, args=(rep, snap, prev), name='memstats', daemon=True)
+        self.worker.start()
+        if wait: self.worker.join()
+        return rep
+
+    def _finish(self, rep, snap, prev):
+        own = tracemalloc.__file__
+        rep['top_growth'] = [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size_diff / 1024:+.1f} KiB ({s.count_diff:+d})"
+                             for s in snap.compare_to(prev, 'lineno') if s.size_diff and s.traceback[0].filename != own][:self.top]
+        self.reports.append(rep)
+        with open(self.path, 'a') as f: f.write(json.dumps(rep) + '\n')
@@ -0,0 +1,582 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from statehash import DesyncDetector
+
+# --- PROTOCOL ---
+# Every message is a JSON object framed as <u32 big-endian length><utf-8 body>.
+# Client -> server: {'t': 'join', 'session': id, 'role': 'GROUND'|'SKY', 'seed': optional}
+#                   {'t': 'cmd', 'cmds': [[op, ...], ...]}   (Game.apply_commands format)
+#                   {'t': 'hash', 'tick': n, 'h': total, 'b': [bucket sums]}   (clients that simulate)
+# Server -> client: {'t': 'welcome', ...} then {'t': 'state', ...} every SNAPSHOT_EVERY ticks,
+#                   {'t': 'hash', ...} every hash_every ticks, {'t': 'desync', 'tick': n} on mismatch
+HEADER = struct.Struct('!I')
+SNAPSHOT_EVERY = 6
+MAX_FRAME = 1 << 20
+WRITE_BUFFER_LIMIT = 256 * 1024 # Drop snapshots for clients that stop reading
+METRICS_EVERY = 1.0 # Seconds between worker stats polls while /metrics is enabled
+ROLES = ('GROUND', 'SKY')
+
+def encode(msg):
+    body = json.dumps(msg, separators=(',', ':')).encode()
+    return HEADER.pack(len(body)) + body
+
+def decode(body):
+    return json.loads(body)
+
+async def read_msg(reader):
+    n = HEADER.unpack(await reader.readexactly(HEADER.size))[0]
+    if n > MAX_FRAME: raise ValueError("frame too large")
+    return decode(await reader.readexactly(n))
+
+# --- COMMAND VALIDATION ---
+# What a client may put in {'t': 'cmd'}: op -> (role, argument kinds). Anything else (unknown op,
+# other role's op, wrong arity or types, 'role' itself) is dropped before Game.apply_commands sees it.
+COMMANDS = {
+    'mdown': ('GROUND', 'nni'), 'mup': ('GROUND', 'nni'), 'mmove': ('GROUND', 'nn'), # UI windows are GROUND's
+    'recipes': ('GROUND', ''), 'inv': ('GROUND', ''), 'harvest': ('GROUND', ''), 'dismantle': ('GROUND', ''),
+    'paste': ('GROUND', ''), 'copy': ('GROUND', 'iiii'), 'move': ('GROUND', 'ii'),
+    'zoom': ('SKY', 'n'), 'beam': ('SKY', 'nn'), 'pan': ('SKY', 'nn'), 'tree': ('SKY', ''), 'upgrade': ('SKY', 's'),
+}
+ARG_LIMIT = 1 << 31
+
+def valid_arg(v, kind):
+    # kind: 'i' int, 'n' finite number, 's' string
+    if isinstance(v, bool): return False
+    if kind == 's': return isinstance(v, str)
+    if kind == 'i': return isinstance(v, int) and -ARG_LIMIT < v < ARG_LIMIT
+    return isinstance(v, (int, float)) and math.isfinite(v) and -ARG_LIMIT < v < ARG_LIMIT
+
+def valid_cmd(cmd, role):
+    if not isinstance(cmd, (list, tuple)) or not cmd or not isinstance(cmd[0], str): return False
+    spec = COMMANDS.get(cmd[0])
+    if spec is None or spec[0] != role or len(cmd) != len(spec[1]) + 1: return False
+    return all(valid_arg(v, k) for v, k in zip(cmd[1:], spec[1]))
+
+# Size and rate caps on top of the table, so a client can't walk, pan or zoom faster than its own
+# input code would (Game.poll_commands): op -> (largest |argument|, uses per client per tick)
+PAN_MAX = 20 # 10 px per frame at the closest zoom, 0.5
+ZOOM_MAX = 10
+
+def cmd_limits(player_speed):
+    return {'move': (player_speed, 1), 'pan': (PAN_MAX, 1), 'zoom': (ZOOM_MAX, 4)}
+
+def capped(cmds, limits, used):
+    # Drops commands over their size or count; `used` (op -> count) spans one tick and is updated
+    out = []
+    for c in cmds:
+        lim = limits.get(c[0])
+        if lim:
+            n = used.get(c[0], 0)
+            if n >= lim[1] or any(abs(v) > lim[0] for v in c[1:]): continue
+            used[c[0]] = n + 1
+        out.append(c)
+    return out
+
+def session_seed(sid):
+    return zlib.crc32(str(sid).encode()) & 0x7fffffff
+
+def join_seed(sid, seed):
+    # A join's optional world seed: None picks the session's own, a non-int is refused (None)
+    if seed is None: return session_seed(sid)
+    return seed if type(seed) is int else None
+
+def snapshot(game, tick):
+    from main import ENERGY_ONE # Already loaded by Session; energy goes out in whole units
+    return {
+        't': 'state', 'tick': tick,
+        'energy': round(game.global_energy / ENERGY_ONE, 2),
+        'science': game.science_points,
+        'player': [game.player.rect.x, game.player.rect.y],
+        'buildings': [[b.rect.x, b.rect.y, b.b_type, round(b.energy / ENERGY_ONE, 1), b.process_timer] for b in game.buildings],
+    }
+
+# --- SESSION ---
+
+class Session:
+    # One GROUND/SKY world. Pure simulation: no sockets, no processes.
+    def __init__(self, sid, seed):
+        import main, config # Loaded lazily so the front process never imports pygame
+        self.sid = sid
+        self.seed = seed
+        self.game = main.Game(headless=True, seed=seed)
+        self.detector = DesyncDetector(self.game.hasher, f"server_{sid}", config.get().hash_every)
+        self.limits = cmd_limits(config.get().player_speed)
+        self.used = {} # cid -> {op: count} this tick, see capped()
+        self.tick_no = 0
+        self.clients = {} # cid -> role
+        self.pending = [] # (cid, cmds) in arrival order
+        self.pending_out = [] # Frames for every client, flushed on the next tick
+        self.kicked = [] # Clients to disconnect (their frames broke something), collected by the host
+
+    def join(self, cid, role):
+        self.clients[cid] = role
+        return [(cid, encode({'t': 'welcome', 'session': self.sid, 'seed': self.seed, 'role': role, 'tick': self.tick_no}))]
+
+    def leave(self, cid):
+        self.clients.pop(cid, None)
+
+    def drop(self, cid, err):
+        # Disconnect one client; the session and its other clients carry on
+        print(f"session {self.sid}: dropping client {cid}: {err!r}")
+        self.clients.pop(cid, None)
+        self.kicked.append(cid)
+
+    def handle(self, cid, msg):
+        role = self.clients.get(cid)
+        if role is None or not isinstance(msg, dict): return
+        t = msg.get('t')
+        if t == 'cmd':
+            cmds = msg.get('cmds')
+            if isinstance(cmds, list):
+                cmds = [tuple(c) for c in cmds if valid_cmd(c, role)]
+                self.pending.append((cid, capped(cmds, self.limits, self.used.setdefault(cid, {}))))
+        elif t == 'hash' and self.detector.check(cid, msg) is False:
+            self.pending_out.append(encode({'t': 'desync', 'tick': msg['tick']}))
+
+    def tick(self):
+        g = self.game
+        for cid, cmds in self.pending:
+            role = self.clients.get(cid)
+            if role is None or not cmds: continue
+            g.role = role # Roles are fixed per connection in co-op
+            try: g.apply_commands(cmds)
+            except Exception as e: self.drop(cid, e)
+        self.pending = []
+        self.used.clear()
+        g.update()
+        self.tick_no += 1
+
+        frames, self.pending_out = self.pending_out, []
+        if self.tick_no % self.detector.every == 0: g.sync_sim() # Hash the caught-up world
+        h = self.detector.local(self.tick_no)
+        if h: frames.append(encode(h))
+        if self.tick_no % SNAPSHOT_EVERY == 0: frames.append(encode(snapshot(g, self.tick_no)))
+        if not frames or not self.clients: return []
+        return [(cid, f) for cid in self.clients for f in frames]
+
+# --- WORKER PROCESS ---
+
+def worker_main(wid, inbox, outbox, tick_rate):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    sessions = {}
+    costs = {} # sid -> [ticks, total_ns, max_ns]
+    dt = 1.0 / tick_rate
+    started = next_t = time.perf_counter()
+    busy_ns = ticks = overruns = 0
+
+    while True:
+        # Drain control + input until the next tick is due
+        while True:
+            wait = next_t - time.perf_counter()
+            try: item = inbox.get(timeout=wait) if wait > 0 else inbox.get_nowait()
+            except queue.Empty: break
+            op = item[0]
+            if op == 'msg':
+                s = sessions.get(item[1])
+                if s:
+                    try: s.handle(item[2], item[3])
+                    except Exception as e: s.drop(item[2], e) # A bad frame costs its sender the connection, nothing more
+            elif op == 'join':
+                s = sessions.get(item[1])
+                if s: outbox.put(('out', s.join(item[2], item[3])))
+            elif op == 'leave':
+                s = sessions.get(item[1])
+                if s: s.leave(item[2])
+            elif op == 'open':
+                sessions[item[1]] = Session(item[1], item[2])
+                costs[item[1]] = [0, 0, 0]
+            elif op == 'close':
+                sessions.pop(item[1], None); costs.pop(item[1], None)
+            elif op == 'stats':
+                wall = time.perf_counter() - started
+                per = {sid: (c[1] / max(1, c[0]) / 1e6, c[2] / 1e6, c[0]) for sid, c in costs.items()}
+                outbox.put(('stats', wid, {'sessions': per, 'busy': busy_ns / 1e9 / max(wall, 1e-9),
+                                           'ticks': ticks, 'rate': ticks / max(wall, 1e-9), 'overruns': overruns,
+                                           'telemetry': {sid: s.game.telemetry.snapshot() for sid, s in sessions.items()}}))
+            elif op == 'reset': # Start a fresh measurement window
+                started = time.perf_counter()
+                busy_ns = ticks = overruns = 0
+                for c in costs.values(): c[:] = [0, 0, 0]
+            elif op == 'stop':
+                return
+
+        out = []
+        t_tick = time.perf_counter_ns()
+        broken = []
+        for sid, s in sessions.items():
+            t0 = time.perf_counter_ns()
+            try: out.extend(s.tick())
+            except Exception as e: # The world itself failed: end this session only
+                print(f"session {sid}: tick failed, closing: {e!r}")
+                s.kicked += list(s.clients)
+                broken.append(sid)
+            if s.kicked:
+                outbox.put(('kick', s.kicked))
+                s.kicked = []
+            c = costs[sid]; d = time.perf_counter_ns() - t0
+            c[0] += 1; c[1] += d
+            if d > c[2]: c[2] = d
+        for sid in broken: sessions.pop(sid); costs.pop(sid)
+        busy_ns += time.perf_counter_ns() - t_tick
+        ticks += 1
+        if out: outbox.put(('out', out))
+
+        next_t += dt
+        if time.perf_counter() - next_t > 5 * dt: # Fell behind: don't spiral, resync
+            overruns += 1
+            next_t = time.perf_counter()
+
+class WorkerPool:
+    # Sessions are sharded across processes so the GIL never serialises them.
+    def __init__(self, workers, tick_rate):
+        ctx = mp.get_context()
+        self.tick_rate = tick_rate
+        self.inboxes = [ctx.Queue() for _ in range(workers)]
+        self.outbox = ctx.Queue()
+        self.procs = [ctx.Process(target=worker_main, args=(i, self.inboxes[i], self.outbox, tick_rate), daemon=True)
+                      for i in range(workers)]
+        self.route = {} # sid -> worker index
+        self.load = [0] * workers
+
+    def start(self):
+        for p in self.procs: p.start()
+
+    def open(self, sid, seed):
+        if sid in self.route: return self.route[sid]
+        w = self.load.index(min(self.load)) # Least-loaded worker
+        self.inboxes[w].put(('open', sid, seed))
+        self.route[sid] = w
+        self.load[w] += 1
+        return w
+
+    def close(self, sid):
+        w = self.route.pop(sid, None)
+        if w is None: return
+        self.load[w] -= 1
+        self.inboxes[w].put(('close', sid))
+
+    def send(self, sid, item):
+        self.inboxes[self.route[sid]].put(item)
+
+    def request_stats(self):
+        for q in self.inboxes: q.put(('stats',))
+
+    def reset_stats(self):
+        for q in self.inboxes: q.put(('reset',))
+
+    def stop(self):
+        for q in self.inboxes: q.put(('stop',))
+        for p in self.procs: p.join(timeout=2)
+
+# --- FRONT (asyncio) ---
+
+class Server:
+    def __init__(self, host, port, workers, tick_rate, metrics_port=None, metrics_host='127.0.0.1'):
+        self.host, self.port = host, port
+        self.metrics_host, self.metrics_port = metrics_host, metrics_port
+        self.pool = WorkerPool(workers, tick_rate)
+        self.writers = {} # cid -> StreamWriter
+        self.members = {} # sid -> client count
+        self._ids = itertools.count(1)
+        self.stats = {}
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.pool.start()
+        threading.Thread(target=self._pump, daemon=True).start()
+        srv = await asyncio.start_server(self._client, self.host, self.port)
+        print(f"TerraSky server on {self.host}:{self.port} with {len(self.pool.procs)} workers")
+        if self.metrics_port:
+            await asyncio.start_server(self._metrics, self.metrics_host, self.metrics_port)
+            asyncio.create_task(self._poll_stats())
+            print(f"Metrics on http://{self.metrics_host}:{self.metrics_port}/metrics")
+        async with srv:
+            await srv.serve_forever()
+
+    def _pump(self):
+        # Worker output -> event loop (one hop per tick batch, not per frame)
+        while True:
+            item = self.pool.outbox.get()
+            if item[0] == 'out': self.loop.call_soon_threadsafe(self._deliver, item[1])
+            elif item[0] == 'stats': self.stats[item[1]] = item[2]
+            elif item[0] == 'kick': self.loop.call_soon_threadsafe(self._kick, item[1])
+
+    def _kick(self, cids):
+        # Closing the writer ends that client's read loop, which sends the usual 'leave'
+        for cid in cids:
+            w = self.writers.get(cid)
+            if w is not None: w.close()
+
+    def _deliver(self, batch):
+        for cid, frame in batch:
+            w = self.writers.get(cid)
+            if w is None or w.is_closing(): continue
+            if w.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT: continue
+            w.write(frame)
+
+    async def _client(self, reader, writer):
+        cid = next(self._ids)
+        sid = None
+        try:
+            hello = await read_msg(reader)
+            role = hello.get('role', 'GROUND')
+            if hello.get('t') != 'join' or role not in ROLES:
+                writer.write(encode({'t': 'error', 'reason': 'expected join with role GROUND or SKY'}))
+                return
+            name = str(hello.get('session', 'default'))
+            seed = join_seed(name, hello.get('seed'))
+            if seed is None:
+                writer.write(encode({'t': 'error', 'reason': 'seed must be an integer'}))
+                return
+            self.pool.open(name, seed)
+            self.members[name] = self.members.get(name, 0) + 1
+            sid = name # Counted in members from here on, so the cleanup below may undo it
+            self.writers[cid] = writer
+            sock = writer.get_extra_info('socket')
+            if sock: sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.pool.send(sid, ('join', sid, cid, role))
+            while True:
+                self.pool.send(sid, ('msg', sid, cid, await read_msg(reader)))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, TypeError, AttributeError): # Also malformed hellos
+            pass
+        finally:
+            self.writers.pop(cid, None)
+            if sid is not None:
+                self.pool.send(sid, ('leave', sid, cid))
+                self.members[sid] -= 1
+                if self.members[sid] <= 0:
+                    del self.members[sid]
+                    self.pool.close(sid)
+            writer.close()
+
+    # --- Metrics (Prometheus text format) ---
+
+    async def _poll_stats(self):
+        # Workers answer through _pump; /metrics serves the latest answers
+        while True:
+            self.pool.request_stats()
+            await asyncio.sleep(METRICS_EVERY)
+
+    async def _metrics(self, reader, writer):
+        try:
+            line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''): pass # Headers
+            parts = line.split()
+            if len(parts) < 2 or parts[0] != b'GET' or parts[1].split(b'?')[0] != b'/metrics':
+                status, body, ctype = "404 Not Found", b"not found\n", "text/plain"
+            else:
+                import telemetry
+                stats = dict(self.stats)
+                sessions = {sid: snap for st in stats.values() for sid, snap in st.get('telemetry', {}).items()}
+                status, body, ctype = "200 OK", telemetry.prometheus(sessions, stats).encode(), "text/plain; version=0.0.4"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+# --- CLIENT TRANSPORT ---
+
+class SocketTransport:
+    def __init__(self, host=None, port=None, sock=None):
+        self.sock = sock or socket.create_connection((host, port)) # sock: an accepted connection (lockstep host)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.inbox = queue.Queue()
+        self.bytes_in = self.bytes_out = 0
+        self.msgs_in = self.msgs_out = 0
+        self.closed = False
+        threading.Thread(target=self._reader, daemon=True).start()
+
+    def send(self, msg):
+        data = encode(msg)
+        self.sock.sendall(data)
+        self.bytes_out += len(data)
+        self.msgs_out += 1
+
+    def poll(self):
+        out = []
+        while True:
+            try: out.append(self.inbox.get_nowait())
+            except queue.Empty: return out
+
+    def close(self):
+        self.closed = True
+        try: self.sock.close()
+        except OSError: pass
+
+    def _reader(self):
+        buf = b''
+        while not self.closed:
+            try: chunk = self.sock.recv(65536)
+            except OSError: break
+            if not chunk: break
+            self.bytes_in += len(chunk)
+            buf += chunk
+            while len(buf) >= HEADER.size:
+                n = HEADER.unpack_from(buf)[0]
+                if len(buf) < HEADER.size + n: break
+                self.inbox.put(decode(buf[HEADER.size:HEADER.size + n]))
+                self.msgs_in += 1
+                buf = buf[HEADER.size + n:]
+        self.closed = True
+
+# --- LOOPBACK (in-process) ---
+
+class LoopbackTransport:
+    # Same interface and byte accounting as SocketTransport, but frames are
+    # handed straight to a LoopbackHub in the same process.
+    def __init__(self, hub, cid):
+        self.hub = hub
+        self.cid = cid
+        self.inbox = []
+        self.bytes_in = self.bytes_out = 0
+        self.msgs_in = self.msgs_out = 0
+        self.closed = False
+
+    def send(self, msg):
+        if self.closed: raise ConnectionError("transport closed")
+        data = encode(msg)
+        self.bytes_out += len(data)
+        self.msgs_out += 1
+        self.hub._receive(self.cid, data)
+
+    def poll(self):
+        out, self.inbox = self.inbox, []
+        return out
+
+    def close(self):
+        if not self.closed: self.hub._disconnect(self.cid)
+        self.closed = True
+
+    def _deliver(self, frame):
+        self.bytes_in += len(frame)
+        self.msgs_in += 1
+        self.inbox.append(decode(frame[HEADER.size:]))
+
+class LoopbackHub:
+    # Stand-in for Server + WorkerPool: the same Session objects, ticked by
+    # the caller on its own thread, so load tests need no sockets or display.
+    def __init__(self):
+        self.sessions = {}
+        self.links = {}  # cid -> LoopbackTransport
+        self.joined = {} # cid -> sid
+        self._ids = itertools.count(1)
+
+    def connect(self):
+        cid = next(self._ids)
+        self.links[cid] = LoopbackTransport(self, cid)
+        return self.links[cid]
+
+    def tick(self):
+        for s in list(self.sessions.values()):
+            for cid, frame in s.tick():
+                link = self.links.get(cid)
+                if link: link._deliver(frame)
+            for cid in s.kicked:
+                link = self.links.get(cid)
+                if link: link.close()
+            s.kicked = []
+
+    def _receive(self, cid, data):
+        msg = decode(data[HEADER.size:])
+        sid = self.joined.get(cid)
+        if sid is not None:
+            s = self.sessions[sid]
+            try: s.handle(cid, msg)
+            except Exception as e: s.drop(cid, e) # Closed on the next tick, as the worker does
+            return
+        role = msg.get('role', 'GROUND')
+        if msg.get('t') != 'join' or role not in ROLES:
+            self.links[cid]._deliver(encode({'t': 'error', 'reason': 'expected join with role GROUND or SKY'}))
+            return
+        sid = str(msg.get('session', 'default'))
+        seed = join_seed(sid, msg.get('seed'))
+        if seed is None:
+            self.links[cid]._deliver(encode({'t': 'error', 'reason': 'seed must be an integer'}))
+            return
+        if sid not in self.sessions: self.sessions[sid] = Session(sid, seed)
+        self.joined[cid] = sid
+        for c, frame in self.sessions[sid].join(cid, role): self.links[c]._deliver(frame)
+
+    def _disconnect(self, cid):
+        self.links.pop(cid, None)
+        sid = self.joined.pop(cid, None)
+        if sid is None: return
+        s = self.sessions[sid]
+        s.leave(cid)
+        if not s.clients: del self.sessions[sid]
+
+# --- CAPACITY BENCHMARK ---
+
+def bench_capacity(workers, sessions, seconds, tick_rate):
+    pool = WorkerPool(workers, tick_rate)
+    pool.start()
+    for i in range(sessions):
+        sid = f"bench-{i}"
+        pool.open(sid, session_seed(sid))
+        pool.send(sid, ('join', sid, i, 'GROUND')) # One listener so snapshots get encoded
+
+    time.sleep(1.0) # Let world generation finish before measuring
+    pool.reset_stats()
+    stats = {}
+    end = time.perf_counter() + seconds
+    asked = False
+    while len(stats) < workers:
+        if not asked and time.perf_counter() >= end:
+            pool.request_stats(); asked = True
+        try: item = pool.outbox.get(timeout=0.1)
+        except queue.Empty: continue
+        if item[0] == 'stats': stats[item[1]] = item[2]
+    pool.stop()
+
+    per_session = [v[0] for st in stats.values() for v in st['sessions'].values()]
+    busy = sum(st['busy'] for st in stats.values())
+    mean_ms = sum(per_session) / max(1, len(per_session))
+    budget_ms = 1000.0 / tick_rate
+    print(f"workers={workers} sessions={sessions} tick_rate={tick_rate}Hz")
+    for wid in sorted(stats):
+        st = stats[wid]
+        print(f"  worker {wid}: {len(st['sessions'])} sessions, {st['rate']:.1f} ticks/s, busy {st['busy']*100:.1f}%, overruns {st['overruns']}")
+    print(f"  mean session tick: {mean_ms:.3f} ms (budget {budget_ms:.2f} ms)")
+    print(f"  sessions per core @ {tick_rate}Hz: {sessions / busy if busy else float('inf'):.1f} measured, {budget_ms / mean_ms if mean_ms else float('inf'):.1f} from mean tick cost")
+
+# --- CLI ---
+
+def main(argv=None):
+    import config
+    p = argparse.ArgumentParser(description="TerraSky dedicated server", allow_abbrev=False)
+    p.add_argument('mode', choices=['serve', 'bench'])
+    p.add_argument('--host', default='0.0.0.0')
+    p.add_argument('--port', type=int, default=7777)
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.add_argument('--sessions', type=int, default=8, help="bench: sessions to host")
+    p.add_argument('--seconds', type=float, default=10, help="bench: measurement window")
+    p.add_argument('--metrics-port', type=int, help="serve: Prometheus metrics at http://HOST:PORT/metrics")
+    p.add_argument('--metrics-host', default='127.0.0.1', help="serve: interface for the metrics endpoint (local only by default)")
+    args, _ = p.parse_known_args(argv)
+    tick_rate = config.get().fps
+
+    if args.mode == 'serve':
+        try: asyncio.run(Server(args.host, args.port, args.workers, tick_rate, args.metrics_port, args.metrics_host).serve())
+        except KeyboardInterrupt: pass
+    else:
+        bench_capacity(args.workers, args.sessions, args.seconds, tick_rate)
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
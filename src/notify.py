@@ -0,0 +1,78 @@
+from collections import deque
+
+# --- NOTIFICATIONS ---
+# Every notice goes through emit(category, key, n). Subscribers see each raw
+# event (telemetry, bots, tools). The HUD only sees coalesced entries:
+# repeats of a live (category, key) add to its count and refresh its timer,
+# so a hundred labs make one "+37 Science Data" instead of a scrolling list.
+# Categories also limit how often they may open a new entry. Events that
+# arrive too soon wait in `pending` and are merged into one entry once the
+# gap has passed. Time is counted in ticks, so the bus is deterministic.
+
+# category -> (ticks shown, min ticks between new entries, counted: "+n key" rather than "key (xn)")
+CATEGORIES = {
+    'info':    (120, 0,  False),
+    'warn':    (120, 0,  False),
+    'loot':    (90,  15, True),
+    'science': (120, 60, True),
+}
+KEEP = 32 # Live entries kept (oldest dropped first)
+
+class NotificationBus:
+    def __init__(self, visible=6, history=256):
+        self.visible = visible
+        self.entries = {} # (category, key) -> [count, ticks left], oldest first
+        self.pending = {} # (category, key) -> count held back by the rate limit
+        self.last_new = {} # category -> tick its last entry opened
+        self.events = deque(maxlen=history) # Raw stream: (tick, category, key, n)
+        self.subscribers = [] # cb(category, key, n) on every emit
+        self.now = 0
+        self.rev = 0 # Bumped when the visible lines may have changed
+        self.cache = (-1, ())
+
+    def subscribe(self, cb):
+        self.subscribers.append(cb)
+
+    def emit(self, category, key, n=1):
+        self.events.append((self.now, category, key, n))
+        for cb in self.subscribers: cb(category, key, n)
+        k = (category, key)
+        e = self.entries.get(k)
+        if e is not None:
+            e[0] += n
+            e[1] = CATEGORIES[category][0]
+            self.rev += 1
+        elif self.now - self.last_new.get(category, -1 << 30) < CATEGORIES[category][1]:
+            self.pending[k] = self.pending.get(k, 0) + n
+        else:
+            self._open(k, n)
+
+    def _open(self, k, n):
+        self.entries[k] = [n, CATEGORIES[k[0]][0]]
+        self.last_new[k[0]] = self.now
+        if len(self.entries) > KEEP: del self.entries[next(iter(self.entries))]
+        self.rev += 1
+
+    def tick(self):
+        self.now += 1
+        if self.pending:
+            for k, n in list(self.pending.items()):
+                if self.now - self.last_new.get(k[0], -1 << 30) >= CATEGORIES[k[0]][1]:
+                    del self.pending[k]
+                    self._open(k, n)
+        dead = []
+        for k, e in self.entries.items():
+            e[1] -= 1
+            if e[1] <= 0: dead.append(k)
+        for k in dead: del self.entries[k]
+        if dead: self.rev += 1
+
+    def lines(self):
+        # Newest `visible` entries as HUD text, oldest of them first
+        if self.cache[0] == self.rev: return self.cache[1]
+        out = []
+        for (category, key), (n, _) in list(self.entries.items())[-self.visible:]:
+            if CATEGORIES[category][2]: out.append(f"+{n} {key}")
+            else: out.append(key if n == 1 else f"{key} (x{n})")
+        self.cache = (self.rev, tuple(out))
+        return self.cache[1]
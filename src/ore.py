@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import time
+
+import numpy as np
+
+from items import EMPTY
+
+# --- ORE FIELDS ---
+# Remaining ore per tile is one int32 array indexed y*w + x, with the item each
+# tile yields in a parallel array. Mining drills are rows of struct-of-arrays
+# columns (tile, phase, full), so a tick is a few array ops over every drill
+# at once; Python only runs for the drills that actually produced an item.
+# A drill fires when now % period == its phase (the tick it was built), which
+# spreads a big field of drills evenly over the period.
+
+class OreField:
+    def __init__(self, w, h, period=60):
+        self.w, self.h = w, h
+        self.period = period
+        self.yields = np.full(w * h, EMPTY, np.int32)
+        self.amount = np.zeros(w * h, np.int32)
+        self.n = 0 # Live drill rows; the columns below have spare capacity past n
+        self.tile = np.zeros(64, np.int64)
+        self.phase = np.zeros(64, np.int64)
+        self.full = np.zeros(64, bool) # Output can't take another item; kept current by the owner
+        self.owners = [] # row -> drill (gets .drill_row)
+        self.now = 0
+        self.depleted = [] # Tiles that ran dry during the last update()
+
+    def index(self, tile):
+        return tile[1] * self.w + tile[0]
+
+    def seed(self, tile, item_id, amount):
+        i = self.index(tile)
+        self.yields[i] = item_id
+        self.amount[i] = amount
+
+    def yield_at(self, tile):
+        i = self.index(tile)
+        return int(self.yields[i]) if self.amount[i] > 0 else EMPTY
+
+    def remaining(self, tile):
+        return int(self.amount[self.index(tile)])
+
+    def take(self, tile):
+        # One unit by hand; returns the item id, or EMPTY if the tile is dry
+        i = self.index(tile)
+        if self.amount[i] <= 0: return EMPTY
+        self.amount[i] -= 1
+        return int(self.yields[i])
+
+    # --- Drills ---
+
+    def add_drill(self, owner, tile):
+        n = self.n
+        if n == len(self.tile):
+            for name in ('tile', 'phase', 'full'):
+                col = getattr(self, name)
+                setattr(self, name, np.concatenate([col, np.zeros_like(col)]))
+        self.tile[n] = self.index(tile)
+        self.phase[n] = self.now % self.period
+        self.full[n] = False
+        self.owners.append(owner)
+        owner.drill_row = n
+        self.n = n + 1
+
+    def remove_drill(self, owner):
+        # Swap the last row into the hole
+        r, last = owner.drill_row, self.n - 1
+        if r != last:
+            for col in (self.tile, self.phase, self.full): col[r] = col[last]
+            moved = self.owners[r] = self.owners[last]
+            moved.drill_row = r
+        self.owners.pop()
+        self.n = last
+        owner.drill_row = None
+
+    def set_full(self, owner, full):
+        if owner.drill_row is not None: self.full[owner.drill_row] = full
+
+    def update(self):
+        # Returns [(owner, item_id)] for every drill that mined one unit this tick
+        now = self.now = self.now + 1
+        self.depleted = []
+        n = self.n
+        if not n: return []
+        rows = np.flatnonzero((self.phase[:n] == now % self.period) & ~self.full[:n])
+        if not rows.size: return []
+        t = self.tile[rows]
+        live = self.amount[t] > 0
+        rows, t = rows[live], t[live]
+        self.amount[t] -= 1 # One drill per tile (occupancy), so indices never repeat
+        self.depleted = [(i % self.w, i // self.w) for i in t[self.amount[t] == 0].tolist()]
+        owners = self.owners
+        return [(owners[r], y) for r, y in zip(rows.tolist(), self.yields[t].tolist())]
+
+    def hash_state(self):
+        h = hashlib.blake2b(self.amount.tobytes(), digest_size=8)
+        h.update(self.phase[:self.n].tobytes())
+        return h.hexdigest()
+
+# --- BENCHMARK ---
+
+def bench(drills, ticks, period):
+    from items import IRON_ORE, STACK, Inventory
+    side = int(drills ** 0.5 + 0.999)
+    field = OreField(side, side, period)
+    out = 1 # Output slot, as in main.Building
+
+    class Drill:
+        def __init__(self):
+            self.slots = Inventory(2)
+            self.drill_row = None
+            self.slots.listeners.append(lambda inv, i: field.set_full(self, inv.counts[out] >= STACK[IRON_ORE]))
+
+    for i in range(drills):
+        tile = (i % side, i // side)
+        field.seed(tile, IRON_ORE, 10 ** 6)
+        field.add_drill(Drill(), tile)
+        field.now += 1 # Build over time, like a player would
+    t0 = time.perf_counter()
+    mined = 0
+    for k in range(ticks):
+        for d, item_id in field.update():
+            d.slots.set(out, item_id, d.slots.counts[out] + 1)
+            mined += 1
+        if k % 600 == 599:
+            for d in field.owners: d.slots.set(out, EMPTY, 0) # Somebody empties them now and then
+    dt = time.perf_counter() - t0
+    print(f"{drills} drills, period {period}: {ticks} ticks in {dt:.2f}s ({dt / ticks * 1000:.3f} ms/tick), {mined} ore mined")
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Mining drill tick benchmark", allow_abbrev=False)
+    p.add_argument('--drills', type=int, default=10000)
+    p.add_argument('--ticks', type=int, default=3000)
+    p.add_argument('--period', type=int, default=60)
+    a = p.parse_args()
+    bench(a.drills, a.ticks, a.period)
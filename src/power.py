@@ -0,0 +1,189 @@
+# --- POWER GRID ---
+# Poles wire to other poles within `reach` tiles and connect machines within
+# `supply` tiles. Each connected component is a Grid with one shared energy
+# pool: solars add to it, machines draw from it, and the pool is topped up
+# once per tick per grid instead of per building.
+#
+# Grids are joined through poles only: a machine in range of several grids
+# takes the first one it finds and never bridges them. Components are kept
+# with union by size: placing a pole unions it into its neighbouring poles'
+# grids (relabelling the smaller side), so placement is near O(1). Removing a
+# pole can split a grid, so only that grid's members are re-unioned; removing
+# a machine never can.
+
+class Grid:
+    __slots__ = ('uid', 'members', 'solars', 'supply', 'capacity', 'stored', 'demand', 'last_demand')
+
+    def __init__(self, uid):
+        self.uid = uid
+        self.members = []
+        self.solars = 0
+        self.supply = 0   # Energy per tick from producers (fixed-point ints, like all sim energy)
+        self.capacity = 0 # Storage from producers' buffers
+        self.stored = 0
+        self.demand = 0   # Drawn so far this tick
+        self.last_demand = 0
+
+    def draw(self, amount):
+        if self.stored < amount: return False
+        self.stored -= amount
+        self.demand += amount
+        return True
+
+    def hash_state(self):
+        return f"{self.uid},{len(self.members)},{self.stored!r}"
+
+def tile_of(b, tile_size):
+    return (b.rect.x // tile_size, b.rect.y // tile_size)
+
+class PowerNetwork:
+    def __init__(self, building_at, tile_size, reach, supply, solar_power, hasher=None):
+        self.building_at = building_at
+        self.tile_size = tile_size
+        self.reach = reach
+        self.supply = supply
+        self.solar_power = solar_power
+        self.hasher = hasher
+        self.grids = {} # Grid -> None (insertion ordered for determinism)
+        self.next_uid = 0
+        self.solars = 0 # All solars, on or off grid
+
+    def producer_stats(self, b):
+        if b.b_type == 'solar': return self.solar_power, b.max_energy
+        return 0, 0
+
+    def _around(self, tile, r):
+        tx, ty = tile
+        for y in range(ty - r, ty + r + 1):
+            for x in range(tx - r, tx + r + 1):
+                b = self.building_at((x, y))
+                if b is not None: yield b
+
+    def _links(self, b):
+        # Nodes b is wired to: poles see poles in reach and machines in supply range; machines see poles
+        tile = tile_of(b, self.tile_size)
+        if b.b_type == 'pole':
+            for o in self._around(tile, self.reach):
+                if o is b or o.b_type == 'belt': continue
+                if o.b_type == 'pole' or max(abs(o.rect.x - b.rect.x), abs(o.rect.y - b.rect.y)) <= self.supply * self.tile_size:
+                    yield o
+        else:
+            for o in self._around(tile, self.supply):
+                if o.b_type == 'pole': yield o
+
+    def _join(self, g, b):
+        b.grid = g
+        g.members.append(b)
+        s, c = self.producer_stats(b)
+        g.supply += s
+        g.capacity += c
+        g.solars += b.b_type == 'solar'
+
+    def _leave(self, g, b):
+        b.grid = None
+        g.members.remove(b)
+        s, c = self.producer_stats(b)
+        g.supply -= s
+        g.capacity -= c
+        g.solars -= b.b_type == 'solar'
+        g.stored = min(g.stored, g.capacity)
+
+    def _union(self, a, b):
+        if a is b: return a
+        if len(a.members) < len(b.members): a, b = b, a
+        for m in b.members: m.grid = a
+        a.members += b.members
+        a.supply += b.supply
+        a.solars += b.solars
+        a.capacity += b.capacity
+        a.stored += b.stored
+        self._drop(b)
+        return a
+
+    def _new_grid(self):
+        g = Grid(self.next_uid)
+        self.next_uid += 1
+        self.grids[g] = None
+        return g
+
+    def _drop(self, g):
+        del self.grids[g]
+        if self.hasher: self.hasher.remove(('grid', g.uid))
+
+    def _connect(self, b):
+        # A machine joins the first grid among its poles (or stays off-grid); a pole unions
+        # every grid its poles are on and takes in the off-grid machines around it
+        links = list(self._links(b))
+        if b.b_type != 'pole':
+            for o in links:
+                if o.grid is not None:
+                    self._join(o.grid, b)
+                    return
+            return
+        g = None
+        for o in links:
+            if o.grid is None or o.b_type != 'pole': continue
+            if g is None: self._join(o.grid, b); g = o.grid
+            else: g = self._union(g, o.grid)
+        if g is None:
+            g = self._new_grid()
+            self._join(g, b)
+        for o in links: # Machines in range that were off-grid
+            if o.grid is None and o.b_type != 'pole': self._join(g, o)
+
+    def add(self, b):
+        if b.b_type == 'belt': return
+        self.solars += b.b_type == 'solar'
+        self._connect(b)
+
+    def add_many(self, bs):
+        # Bulk add; every building in bs must already be visible through building_at. Poles go
+        # first and join the machines around them, so most machines never search for a pole.
+        bs = [b for b in bs if b.b_type != 'belt']
+        self.solars += sum(b.b_type == 'solar' for b in bs)
+        for b in bs:
+            if b.b_type == 'pole': self._connect(b)
+        for b in bs:
+            if b.b_type != 'pole' and b.grid is None: self._connect(b)
+
+    def remove(self, b):
+        self.solars -= b.b_type == 'solar'
+        g = b.grid
+        if g is None: return
+        if b.b_type != 'pole': # Machines are leaves: removing one never splits a grid
+            self._leave(g, b)
+            return
+        b.grid = None
+        rest = [m for m in g.members if m is not b]
+        stored, cap = g.stored, g.capacity - self.producer_stats(b)[1]
+        self._drop(g)
+        for m in rest: m.grid = None
+        # Re-union the survivors (poles first so machines find them); energy is split by capacity
+        for m in rest:
+            if m.b_type == 'pole' and m.grid is None: self._connect(m)
+        for m in rest:
+            if m.grid is None: self._connect(m)
+        for ng in {m.grid: None for m in rest if m.grid is not None}:
+            ng.stored = min(ng.capacity, stored * ng.capacity // cap) if cap > 0 else 0
+
+    def update(self):
+        hasher = self.hasher
+        for g in self.grids:
+            g.last_demand, g.demand = g.demand, 0
+            g.stored = min(g.capacity, g.stored + g.supply)
+            if hasher: hasher.touch(('grid', g.uid), g)
+
+    def restat(self, solar_power):
+        # Producer stats changed (upgrades): recompute every grid's supply and capacity
+        self.solar_power = solar_power
+        for g in self.grids:
+            g.supply = g.capacity = 0
+            for m in g.members:
+                s, c = self.producer_stats(m)
+                g.supply += s
+                g.capacity += c
+            g.stored = min(g.stored, g.capacity)
+
+    def loose_solars(self):
+        # Solars outside any grid still feed the SKY player's global regen
+        return self.solars - sum(g.solars for g in self.grids)
@@ -0,0 +1,95 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+
+# --- FRAME PROFILER ---
+# Sections are timed by chaining laps off one clock reading:
+#     t = prof.clock(); work(); t = prof.lap('update.buildings', t); ...
+# While disabled, clock/lap are bound to trivial functions, so instrumented
+# code pays one call per section and nothing is stored.
+REFRESH = 30 # Frames between overlay/percentile refreshes
+
+def _zero():
+    return 0
+
+def _skip(name, t0):
+    return 0
+
+def percentile(sorted_vals, p):
+    if not sorted_vals: return 0
+    return sorted_vals[min(len(sorted_vals) - 1, int(p / 100.0 * len(sorted_vals)))]
+
+class FrameProfiler:
+    def __init__(self, window=600, trace_limit=200000):
+        self.window = window # Frames kept for rolling percentiles
+        self.stats = {}      # name -> deque of per-frame ns
+        self.acc = {}        # name -> ns so far this frame (sections can repeat, e.g. per dirty rect)
+        self.events = deque(maxlen=trace_limit) # (frame, name, start_ns, dur_ns)
+        self.frame_no = 0
+        self.frame_start = 0
+        self.rev = 0         # Bumped every REFRESH frames; the overlay re-renders on change
+        self.enable(False)
+
+    def enable(self, on):
+        self.on = on
+        self.clock = perf_counter_ns if on else _zero
+        self.lap = self._lap if on else _skip
+        self.frame_start = perf_counter_ns()
+        self.acc = {}
+
+    def _lap(self, name, t0):
+        t1 = perf_counter_ns()
+        self.acc[name] = self.acc.get(name, 0) + t1 - t0
+        self.events.append((self.frame_no, name, t0, t1 - t0))
+        return t1
+
+    def end_frame(self):
+        if not self.on: return
+        now = perf_counter_ns()
+        self.acc['frame'] = now - self.frame_start
+        self.events.append((self.frame_no, 'frame', self.frame_start, now - self.frame_start))
+        for name, ns in self.acc.items():
+            q = self.stats.get(name)
+            if q is None: q = self.stats[name] = deque(maxlen=self.window)
+            q.append(ns)
+        self.acc = {}
+        self.frame_start = now
+        self.frame_no += 1
+        if self.frame_no % REFRESH == 0: self.rev += 1
+
+    def summary(self):
+        # name -> {p50, p95, p99, max, mean} in ms over the rolling window
+        out = {}
+        for name in sorted(self.stats):
+            vals = sorted(self.stats[name])
+            out[name] = {'p50': percentile(vals, 50) / 1e6, 'p95': percentile(vals, 95) / 1e6,
+                         'p99': percentile(vals, 99) / 1e6, 'max': vals[-1] / 1e6,
+                         'mean': sum(vals) / len(vals) / 1e6, 'frames': len(vals)}
+        return out
+
+    def overlay_lines(self):
+        lines = [f"{'section':<18}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<18}{s['p50']:>7.2f}{s['p95']:>7.2f}{s['p99']:>7.2f}")
+        return lines
+
+    # --- Export ---
+
+    def export(self, path):
+        # PATH.csv (one row per section per frame), PATH.json (summary),
+        # PATH.trace.json (chrome://tracing / Perfetto "X" events, microseconds)
+        base = path[:-5] if path.endswith('.json') else path
+        with open(base + '.csv', 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['frame', 'section', 'start_ns', 'dur_ns'])
+            w.writerows(self.events)
+        with open(base + '.json', 'w') as f:
+            json.dump({'frames': self.frame_no, 'sections': self.summary()}, f, indent=1)
+        t0 = self.events[0][2] if self.events else 0
+        trace = [{'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': 1, 'tid': 1,
+                  'ts': (start - t0) / 1000, 'dur': dur / 1000, 'args': {'frame': frame}}
+                 for frame, name, start, dur in self.events]
+        with open(base + '.trace.json', 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+        return [base + '.csv', base + '.json', base + '.trace.json']
@@ -0,0 +1,39 @@
+import pygame
+
+# --- DIRTY RECTANGLES ---
+
+class DirtyRects:
+    # Screen regions that changed this frame. Small, scattered changes are
+    # presented with display.update(rects); anything big (camera scroll, role
+    # switch, too many or too large regions) degrades to one full frame.
+    def __init__(self, size, max_rects=24, max_fraction=0.4):
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.max_rects = max_rects
+        self.max_area = size[0] * size[1] * max_fraction
+        self.full = True
+        self.rects = []
+
+    def invalidate_all(self):
+        self.full = True
+
+    def add(self, rect):
+        if self.full: return
+        r = self.screen_rect.clip(pygame.Rect(rect))
+        if r.w and r.h: self.rects.append(r)
+
+    def take(self):
+        # Returns (full, rects) and starts a new frame
+        full, rects = self.full, self.rects
+        self.full, self.rects = False, []
+        if full: return True, [self.screen_rect]
+        merged = []
+        for r in rects: # Rects are few; fold overlapping ones together
+            for i, m in enumerate(merged):
+                if m.colliderect(r):
+                    merged[i] = m.union(r)
+                    break
+            else:
+                merged.append(r)
+        if len(merged) > self.max_rects or sum(r.w * r.h for r in merged) > self.max_area:
+            return True, [self.screen_rect]
+        return False, merged
@@ -0,0 +1,108 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+
+# --- LOG FORMAT ---
+# Line-oriented, append-only, optionally gzipped (path ends in .gz):
+#   TSREPLAY 2 {"seed": ..., "config": {...}}   (2: fixed-point energy; 1 logs hash differently)
+#   <tick> [[op, ...], ...]        only for ticks that had input
+#   end <ticks> <state hash>       written when the recording is closed
+MAGIC = 'TSREPLAY 2'
+FLUSH_EVERY = 600
+SEP = (',', ':')
+
+def _open(path, mode):
+    if path.endswith('.gz'): return gzip.open(path, mode + 't')
+    return open(path, mode)
+
+def state_hash(game):
+    game.sync_sim() # Far regions may be a few ticks behind (simulation LOD)
+    h = hashlib.blake2b(digest_size=8)
+    upd = h.update
+    for (x, y), t in game.tile_map.items(): upd(f"{x},{y},{t};".encode())
+    for r in game.resources: upd(f"{r.res_type},{r.rect.x},{r.rect.y};".encode())
+    for b in game.buildings:
+        upd(f"{b.b_type},{b.rect.x},{b.rect.y},{b.energy!r},{b.process_timer},{b.slots.state()};".encode())
+    for g in game.power.grids: upd(f"{g.hash_state()};".encode())
+    for seg in game.logistics.segments: upd(f"{seg.hash_state()};".encode())
+    upd(f"{game.ore.hash_state()};".encode())
+    upd(f"{game.global_energy!r},{game.science_points},{sorted(game.upgrades.items())};".encode())
+    upd(f"{game.player.rect.x},{game.player.rect.y},{game.player.inventory.state()},{game.cursor.state()}".encode())
+    return h.hexdigest()
+
+class Recorder:
+    def __init__(self, path, game):
+        import config
+        self.game = game
+        self.tick = 0
+        self.f = _open(path, 'w')
+        self.f.write(f"{MAGIC} {json.dumps({'seed': game.seed, 'config': config.get().as_dict()}, separators=SEP)}\n")
+
+    def record(self, cmds):
+        # Called once per tick with the commands Game.input applied
+        if cmds: self.f.write(f"{self.tick} {json.dumps(cmds, separators=SEP)}\n")
+        self.tick += 1
+        if self.tick % FLUSH_EVERY == 0: self.f.flush()
+
+    def close(self):
+        if self.f.closed: return
+        self.f.write(f"end {self.tick} {state_hash(self.game)}\n")
+        self.f.close()
+
+def read(path):
+    ticks, end = {}, None
+    with _open(path, 'r') as f:
+        first = f.readline()
+        if first.startswith('TSREPLAY ') and not first.startswith(MAGIC):
+            raise ValueError(f"{path}: replay format {first.split()[1]}, this build plays {MAGIC.split()[1]}")
+        if not first.startswith(MAGIC): raise ValueError(f"{path}: not a TerraSky replay")
+        header = json.loads(first[len(MAGIC):])
+        for line in f:
+            tag, _, rest = line.rstrip('\n').partition(' ')
+            if tag == 'end':
+                n, h = rest.split()
+                end = (int(n), h)
+            elif tag:
+                ticks[int(tag)] = [tuple(c) for c in json.loads(rest)]
+    return header, ticks, end
+
+def play(path, game_factory=None):
+    # Headless re-simulation at full speed. Returns (game, ticks, final hash, recorded end).
+    header, ticks, end = read(path)
+    import config
+    config.install(header['config']) # Constants are frozen on import, so install before main loads
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import main
+    g = (game_factory or main.Game)(headless=True, seed=header['seed'])
+    n = end[0] if end else (max(ticks) + 1 if ticks else 0)
+    for t in range(n):
+        cmds = ticks.get(t)
+        if cmds: g.apply_commands(cmds)
+        g.update()
+    return g, n, state_hash(g), end
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Re-simulate a TerraSky replay headlessly", allow_abbrev=False)
+    p.add_argument('path')
+    args, _ = p.parse_known_args(argv)
+
+    t0 = time.perf_counter()
+    g, n, h, end = play(args.path)
+    dt = time.perf_counter() - t0
+    print(f"{n} ticks in {dt:.2f}s ({n / max(dt, 1e-9):.0f} ticks/s), final hash {h}")
+    if end is None:
+        print("recording has no end marker (crashed?), nothing to compare")
+    elif end[1] == h:
+        print("MATCH")
+    else:
+        print(f"MISMATCH: recorded {end[1]}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
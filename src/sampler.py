@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# --- SAMPLING PROFILER ---
+# A daemon thread grabs the main thread's stack every few ms with
+# sys._current_frames() and keeps (time, stack) for a rolling window, so an
+# hour-long session can still be dumped as "what ran in the last N minutes".
+# Output is collapsed-stack text (one "root;...;leaf count" per line), the
+# input format of flamegraph.pl, speedscope and inferno.
+# The thread needs the GIL to sample, so the effective rate is also bounded
+# by sys.getswitchinterval() (5 ms by default) while the main thread is busy.
+
+class StackSampler:
+    def __init__(self, interval_ms=5, window_min=10, phase=None, thread_id=None):
+        self.interval = interval_ms / 1000.0
+        self.window = window_min * 60.0
+        self.phase = phase or (lambda: '-') # Called from the sampler thread; must be cheap
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.samples = deque(maxlen=int(self.window / self.interval) + 1) # (t, stack key)
+        self.labels = {} # code object -> "func (file:line)"
+        self.keys = {}   # (phase, codes...) -> collapsed key, shared between samples
+        self.running = False
+        self.thread = None
+        self.overhead = 0.0 # Seconds spent sampling, for the report
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread: self.thread.join()
+
+    def _label(self, code):
+        s = self.labels.get(code)
+        if s is None: s = self.labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return s
+
+    def _run(self):
+        clock = time.perf_counter
+        while self.running:
+            t0 = clock()
+            f = sys._current_frames().get(self.thread_id)
+            if f is not None:
+                codes = []
+                while f is not None:
+                    codes.append(f.f_code)
+                    f = f.f_back
+                k = (self.phase(), *codes)
+                key = self.keys.get(k)
+                if key is None:
+                    key = self.keys[k] = ';'.join([f"phase:{k[0]}"] + [self._label(c) for c in reversed(codes)])
+                self.samples.append((t0, key))
+            t1 = clock()
+            self.overhead += t1 - t0
+            time.sleep(max(0.0, self.interval - (t1 - t0)))
+
+    def collapsed(self, minutes=None):
+        cutoff = time.perf_counter() - (minutes * 60.0 if minutes else self.window)
+        return Counter(key for t, key in list(self.samples) if t >= cutoff)
+
+    def dump(self, path, minutes=None):
+        counts = self.collapsed(minutes)
+        with open(path, 'w') as f:
+            for key, n in sorted(counts.items()): f.write(f"{key} {n}\n")
+        return path, sum(counts.values())
@@ -0,0 +1,213 @@
+import argparse
+import atexit
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from items import EMPTY, STACK, SMELTS_TO, IRON_ORE, COPPER_ORE, IRON_BAR, COPPER_BAR
+
+# --- SHARDED SIMULATION ---
+# Furnaces and labs of cold regions (see lod.py) live as rows of column arrays
+# in a multiprocessing.shared_memory block. Each tick the rows are split
+# evenly over the worker processes, which step their slice with the same
+# rules as Building.update and meet at a barrier. Cross-row effects are only
+# counters (science, iron and copper bars made), written per worker and summed
+# by the owner in worker order, so the merge is deterministic. Rows of one region are packed
+# together and only move when the region turns hot again.
+FURNACE, LAB = 0, 1
+COLS = (('energy', np.int64), ('timer', np.int64), ('kind', np.int8),
+        ('in_id', np.int32), ('in_n', np.int32), ('out_id', np.int32), ('out_n', np.int32))
+HEADER = 8 # int64: n, cmd, furnace energy per tick, furnace target, lab energy per tick, lab cycle, rows capacity, rows generation
+CMD_TICK, CMD_STOP = 0, 1
+
+# Item tables, shifted by one so EMPTY (-1) indexes row 0
+SMELT = np.array([EMPTY] + list(SMELTS_TO), np.int32)
+LIMIT = np.array([0] + list(STACK), np.int32)
+SMELTABLE = np.zeros(len(SMELT), bool)
+SMELTABLE[[IRON_ORE + 1, COPPER_ORE + 1]] = True # Building.valid_inputs of a furnace
+
+def layout(cap):
+    # column -> (dtype, offset, length) inside the rows block
+    out, off = {}, 0
+    for name, dt in COLS:
+        out[name] = (dt, off, cap)
+        off += np.dtype(dt).itemsize * cap
+        off += -off % 8
+    return out, off
+
+def views(buf, lay):
+    return {name: np.ndarray((n,), dt, buf, off) for name, (dt, off, n) in lay.items()}
+
+def control(buf, workers):
+    # (header, made) inside the control block
+    return np.ndarray((HEADER,), np.int64, buf), np.ndarray((3 * max(1, workers),), np.int64, buf, HEADER * 8)
+
+def tick_rows(v, lo, hi, a, target, lab_a, lab_cycle):
+    # One tick of Building.update for rows lo:hi; returns (science, iron bars, copper bars) made
+    if hi <= lo: return 0, 0, 0
+    e, timer, kind = v['energy'][lo:hi], v['timer'][lo:hi], v['kind'][lo:hi]
+    in_id, in_n, out_id, out_n = v['in_id'][lo:hi], v['in_n'][lo:hi], v['out_id'][lo:hi], v['out_n'][lo:hi]
+    furnace = kind == FURNACE
+    has = in_id != EMPTY
+    run = has & (e > 0) & np.where(furnace, SMELTABLE[in_id + 1], True)
+    e -= np.where(run, np.where(furnace, a, lab_a), 0)
+    timer[:] = np.where(run, timer + 1, np.where(furnace, 0, timer)) # Idle labs keep their progress
+    done = run & (timer >= np.where(furnace, target, lab_cycle))
+    smelt = SMELT[in_id + 1]
+    room = done & furnace & ((out_id == EMPTY) | ((out_id == smelt) & (out_n < LIMIT[out_id + 1])))
+    bars = smelt[room]
+    out_id[:] = np.where(room, smelt, out_id)
+    out_n += room
+    labs = done & ~furnace
+    used = room | labs
+    in_n -= used
+    in_id[:] = np.where(used & (in_n <= 0), EMPTY, in_id)
+    in_n[:] = np.maximum(in_n, 0)
+    timer[done] = 0
+    return int(np.count_nonzero(labs)), int(np.count_nonzero(bars == IRON_BAR)), int(np.count_nonzero(bars == COPPER_BAR))
+
+def worker_main(wid, workers, name, barrier):
+    ctl = shared_memory.SharedMemory(name=name)
+    head, made = control(ctl.buf, workers)
+    rows, v, gen = None, None, -1
+    try:
+        while True:
+            barrier.wait()
+            if head[1] == CMD_STOP: break
+            if head[7] != gen: # Owner grew the rows block since the last tick
+                v = None
+                if rows: rows.close()
+                gen = int(head[7])
+                rows = shared_memory.SharedMemory(name=f"{name}_{gen}")
+                v = views(rows.buf, layout(int(head[6]))[0])
+            n = int(head[0])
+            made[3 * wid:3 * wid + 3] = tick_rows(v, n * wid // workers, n * (wid + 1) // workers, *head[2:6].tolist())
+            barrier.wait()
+    finally:
+        del v, head, made
+        if rows: rows.close()
+        ctl.close()
+
+class ShardPool:
+    # Owner side. workers == 0 ticks in-process (same arrays, no pool).
+    def __init__(self, workers=0, capacity=1024):
+        # Header and per-worker counters sit in a fixed control block; the rows
+        # live in a second block that is replaced when it fills up. Workers are
+        # started once and reattach to the new rows block by its generation.
+        self.workers = workers
+        self.n = 0
+        self.owners = [] # row -> owner object (has .shard_row)
+        self.procs = []
+        self.ctl = shared_memory.SharedMemory(create=True, size=8 * (HEADER + 3 * max(1, workers)))
+        self.head, self.made = control(self.ctl.buf, workers)
+        self.head[:] = 0
+        self.rows, self.gen = None, -1
+        self._grow(capacity)
+        if workers:
+            ctx = mp.get_context()
+            self.barrier = ctx.Barrier(workers + 1)
+            self.procs = [ctx.Process(target=worker_main, args=(w, workers, self.ctl.name, self.barrier), daemon=True)
+                          for w in range(workers)]
+            for p in self.procs: p.start()
+        atexit.register(self.close) # Stop workers and unlink the blocks even if the owner never closes
+
+    def _grow(self, cap):
+        old, self.gen = self.rows, self.gen + 1
+        lay, size = layout(cap)
+        self.rows = shared_memory.SharedMemory(create=True, size=size, name=f"{self.ctl.name}_{self.gen}")
+        v = views(self.rows.buf, lay)
+        if old:
+            for c, _ in COLS: v[c][:self.n] = self.v[c][:self.n]
+            self.v = None
+            old.close()
+            old.unlink() # Workers still map it until their next tick
+        self.v, self.cap = v, cap
+        self.head[6], self.head[7] = cap, self.gen
+
+    def close(self):
+        atexit.unregister(self.close)
+        if self.procs:
+            self.head[1] = CMD_STOP
+            self.barrier.wait()
+            for p in self.procs: p.join()
+            self.procs = []
+        if self.ctl:
+            self.v = self.head = self.made = None
+            for shm in (self.rows, self.ctl):
+                shm.close()
+                shm.unlink()
+            self.rows = self.ctl = None
+
+    # --- Rows ---
+
+    def add(self, owner, kind, energy, timer, in_id, in_n, out_id, out_n):
+        if self.n == self.cap: self._grow(self.cap * 2)
+        r = self.n
+        v = self.v
+        v['energy'][r], v['timer'][r], v['kind'][r] = energy, timer, kind
+        v['in_id'][r], v['in_n'][r], v['out_id'][r], v['out_n'][r] = in_id, in_n, out_id, out_n
+        self.owners.append(owner)
+        owner.shard_row = r
+        self.n = r + 1
+
+    def row(self, owner):
+        # (energy, timer, in_id, in_n, out_id, out_n) as Python numbers
+        r, v = owner.shard_row, self.v
+        return (int(v['energy'][r]), int(v['timer'][r]), int(v['in_id'][r]), int(v['in_n'][r]),
+                int(v['out_id'][r]), int(v['out_n'][r]))
+
+    def remove(self, owner):
+        r, last = owner.shard_row, self.n - 1
+        if r != last:
+            for c, _ in COLS: self.v[c][r] = self.v[c][last]
+            moved = self.owners[r] = self.owners[last]
+            moved.shard_row = r
+        self.owners.pop()
+        self.n = last
+        owner.shard_row = None
+
+    # --- Tick ---
+
+    def tick(self, a, target, lab_a, lab_cycle):
+        # One tick over every row; returns (science, iron bars, copper bars) made, summed in worker order
+        head = self.head
+        head[0], head[1], head[2], head[3], head[4], head[5] = self.n, CMD_TICK, a, target, lab_a, lab_cycle
+        if not self.workers: return tick_rows(self.v, 0, self.n, a, target, lab_a, lab_cycle)
+        self.barrier.wait() # Go
+        self.barrier.wait() # All slices done
+        made = self.made.reshape(-1, 3).sum(axis=0)
+        return int(made[0]), int(made[1]), int(made[2])
+
+# --- SCALING BENCHMARK ---
+
+def bench(buildings, ticks, max_workers):
+    import random
+    rng = random.Random(1)
+    rows = []
+    for i in range(buildings):
+        if i % 3 == 2: rows.append((LAB, 10 ** 12, 0, IRON_BAR, 50, EMPTY, 0))
+        else: rows.append((FURNACE, 10 ** 12, 0, rng.choice((IRON_ORE, COPPER_ORE)), 50, EMPTY, 0))
+    owner = type('Row', (), {})
+    base = None
+    for w in range(0, max_workers + 1):
+        pool = ShardPool(w, buildings)
+        for kind, e, t, ii, inn, oi, on in rows: pool.add(owner(), kind, e, t, ii, inn, oi, on)
+        pool.tick(500, 120, 500, 180) # Warm-up (workers attached)
+        t0 = time.perf_counter()
+        sci = 0
+        for _ in range(ticks): sci += pool.tick(500, 120, 500, 180)[0]
+        dt = time.perf_counter() - t0
+        rate = ticks / dt
+        base = base or rate
+        print(f"workers={w:<2} {'(in-process)' if not w else '':<12} {rate:8.1f} ticks/s  {dt / ticks * 1000:7.3f} ms/tick  x{rate / base:.2f}  science {sci}")
+        pool.close()
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Sharded simulation scaling benchmark", allow_abbrev=False)
+    p.add_argument('--buildings', type=int, default=100000)
+    p.add_argument('--ticks', type=int, default=300)
+    p.add_argument('--max-workers', type=int, default=mp.cpu_count())
+    a = p.parse_args()
+    bench(a.buildings, a.ticks, a.max_workers)
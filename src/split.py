@@ -0,0 +1,416 @@
+import math
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from logistics import TICKS_PER_TILE
+
+# --- SPLIT SIMULATION / RENDERING ---
+# The simulation runs headless in its own process and publishes what the
+# client draws into one shared_memory block: the static terrain once, then
+# two state buffers it alternates between. The client pins the newest
+# complete buffer and draws straight from numpy views onto it (no copy, no
+# pickling). The sim never waits on the client: if the buffer it would
+# overwrite is pinned, it skips publishing that tick. Input goes back over a
+# Pipe as raw events (main.read_input); the sim's Game translates them, so
+# commands, replays and the UI state machine stay where they were.
+#
+# Pin protocol, on header int64s (front, pin, seq, ready), each step under
+# one shared lock (which is also the memory fence between the processes):
+# the writer checks the back buffer isn't pinned and fills it, then flips
+# front and bumps seq; the reader pins front and unpins when done. Front
+# only moves to an unpinned buffer, so the pinned one is never written.
+# Holds are a few int64 stores, so neither side waits on the other's work.
+
+B_TYPES = ('furnace', 'solar', 'science_lab', 'belt', 'pole', 'drill')
+R_TYPES = ('tree', 'rock', 'iron_ore', 'copper_ore')
+T_TYPES = ('grass', 'sand', 'water')
+T_COLORS = ((34, 139, 34), (238, 214, 175), (0, 105, 148))
+DIRS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+B_INDEX = {t: i for i, t in enumerate(B_TYPES)}
+R_INDEX = {t: i for i, t in enumerate(R_TYPES)}
+D_INDEX = {d: i for i, d in enumerate(DIRS)}
+
+MAX_B = 1 << 16 # Buildings published (per buffer)
+MAX_R = 1 << 18 # Resources
+MAX_I = 1 << 16 # Belt items
+MSGS, MSG_LEN, HUD_LEN = 8, 64, 200
+SLOTS = 33 # Player inventory (30), machine in/out, cursor
+
+# Scalars, one float64 each
+G = ('tick', 'tick_ms', 'energy', 'sky', 'px', 'py', 'cam_x', 'cam_y', 'zoom', 'nb', 'nr', 'ni', 'nm',
+     'recipe', 'recipe_x', 'recipe_y', 'inv', 'inv_x', 'inv_y', 'recipe_top', 'target', 'tree', 'owned', 'science')
+GI = {name: i for i, name in enumerate(G)}
+FLAG_BUSY, FLAG_LIT, FLAG_CHARGED = 1, 2, 4
+
+def spec(w, h):
+    fields = [('head', np.int64, (4,)), ('terrain', np.uint8, (h, w))]
+    for k in (0, 1):
+        fields += [(f'{k}g', np.float64, (len(G),)), (f'{k}b', np.int32, (MAX_B, 6)), (f'{k}r', np.int32, (min(w * h, MAX_R), 3)),
+                   (f'{k}i', np.int32, (MAX_I, 3)), (f'{k}slots', np.int32, (SLOTS, 2)),
+                   (f'{k}msg', np.uint8, (MSGS, MSG_LEN)), (f'{k}hud', np.uint8, (HUD_LEN,))]
+    lay, off = {}, 0
+    for name, dt, shape in fields:
+        lay[name] = (dt, off, shape)
+        off += np.dtype(dt).itemsize * int(np.prod(shape))
+        off += -off % 8
+    return lay, off
+
+def put_text(dst, text):
+    raw = text.encode()[:len(dst) - 1]
+    dst[:len(raw)] = np.frombuffer(raw, np.uint8)
+    dst[len(raw)] = 0
+
+def get_text(src):
+    return bytes(src).split(b'\0', 1)[0].decode(errors='replace')
+
+class StateBuffer:
+    def __init__(self, shm, w, h, owner, lock):
+        self.shm = shm
+        self.owner = owner # Creator unlinks
+        self.lock = lock   # Guards head; pass it to the other process with the name
+        lay, _ = spec(w, h)
+        v = {name: np.ndarray(shape, dt, shm.buf, off) for name, (dt, off, shape) in lay.items()}
+        self.head, self.terrain = v['head'], v['terrain']
+        self.bufs = [{f: v[f'{k}{f}'] for f in ('g', 'b', 'r', 'i', 'slots', 'msg', 'hud')} for k in (0, 1)]
+        self.sigs = [[None, None], [None, None]] # Per buffer: building / resource set last written
+        self.tile = 32 # Tile size in px (set by the writer)
+
+    @classmethod
+    def create(cls, w, h):
+        shm = shared_memory.SharedMemory(create=True, size=spec(w, h)[1])
+        buf = cls(shm, w, h, True, mp.Lock())
+        buf.head[:] = (0, -1, 0, 0)
+        return buf
+
+    @classmethod
+    def attach(cls, name, w, h, lock):
+        return cls(shared_memory.SharedMemory(name=name), w, h, False, lock)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.head = self.terrain = self.bufs = None
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+    # --- Writer (sim process) ---
+
+    def publish_terrain(self, game):
+        idx = {t: i for i, t in enumerate(T_TYPES)}
+        for (x, y), t in game.tile_map.items(): self.terrain[y, x] = idx[t]
+        with self.lock: self.head[3] = 1
+
+    def ready(self):
+        with self.lock: return bool(self.head[3])
+
+    def publish(self, g, tick, tick_ms):
+        h = self.head
+        with self.lock:
+            k = 1 - int(h[0])
+            if h[2] and h[1] == k: return False # The client still holds it; try next tick
+        v = self.bufs[k]
+        sig = self.sigs[k]
+
+        bs = g.buildings.sprites()[:MAX_B]
+        nb = len(bs)
+        b = v['b']
+        if nb:
+            if sig[0] != (g.next_uid, nb): # Positions, kinds and directions only change with the building set
+                b[:nb, [0, 1, 2, 5]] = [(s.rect.x, s.rect.y, B_INDEX[s.b_type], D_INDEX.get(s.dir, 0)) for s in bs]
+            b[:nb, 3] = np.fromiter((s.look[0] for s in bs), np.int32, nb)
+            b[:nb, 4] = np.fromiter((s.look[1] | (s.energy > 0 or (s.grid is not None and s.grid.stored > 0)) << 1 | s.being_charged << 2
+                                     for s in bs), np.int32, nb)
+            for s in bs: s.being_charged = False # Shown once, as Game.draw_sky_view does
+        sig[0] = (g.next_uid, nb)
+
+        rs = v['r']
+        nr = min(len(g.resources), len(rs))
+        if sig[1] != nr:
+            if nr: rs[:nr] = [(r.rect.x, r.rect.y, R_INDEX[r.res_type]) for r in g.resources.sprites()[:nr]]
+            sig[1] = nr
+
+        ni = 0
+        it = v['i']
+        net, ts, tpt = g.logistics, self.tile, TICKS_PER_TILE
+        half = ts // 2
+        for seg in net.segments:
+            if not seg.items: continue
+            path, last = seg.path, len(seg.path) - 1
+            for item_id, p in seg.positions(net.now):
+                if ni == MAX_I: break
+                q = min(int(p // tpt), last)
+                f = (p - q * tpt) / tpt - 0.5
+                (tx, ty), (dx, dy) = path[q], net.belts[path[q]][0]
+                it[ni] = (tx*ts + half + f*ts*dx, ty*ts + half + f*ts*dy, item_id)
+                ni += 1
+
+        inv, cur, tgt = g.player.inventory, g.cursor, g.win_inv.target_machine
+        sl = v['slots']
+        sl[:30, 0], sl[:30, 1] = inv.ids[:30], inv.counts[:30]
+        if tgt is not None: sl[30:32, 0], sl[30:32, 1] = tgt.slots.ids, tgt.slots.counts
+        sl[32] = (cur.ids[0], cur.counts[0])
+
+        msgs = g.notes.lines()[-MSGS:]
+        for j, m in enumerate(msgs): put_text(v['msg'][j], m)
+        put_text(v['hud'], g.hud_text()[0])
+
+        gv = v['g']
+        r1, r2 = g.win_recipe.rect, g.win_inv.rect
+        gv[:] = (tick, tick_ms, g.global_energy, g.role == 'SKY', g.player_sprite.rect.x, g.player_sprite.rect.y,
+                 g.sky_cam_pos[0], g.sky_cam_pos[1], g.sky_zoom, nb, nr, ni, len(msgs),
+                 g.win_recipe.visible, r1.x, r1.y, g.win_inv.visible, r2.x, r2.y,
+                 g.windows[-1] is g.win_recipe, 0 if tgt is None else B_INDEX[tgt.b_type] + 1,
+                 g.ui_sky_tree_open, sum(1 << i for i, on in enumerate(g.upgrades.values()) if on), g.science_points)
+        with self.lock:
+            h[0] = k
+            h[2] += 1
+        return True
+
+    # --- Reader (client) ---
+
+    def acquire(self):
+        # Pin the newest complete buffer; returns its index, or None before the first publish
+        h = self.head
+        with self.lock:
+            if not h[2]: return None
+            h[1] = k = int(h[0])
+            return k
+
+    def release(self):
+        with self.lock: self.head[1] = -1
+
+# --- SIM PROCESS ---
+
+def sim_main(name, lock, inbox, record):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import main, replay
+    g = main.Game(headless=True)
+    buf = StateBuffer.attach(name, g.map_w, g.map_h, lock)
+    buf.tile = main.TILE_SIZE
+    buf.publish_terrain(g)
+    rec = replay.Recorder(record, g) if record else None
+    held, mouse = (0, 0), (0, 0)
+    dt = 1.0 / main.FPS
+    next_t = time.perf_counter()
+    tick = 0
+    try:
+        while True:
+            events = []
+            while inbox.poll():
+                msg = inbox.recv()
+                if msg is None: return
+                ev, held, mouse = msg
+                events += ev
+            t0 = time.perf_counter()
+            cmds = g.translate(events, held, mouse)
+            g.apply_commands(cmds)
+            if rec: rec.record(cmds)
+            g.update()
+            tick += 1
+            buf.publish(g, tick, (time.perf_counter() - t0) * 1000)
+            next_t += dt
+            wait = next_t - time.perf_counter()
+            if wait > 0: time.sleep(wait)
+            else: next_t = time.perf_counter() # Behind: don't try to catch up in a burst
+    except (SystemExit, EOFError):
+        pass
+    finally:
+        g.pathfinder.close()
+        if rec: rec.close()
+        buf.close()
+
+# --- CLIENT ---
+
+class View:
+    # Draws a published buffer. Reuses the game's own sprites and windows for looks only:
+    # buildings/resources are stamped from cached images, windows are fed mirrored inventories.
+    def __init__(self, buf, screen):
+        import main, pygame
+        from items import Inventory
+        self.m, self.pg = main, pygame
+        self.buf = buf
+        self.screen = screen
+        scratch = pygame.sprite.Group()
+        self.scratch = scratch
+        self.tile_img = [main.Tile(0, 0, t, scratch).image for t in T_TYPES]
+        self.res_img = [main.Resource(0, 0, t, scratch).image for t in R_TYPES]
+        self.b_img = {} # (kind, dir, bar, busy) -> Surface
+        pal = np.array(T_COLORS, np.uint8)
+        self.minimap = pygame.surfarray.make_surface(pal[buf.terrain.T]) # 1 px per tile for the SKY view
+        self.player = SimpleNamespace(inventory=Inventory(30))
+        self.target = None
+        self.cursor = Inventory(1)
+        self.win_inv = main.InventoryWindow(self.player)
+        self.win_recipe = main.RecipeWindow(None)
+        self.text = {} # str -> rendered Surface (HUD lines change rarely)
+        self.tree = (None, None) # (owned mask, science) -> upgrade panel
+        self.font = pygame.font.SysFont("Courier New", 14, bold=True)
+
+    def building_image(self, kind, d, bar, busy):
+        key = (kind, d, bar, busy)
+        img = self.b_img.get(key)
+        if img is None:
+            m = self.m
+            b = m.Building(0, 0, B_TYPES[kind], self.scratch, DIRS[d])
+            b.energy = (bar + 0.5) * b.max_energy / m.TILE_SIZE if bar >= 0 else 0
+            b.process_timer = int(busy)
+            b.redraw()
+            b.kill()
+            img = self.b_img[key] = b.image
+        return img
+
+    def label(self, text):
+        s = self.text.get(text)
+        if s is None:
+            if len(self.text) > 256: self.text.clear()
+            s = self.text[text] = self.m.render_text(self.font, text, self.m.C_WHITE)
+        return s
+
+    def draw(self):
+        k = self.buf.acquire()
+        if k is None: return False
+        try: self.render(self.buf.bufs[k])
+        finally: self.buf.release()
+        return True
+
+    def render(self, v):
+        m, g = self.m, v['g']
+        self.screen.fill(m.C_BG)
+        if g[GI['sky']]: self.draw_sky(v)
+        else: self.draw_ground(v)
+        self.draw_hud(v)
+
+    @staticmethod
+    def visible(rows, x0, y0, x1, y1, pad):
+        return rows[(rows[:, 0] > x0 - pad) & (rows[:, 0] < x1) & (rows[:, 1] > y0 - pad) & (rows[:, 1] < y1)].tolist()
+
+    def draw_ground(self, v):
+        m, pg, scr, g = self.m, self.pg, self.screen, v['g']
+        W, H, TS = m.SCREEN_WIDTH, m.SCREEN_HEIGHT, m.TILE_SIZE
+        ox, oy = W // 2 - int(g[GI['px']]), H // 2 - int(g[GI['py']])
+        T = self.buf.terrain
+        x0, y0 = max(0, -ox // TS), max(0, -oy // TS)
+        x1, y1 = min(T.shape[1] - 1, (W - 1 - ox) // TS), min(T.shape[0] - 1, (H - 1 - oy) // TS)
+        for ty, row in enumerate(T[y0:y1 + 1, x0:x1 + 1].tolist(), y0):
+            for tx, t in enumerate(row, x0): scr.blit(self.tile_img[t], (tx*TS + ox, ty*TS + oy))
+
+        wx0, wy0, wx1, wy1 = -ox, -oy, W - ox, H - oy
+        for x, y, kind in self.visible(v['r'][:int(g[GI['nr']])], wx0, wy0, wx1, wy1, TS):
+            scr.blit(self.res_img[kind], (x + ox, y + oy))
+        for x, y, kind, bar, flags, d in self.visible(v['b'][:int(g[GI['nb']])], wx0, wy0, wx1, wy1, TS):
+            scr.blit(self.building_image(kind, d, bar, flags & FLAG_BUSY), (x + ox, y + oy))
+        for x, y, item_id in self.visible(v['i'][:int(g[GI['ni']])], wx0, wy0, wx1, wy1, TS):
+            scr.blit(m.get_icon(item_id, 12), (x + ox - 6, y + oy - 6))
+        pg.draw.rect(scr, m.C_WHITE, (int(g[GI['px']]) + ox, int(g[GI['py']]) + oy, 20, 20))
+        self.draw_windows(v)
+
+    def draw_windows(self, v):
+        from items import Inventory
+        m, g, sl = self.m, v['g'], v['slots'].tolist()
+        inv = self.player.inventory
+        for i in range(30):
+            if (inv.ids[i], inv.counts[i]) != tuple(sl[i]): inv.set(i, *sl[i])
+        kind = int(g[GI['target']])
+        if kind != (self.target.kind if self.target else 0):
+            self.target = SimpleNamespace(kind=kind, b_type=B_TYPES[kind - 1], slots=Inventory(2)) if kind else None
+            self.win_inv.set_target(self.target)
+        if self.target:
+            for i in (0, 1):
+                s = self.target.slots
+                if (s.ids[i], s.counts[i]) != tuple(sl[30 + i]): s.set(i, *sl[30 + i])
+        for win, vis, x, y in ((self.win_recipe, 'recipe', 'recipe_x', 'recipe_y'), (self.win_inv, 'inv', 'inv_x', 'inv_y')):
+            win.visible = bool(g[GI[vis]])
+            pos = (int(g[GI[x]]), int(g[GI[y]]))
+            if win.rect.topleft != pos:
+                win.rect.topleft = win.title_bar.topleft = pos
+                win.on_move()
+        order = (self.win_inv, self.win_recipe) if g[GI['recipe_top']] else (self.win_recipe, self.win_inv)
+        for win in order:
+            if win.visible: win.draw(self.screen)
+        cid = sl[32][0]
+        if cid != m.EMPTY:
+            mx, my = self.pg.mouse.get_pos()
+            self.screen.blit(m.get_icon(cid, 32), (mx - 16, my - 16))
+
+    def draw_sky(self, v):
+        m, pg, scr, g = self.m, self.pg, self.screen, v['g']
+        W, H, TS = m.SCREEN_WIDTH, m.SCREEN_HEIGHT, m.TILE_SIZE
+        zoom, cx, cy = g[GI['zoom']], g[GI['cam_x']], g[GI['cam_y']]
+        def to_screen(wx, wy): return (wx - cx) * zoom + W // 2, (wy - cy) * zoom + H // 2
+        wx0, wy0 = cx - W / 2 / zoom, cy - H / 2 / zoom
+        wx1, wy1 = cx + W / 2 / zoom, cy + H / 2 / zoom
+        mw, mh = self.minimap.get_size()
+        tx0, ty0 = max(0, int(wx0 // TS)), max(0, int(wy0 // TS))
+        tx1, ty1 = min(mw, int(wx1 // TS) + 1), min(mh, int(wy1 // TS) + 1)
+        if tx1 > tx0 and ty1 > ty0:
+            sub = self.minimap.subsurface((tx0, ty0, tx1 - tx0, ty1 - ty0))
+            size = (math.ceil((tx1 - tx0) * TS * zoom), math.ceil((ty1 - ty0) * TS * zoom))
+            scr.blit(pg.transform.scale(sub, size), to_screen(tx0 * TS, ty0 * TS))
+        mx, my = pg.mouse.get_pos()
+        rad = max(3, 6 * zoom)
+        for x, y, kind, bar, flags, d in self.visible(v['b'][:int(g[GI['nb']])], wx0, wy0, wx1, wy1, TS):
+            sx, sy = to_screen(x + TS // 2, y + TS // 2)
+            col = m.C_BLUE if B_TYPES[kind] == 'solar' else m.C_GREEN if flags & FLAG_LIT else m.C_RED
+            if flags & FLAG_CHARGED:
+                pg.draw.line(scr, (0, 255, 255), (mx, my), (sx, sy), 3)
+                pg.draw.circle(scr, (200, 255, 255), (sx, sy), rad + 4, 2)
+                col = (0, 255, 255)
+            pg.draw.circle(scr, col, (sx, sy), rad)
+        sx, sy = to_screen(g[GI['px']], g[GI['py']])
+        pg.draw.rect(scr, m.C_WHITE, (sx, sy, 20 * zoom, 20 * zoom), 2)
+        if g[GI['tree']]:
+            sig = (int(g[GI['owned']]), int(g[GI['science']]))
+            if self.tree[0] != sig:
+                owned = {uid: bool(sig[0] >> i & 1) for i, uid in enumerate(m.UPGRADES)}
+                self.tree = (sig, m.render_upgrade_tree(owned, sig[1]))
+            scr.blit(self.tree[1], m.UPGRADE_PANEL)
+
+    def draw_hud(self, v):
+        m, g, scr = self.m, v['g'], self.screen
+        W = m.SCREEN_WIDTH
+        for i in range(int(g[GI['nm']])):
+            txt = self.label(get_text(v['msg'][i]))
+            scr.blit(txt, (W // 2 - txt.get_width() // 2, 100 + i * 20))
+        self.pg.draw.rect(scr, m.C_BG, (0, 0, W, 30))
+        scr.blit(self.label(f"{get_text(v['hud'])} | SIM {g[GI['tick_ms']]:.1f} ms"), (10, 5))
+
+def run(record=None):
+    # Client entry point (main.py --split): owns the window and the shared block, forks the sim
+    import main, pygame
+    buf = StateBuffer.create(main.MAP_W, main.MAP_H)
+    ctx = mp.get_context()
+    rx, tx = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=sim_main, args=(buf.name, buf.lock, rx, record), name='sim', daemon=True)
+    proc.start()
+    try:
+        pygame.init()
+        screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+        pygame.display.set_caption("TerraSky (split)")
+        while not buf.ready():
+            if not proc.is_alive(): raise RuntimeError("simulation process exited during startup")
+            time.sleep(0.01)
+        view = View(buf, screen)
+        clock = pygame.time.Clock()
+        last = None
+        while proc.is_alive():
+            events, held, mouse = main.read_input()
+            if any(e[0] == 'quit' for e in events): break
+            if events or (held, mouse) != last:
+                tx.send((events, held, mouse))
+                last = (held, mouse)
+            view.draw()
+            pygame.display.flip()
+            clock.tick(main.FPS)
+    finally:
+        try: tx.send(None)
+        except (BrokenPipeError, OSError): pass
+        proc.join(5)
+        buf.close()
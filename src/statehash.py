@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import zlib
+
+# --- INCREMENTAL STATE HASH ---
+# The world hash is the sum (mod 2^64) of one 64-bit digest per entity, so an
+# entity can be swapped in or out without touching the others. Entities that
+# change only get marked dirty (a dict store); their digest is recomputed the
+# next time someone asks for the hash, i.e. once per exchange, not per tick.
+BUCKETS = 64
+MASK = (1 << 64) - 1
+
+def _digest(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+def _bucket(key):
+    return zlib.crc32(repr(key).encode()) % BUCKETS
+
+class StateHash:
+    def __init__(self):
+        self.parts = {}   # key -> (bucket, digest)
+        self.objs = {}    # key -> object with hash_state(), for dumps
+        self.dirty = {}   # key -> object with hash_state()
+        self.buckets = [0] * BUCKETS
+
+    def set(self, key, text):
+        old = self.parts.get(key)
+        b = old[0] if old else _bucket(key)
+        d = _digest(text)
+        if old: self.buckets[b] = (self.buckets[b] - old[1]) & MASK
+        self.buckets[b] = (self.buckets[b] + d) & MASK
+        self.parts[key] = (b, d)
+
+    def touch(self, key, obj):
+        self.dirty[key] = obj
+        self.objs[key] = obj
+
+    def remove(self, key):
+        self.dirty.pop(key, None)
+        self.objs.pop(key, None)
+        old = self.parts.pop(key, None)
+        if old: self.buckets[old[0]] = (self.buckets[old[0]] - old[1]) & MASK
+
+    def flush(self):
+        if not self.dirty: return
+        for key, obj in self.dirty.items(): self.set(key, obj.hash_state())
+        self.dirty = {}
+
+    def digest(self):
+        self.flush()
+        return sum(self.buckets) & MASK
+
+    def entities_in(self, buckets):
+        self.flush()
+        buckets = set(buckets)
+        return {repr(k): (self.objs[k].hash_state() if k in self.objs else None)
+                for k, (b, _) in self.parts.items() if b in buckets}
+
+# --- DESYNC DETECTOR ---
+
+def well_formed(msg):
+    # Peer hash messages come off the wire: {'tick': int, 'h': u64, 'b': [BUCKETS x u64]}
+    if not isinstance(msg, dict): return False
+    tick, h, b = msg.get('tick'), msg.get('h'), msg.get('b')
+    if type(tick) is not int or tick <= 0 or type(h) is not int or not 0 <= h <= MASK: return False
+    return isinstance(b, list) and len(b) == BUCKETS and all(type(v) is int and 0 <= v <= MASK for v in b)
+
+class DesyncDetector:
+    # Compares this side's hash with peers' every `every` ticks; on mismatch
+    # dumps the entities in the buckets that disagree.
+    def __init__(self, hasher, name, every, dump_dir='.', keep=16):
+        self.hasher = hasher
+        self.name = name
+        self.every = every
+        self.dump_dir = dump_dir
+        self.keep = keep
+        self.history = {} # tick -> (total, buckets)
+        self.early = {}   # tick -> {peer: msg} that arrived before we reached that tick
+        self.n_early = 0
+        self.last = 0     # Newest local check tick
+        self.desyncs = []
+        self.dumped = set() # (tick, peer) already dumped; repeats only report
+
+    def local(self, tick):
+        # Call after each tick's update. Returns the message to send, if this is a check tick.
+        if tick % self.every: return None
+        total = self.hasher.digest()
+        self.last = tick
+        self.history[tick] = (total, list(self.hasher.buckets))
+        for old in [t for t in self.history if t <= tick - self.every * self.keep]: del self.history[old]
+        self.dumped = {k for k in self.dumped if k[0] in self.history}
+        early = self.early.pop(tick, {})
+        self.n_early -= len(early)
+        for peer, msg in early.items(): self.check(peer, msg)
+        return {'t': 'hash', 'tick': tick, 'h': total, 'b': self.history[tick][1]}
+
+    def check(self, peer, msg):
+        # True = match, False = mismatch (dumped), None = not comparable (yet): malformed, a tick
+        # that is no check tick or already forgotten, too far ahead, or too many waiting already
+        if not well_formed(msg): return None
+        tick = msg['tick']
+        mine = self.history.get(tick)
+        if mine is None:
+            if tick % self.every or tick <= self.last or tick > self.last + self.every * self.keep: return None
+            waiting = self.early.get(tick, {})
+            if peer not in waiting:
+                if self.n_early >= self.keep * 4: return None
+                self.n_early += 1
+            self.early.setdefault(tick, waiting)[peer] = msg # A repeat replaces it
+            return None
+        if mine[0] == msg['h']: return True
+        if (tick, peer) in self.dumped: return False
+        self.dumped.add((tick, peer))
+        bad = [i for i, (a, b) in enumerate(zip(mine[1], msg['b'])) if a != b]
+        self.dump(peer, tick, mine[0], msg['h'], bad)
+        return False
+
+    def dump(self, peer, tick, mine, theirs, bad):
+        path = os.path.join(self.dump_dir, f"desync_{self.name}_t{tick}_vs_{peer}.json")
+        data = {'tick': tick, 'peer': str(peer), 'local': mine, 'remote': theirs, 'buckets': bad,
+                'note': 'entity state is as of detection, which may be a few ticks after the divergence',
+                'entities': self.hasher.entities_in(bad)}
+        with open(path, 'w') as f: json.dump(data, f, indent=1)
+        self.desyncs.append((tick, peer, path))
+        print(f"DESYNC at tick {tick} vs {peer}: {len(bad)} buckets differ, dumped {path}")
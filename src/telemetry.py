@@ -0,0 +1,83 @@
+import numpy as np
+
+from items import IRON_BAR, COPPER_BAR
+
+# --- PRODUCTION TELEMETRY ---
+# Counters accumulate into one small float array during a tick. At the end
+# of the tick it is folded into the running totals and into the current
+# bucket of three ring buffers (1 s, 1 min, 10 min resolution). Buckets are
+# reused in place, so recording never allocates. Time is counted in
+# simulation ticks, so the rates are the factory's own and not wall-clock.
+COUNTERS = ('harvested', 'iron_bar', 'copper_bar', 'science', 'energy_beamed', 'energy_regen')
+HARVESTED, IRON, COPPER, SCIENCE, BEAMED, REGEN = range(len(COUNTERS))
+SMELTED = {IRON_BAR: IRON, COPPER_BAR: COPPER}
+LEVELS = (('1s', 1, 120), ('1m', 60, 120), ('10m', 600, 144)) # (name, seconds per bucket, buckets kept)
+
+class Telemetry:
+    def __init__(self, fps):
+        n = len(COUNTERS)
+        self.periods = [secs * fps for _, secs, _ in LEVELS] # Ticks per bucket
+        self.cur = np.zeros(n)
+        self.totals = np.zeros(n)
+        self.rings = [np.zeros((slots, n)) for _, _, slots in LEVELS]
+        self.now = 0
+
+    def add(self, i, n=1):
+        self.cur[i] += n
+
+    def on_event(self, category, key, n):
+        # NotificationBus subscriber: science and hand harvesting already pass through there
+        if category == 'science': self.cur[SCIENCE] += n
+        elif category == 'loot': self.cur[HARVESTED] += n
+
+    def tick(self):
+        cur = self.cur
+        if cur.any():
+            self.totals += cur
+            for period, ring in zip(self.periods, self.rings): ring[self.now // period % len(ring)] += cur
+            cur[:] = 0
+        self.now += 1
+        for period, ring in zip(self.periods, self.rings):
+            if self.now % period == 0: ring[self.now // period % len(ring)] = 0 # Next bucket starts empty
+
+    def bucket(self, level):
+        # Index of the bucket being filled; only the ones before it are complete
+        return self.now // self.periods[level]
+
+    def series(self, level, i):
+        # Per-second rates of counter i over the complete buckets, oldest first
+        ring = self.rings[level]
+        slots = len(ring)
+        b = self.bucket(level)
+        idx = np.arange(b - slots + 1, b) % slots
+        return ring[idx, i] / LEVELS[level][1]
+
+    def rate(self, level, i):
+        if self.bucket(level) == 0: return 0.0
+        ring = self.rings[level]
+        return float(ring[(self.bucket(level) - 1) % len(ring), i]) / LEVELS[level][1]
+
+    def snapshot(self):
+        # Plain dict for other processes: totals and the last complete bucket of each level as per-second rates
+        return {'totals': dict(zip(COUNTERS, self.totals.tolist())),
+                'rates': {name: {c: self.rate(lv, i) for i, c in enumerate(COUNTERS)} for lv, (name, _, _) in enumerate(LEVELS)}}
+
+def prometheus(sessions, workers=None):
+    # {session id: snapshot()} (+ optional {worker id: stats}) -> Prometheus text exposition format
+    out = ["# HELP terrasky_produced_total Units produced (energy in energy units) since the session started",
+           "# TYPE terrasky_produced_total counter"]
+    for sid, snap in sorted(sessions.items()):
+        for c, v in snap['totals'].items(): out.append(f'terrasky_produced_total{{session="{esc(sid)}",counter="{c}"}} {v:g}')
+    out += ["# HELP terrasky_rate_per_second Production rate over the last complete bucket of each window",
+            "# TYPE terrasky_rate_per_second gauge"]
+    for sid, snap in sorted(sessions.items()):
+        for window, rates in snap['rates'].items():
+            for c, v in rates.items(): out.append(f'terrasky_rate_per_second{{session="{esc(sid)}",counter="{c}",window="{window}"}} {v:g}')
+    if workers:
+        out += ["# HELP terrasky_worker_busy_ratio Share of wall time a worker spends ticking sessions",
+                "# TYPE terrasky_worker_busy_ratio gauge"]
+        for wid, st in sorted(workers.items()): out.append(f'terrasky_worker_busy_ratio{{worker="{wid}"}} {st["busy"]:g}')
+    return "\n".join(out) + "\n"
+
+def esc(s):
+    return str(s).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,50 @@
+# --- UPGRADE TREE ---
+# Research bought with science points. Each upgrade multiplies one stat of one
+# target: a building type, or 'player' for the SKY player's own regen and
+# energy cap. compile_table() folds the owned upgrades into one flat table of
+# multipliers per target. The game rebuilds that table (and the per-tick
+# numbers it derives from it) only when something is bought, so ticking
+# buildings never look at the tree.
+SPEED, ENERGY, REGEN, CAPACITY = range(4) # energy = per item made; regen = supply; capacity = buffer size
+STATS = {'speed': SPEED, 'energy': ENERGY, 'regen': REGEN, 'capacity': CAPACITY}
+TARGETS = ('furnace', 'solar', 'science_lab', 'belt', 'pole', 'drill', 'player')
+
+def make_tree(efficiency_mod, regen_mod, cap_mod):
+    # id -> (name, science cost, required ids, ((target, stat, factor), ...)); order = apply order
+    return {
+        'regen':      ("Solar Sails",        3,  (), (('player', 'regen', regen_mod),)),
+        'capacity':   ("Capacitor Banks",    3,  (), (('player', 'capacity', cap_mod),)),
+        'efficiency': ("Efficient Smelting", 5,  (), (('furnace', 'speed', efficiency_mod),)),
+        'photovoltaics': ("Photovoltaics",   6,  ('regen',), (('solar', 'regen', 1.5),)),
+        'buffers':    ("Machine Buffers",    6,  ('capacity',), (('furnace', 'capacity', 2.0), ('science_lab', 'capacity', 2.0))),
+        'insulation': ("Insulated Furnaces", 8,  ('efficiency',), (('furnace', 'energy', 0.75),)),
+        'automation': ("Lab Automation",     8,  ('efficiency',), (('science_lab', 'speed', 1.5),)),
+        'overclock':  ("Overclocking",       15, ('insulation', 'automation'),
+                       (('furnace', 'speed', 1.25), ('science_lab', 'speed', 1.25), ('furnace', 'energy', 1.25), ('science_lab', 'energy', 1.25))),
+    }
+
+def compile_table(tree, owned):
+    # {target: (speed, energy, regen, capacity)} with every owned effect applied in tree order
+    table = {t: [1.0, 1.0, 1.0, 1.0] for t in TARGETS}
+    for uid, (_, _, _, effects) in tree.items():
+        if not owned.get(uid): continue
+        for target, stat, factor in effects: table[target][STATS[stat]] *= factor
+    return {t: tuple(m) for t, m in table.items()}
+
+def status(tree, owned, uid, points):
+    # 'owned' | 'locked' (prerequisites missing) | 'poor' (can't afford) | 'open'
+    if owned.get(uid): return 'owned'
+    _, cost, needs, _ = tree[uid]
+    if not all(owned.get(n) for n in needs): return 'locked'
+    return 'open' if points >= cost else 'poor'
+
+def layout(tree):
+    # uid -> (column, row): column = depth in the prerequisite chain
+    col = {}
+    for uid, (_, _, needs, _) in tree.items(): # Prerequisites always come first
+        col[uid] = max((col[n] + 1 for n in needs), default=0)
+    rows, out = {}, {}
+    for uid, c in col.items():
+        out[uid] = (c, rows.get(c, 0))
+        rows[c] = rows.get(c, 0) + 1
+    return out
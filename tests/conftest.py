@@ -0,0 +1,49 @@
+# Determinism and validation checks (plain pytest, headless). Run from the repo root:
+#   python -m pytest tests
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+import main
+import items
+
+SEED = 1234
+
+def busy_world(seed=SEED, n=400, every=None, workers=None):
+    # A mixed base in rows across several LOD regions, in every state a machine can be in
+    g = main.Game(headless=True, seed=seed)
+    if every is not None: g.lod.every = every
+    if workers is not None: g.lod.offload = main.ShardLink(g, workers)
+    rng = random.Random(seed)
+    for i in range(n):
+        x, y = i % 80, (i // 80) * 2
+        if (x, y) in g.occupancy: continue
+        kind = rng.choice(('furnace', 'furnace', 'science_lab', 'solar'))
+        b = g.add_building(x, y, kind)
+        b.energy = rng.choice((0, 200, 5000, 7300, 40100, 400000))
+        if kind == 'furnace': b.slots.set(main.INPUT, rng.choice((items.IRON_ORE, items.COPPER_ORE, items.WOOD)), rng.randint(0, 5))
+        elif kind == 'science_lab': b.slots.set(main.INPUT, items.IRON_BAR, rng.randint(0, 3))
+    g.player.rect.topleft = (100, 100)
+    return g
+
+def play_script(g, ticks, seed=SEED, hook=None):
+    # Same walking, beaming and upgrades for every caller; hook(g, t) may add its own input
+    rng = random.Random(seed)
+    for t in range(ticks):
+        if t % 97 == 0: g.apply_commands([('move', 4 * rng.randint(-1, 1), 4 * rng.randint(-1, 1))])
+        if t % 131 == 0:
+            g.role = 'SKY'
+            g.input_sky_beam(rng.uniform(0, 2500), rng.uniform(0, 2500))
+            g.role = 'GROUND'
+        if t == ticks // 2:
+            g.science_points += 60
+            for u in ('efficiency', 'automation', 'insulation', 'capacity', 'buffers'): g.buy_upgrade(u)
+        if hook: hook(g, t)
+        g.update()
+    return g
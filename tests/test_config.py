@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import config
+
+@pytest.fixture
+def cfg_file(tmp_path):
+    path = tmp_path / 'terrasky.json'
+    path.write_text(json.dumps({'screen_width': 900, 'fps': 30}))
+    return str(path)
+
+def test_precedence(cfg_file):
+    c = config.parse(['--config', cfg_file], overrides={'screen_width': 720, 'map_w': 50})
+    assert (c.screen_width, c.fps, c.map_w) == (720, 30, 50) # Launcher beats the file
+    c = config.parse(['--config', cfg_file, '--set', 'fps=40', '--set', 'screen_width=800', '--screen-width', '1000'],
+                     overrides={'screen_width': 720})
+    assert (c.screen_width, c.fps) == (1000, 40)
+
+@pytest.mark.parametrize('key, value', [
+    ('start_energy', -1), ('beam_range', -5), ('beam_amount', -0.5), ('energy_cap', float('nan')),
+    ('solar_power', float('inf')), ('player_speed', 0), ('efficiency_mod', 0), ('fps', 0), ('sim_workers', -1),
+])
+def test_out_of_range_values_are_rejected(cfg_file, key, value):
+    with pytest.raises(config.ConfigError, match=key):
+        config.parse(['--config', cfg_file], overrides={key: value})
+
+@pytest.mark.parametrize('key, value', [('nope', 1), ('fps', 'fast'), ('fps', 1.5), ('fps', True)])
+def test_bad_keys_and_types_are_rejected(cfg_file, key, value):
+    with pytest.raises(config.ConfigError):
+        config.parse(['--config', cfg_file], overrides={key: value})
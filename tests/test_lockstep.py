@@ -0,0 +1,71 @@
+import random
+import socket
+import time
+
+import pytest
+
+import lockstep
+import network
+import replay
+from conftest import busy_world
+
+TICKS = 600
+
+@pytest.fixture
+def link():
+    srv = socket.create_server(('127.0.0.1', 0))
+    b = network.SocketTransport('127.0.0.1', srv.getsockname()[1])
+    a = network.SocketTransport(sock=srv.accept()[0])
+    srv.close()
+    yield a, b
+    a.close(); b.close()
+
+def ground_input(rng):
+    r = rng.random()
+    if r < 0.3: return [('move', rng.choice((-4, 0, 4)), rng.choice((-4, 0, 4)))]
+    if r < 0.33: return [('harvest',)]
+    if r < 0.34: return [('recipes',)]
+    if r < 0.36: return [('mdown', 600, 170 + 50 * rng.randrange(3), 1)]
+    if r < 0.37: return [('copy', 0, 10, 5, 14)]
+    if r < 0.38: return [('paste',)]
+    return []
+
+def sky_input(rng):
+    r = rng.random()
+    if r < 0.2: return [('beam', rng.randrange(0, 2000), rng.randrange(300, 700))]
+    if r < 0.25: return [('pan', rng.uniform(-9, 9), rng.uniform(-9, 9))]
+    if r < 0.26: return [('upgrade', rng.choice(('regen', 'capacity', 'efficiency')))]
+    if r < 0.27: return [('zoom', rng.choice((-1, 1)))]
+    if r < 0.3: return [('mdown', 600, 170, 1)] # Not SKY's: dropped before the wire
+    return []
+
+def test_lockstep_peers_stay_identical(link, tmp_path):
+    ta, tb = link
+    ga, gb = busy_world(every=1), busy_world(every=8) # LOD is local: peers may differ in it
+    for g in (ga, gb): g.science_points = 40
+    gb.role = 'SKY'
+    a = lockstep.Lockstep(ga, ta, 'GROUND', 4, 60)
+    b = lockstep.Lockstep(gb, tb, 'SKY', 4, 60)
+    a.detector.dump_dir = b.detector.dump_dir = str(tmp_path)
+    ra, rb, order = random.Random(7), random.Random(8), random.Random(9) # Uneven frame pacing
+    while a.tick < TICKS or b.tick < TICKS:
+        if a.tick < TICKS and order.random() < 0.8: a.submit(ground_input(ra)); a.step()
+        if b.tick < TICKS and order.random() < 0.8: b.submit(sky_input(rb)); b.step()
+    for _ in range(50): a.poll(); b.poll(); time.sleep(0.002) # Let the last hashes cross
+    assert not a.gone and not b.gone
+    assert not a.detector.desyncs and not b.detector.desyncs
+    assert replay.state_hash(ga) == replay.state_hash(gb)
+    assert {type(m.energy) for m in ga.buildings} == {int}
+
+def test_lockstep_drops_out_of_sequence_input(link):
+    ta, tb = link
+    a = lockstep.Lockstep(busy_world(n=0), ta, 'GROUND', 4, 60)
+    tb.send({'t': 'in', 'tick': 4, 'cmds': [['mdown', 600, 170, 1], ['zoom', 1], ['pan', 1e6, 0]]})
+    tb.send({'t': 'in', 'tick': 99, 'cmds': []})
+    for _ in range(500):
+        a.poll()
+        if a.gone: break
+        time.sleep(0.002)
+    assert a.gone
+    assert a.inputs['SKY'][4] == [('zoom', 1)] # GROUND's op and the oversized pan are filtered
+    assert a.peer_in == 5
@@ -0,0 +1,25 @@
+import pytest
+
+import replay
+from conftest import busy_world, play_script
+
+TICKS = 800
+
+def run(every):
+    hashes, lagged = [], set()
+    def hook(g, t):
+        lagged.update(r for r, n in g.lod.synced.items() if n < g.lod.now)
+        if t % 200 == 199: hashes.append(replay.state_hash(g))
+        if t == TICKS * 3 // 4: g.player.rect.topleft = (2000, 2000) # Hot regions go cold and back
+    g = play_script(busy_world(every=every), TICKS, hook=hook)
+    return (hashes, g.science_points, g.telemetry.totals.tolist()), len(lagged)
+
+@pytest.fixture(scope='module')
+def exact():
+    return run(1)[0]
+
+@pytest.mark.parametrize('every', [3, 8])
+def test_lod_catch_up_matches_per_tick(exact, every):
+    result, lagged = run(every)
+    assert lagged > 1 # Regions really were ticked coarsely
+    assert result == exact
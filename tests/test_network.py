@@ -0,0 +1,71 @@
+import pytest
+
+import main
+import network
+
+@pytest.mark.parametrize('cmd, role', [
+    (('move', 4, -4), 'GROUND'), (('mdown', 600.5, 170, 1), 'GROUND'), (('copy', 0, 1, 2, 3), 'GROUND'),
+    (('beam', 10, 20.5), 'SKY'), (('upgrade', 'regen'), 'SKY'), (('tree',), 'SKY'),
+])
+def test_valid_commands_pass(cmd, role):
+    assert network.valid_cmd(cmd, role)
+
+@pytest.mark.parametrize('cmd, role', [
+    (('move', 4, 4), 'SKY'), (('beam', 1, 1), 'GROUND'), (('mdown', 600, 170, 1), 'SKY'), (('role',), 'GROUND'),
+    (('nuke',), 'GROUND'), ((), 'GROUND'), ('move', 'GROUND'), ([1, 2], 'GROUND'), (('move', 4), 'GROUND'),
+    (('move', 4, 4, 4), 'GROUND'), (('move', 4.5, 0), 'GROUND'), (('move', True, 0), 'GROUND'),
+    (('move', 1 << 40, 0), 'GROUND'), (('pan', float('nan'), 0), 'SKY'), (('pan', float('inf'), 0), 'SKY'),
+    (('upgrade', 3), 'SKY'), (('mdown', '600', 170, 1), 'GROUND'),
+])
+def test_invalid_commands_fail(cmd, role):
+    assert not network.valid_cmd(cmd, role)
+
+def test_caps_on_size_and_rate():
+    limits = network.cmd_limits(main.PLAYER_SPEED)
+    s = main.PLAYER_SPEED
+    used = {}
+    cmds = [('move', s + 1, 0), ('move', s, -s), ('move', s, 0), ('harvest',), ('pan', 1e6, 0), ('pan', 5, 5)]
+    assert network.capped(cmds, limits, used) == [('move', s, -s), ('harvest',), ('pan', 5, 5)]
+    assert network.capped([('move', 1, 0)], limits, used) == [] # Same tick: the move is spent
+
+@pytest.fixture
+def hub():
+    return network.LoopbackHub()
+
+def join(hub, role, **kw):
+    link = hub.connect()
+    link.send({'t': 'join', 'session': 'x', 'role': role, **kw})
+    return link
+
+def test_session_applies_only_bounded_commands(hub):
+    ground, sky = join(hub, 'GROUND'), join(hub, 'SKY')
+    hub.tick()
+    g = hub.sessions['x'].game
+    x0 = g.player.rect.x
+    ground.send({'t': 'cmd', 'cmds': [['move', 600, 0]]}) # Teleport
+    for _ in range(5): ground.send({'t': 'cmd', 'cmds': [['move', 4, 0]] * 10}) # Speed hack
+    sky.send({'t': 'cmd', 'cmds': [['mdown', 600, 170, 1], ['pan', 1e6, 0]]})
+    hub.tick()
+    assert g.player.rect.x - x0 in (0, main.PLAYER_SPEED)
+    assert not g.win_recipe.visible and g.sky_cam_pos[0] < 1e6
+    x0 = g.player.rect.x
+    for _ in range(5): ground.send({'t': 'cmd', 'cmds': [['move', 4, 0]]}); hub.tick()
+    assert 0 < g.player.rect.x - x0 <= 5 * main.PLAYER_SPEED
+
+def test_malformed_frames_are_survived(hub):
+    ground = join(hub, 'GROUND')
+    hub.tick()
+    for msg in ([1, 2], {'t': 'cmd', 'cmds': 'x'}, {'t': 'cmd', 'cmds': [['move'], ['beam', 'a', 1], 7]}, {'t': 'hash'}):
+        ground.send(msg)
+        hub.tick()
+    assert not ground.closed and 'x' in hub.sessions
+
+def test_join_with_a_bad_seed_is_refused(hub):
+    link = join(hub, 'GROUND', seed='abc')
+    assert link.poll()[0]['t'] == 'error' and 'x' not in hub.sessions
+    link = join(hub, 'GROUND', seed=7)
+    assert hub.sessions['x'].seed == 7
+
+def test_join_seed():
+    assert network.join_seed('x', None) == network.session_seed('x')
+    assert network.join_seed('x', 'abc') is None and network.join_seed('x', True) is None
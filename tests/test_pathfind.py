@@ -0,0 +1,44 @@
+import random
+import time
+
+from pathfind import Pathfinder
+
+def lakes(n, seed):
+    rng = random.Random(seed)
+    walk = bytearray([1]) * (n * n)
+    for _ in range(n * n // 60):
+        x, y = rng.randrange(n), rng.randrange(n)
+        walk[y*n + x] = 0
+    return walk
+
+def test_requests_see_edits_made_between_them():
+    n = 96
+    walk = lakes(n, 1)
+    pf = Pathfinder(n, n, walk)
+    rng = random.Random(2)
+    try:
+        for _ in range(30):
+            for _ in range(20): # Edit the owner's grid, as Game.set_walk does
+                x, y = rng.randrange(n), rng.randrange(n)
+                walk[y*n + x] ^= 1
+                pf.mark(x, y)
+            a, b = (rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))
+            got = pf.request(a, b).result()
+            want = Pathfinder(n, n, bytearray(walk)).find(a, b)
+            assert (got is None) == (want is None)
+            if got: assert all(walk[y*n + x] for x, y in got)
+    finally:
+        pf.close()
+
+def test_close_stops_a_running_search():
+    n = 1024
+    walk = bytearray([1]) * (n * n)
+    walk[(n - 2) * n + n - 1] = walk[(n - 1) * n + n - 2] = 0 # Goal sealed off: the search floods the map
+    pf = Pathfinder(n, n, walk)
+    job = pf.request((0, 0), (n - 1, n - 1))
+    time.sleep(0.05)
+    assert job.running()
+    t0 = time.perf_counter()
+    pf.close()
+    assert job.result(timeout=5) is None
+    assert time.perf_counter() - t0 < 1
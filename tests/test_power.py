@@ -0,0 +1,75 @@
+import random
+
+import main
+from conftest import SEED
+
+def place(g, cells):
+    return [g.add_building(x, y, kind) for x, y, kind in cells]
+
+def check_grids(g):
+    # Grids are exactly the pole components, every machine sits on a grid one of its poles is on,
+    # and each grid's totals are the sum of its members
+    pw = g.power
+    poles = [b for b in g.buildings if b.b_type == 'pole']
+    comp = {}
+    for p in poles:
+        if p in comp: continue
+        comp[p], todo = p, [p]
+        while todo:
+            for o in pw._links(todo.pop()):
+                if o.b_type == 'pole' and o not in comp: comp[o] = p; todo.append(o)
+    for a in poles:
+        for b in poles: assert (comp[a] is comp[b]) == (a.grid is b.grid)
+    for b in g.buildings:
+        if b.b_type in ('pole', 'belt'): continue
+        near = list(pw._links(b))
+        if near: assert any(o.grid is b.grid for o in near)
+        else: assert b.grid is None
+    for gr in pw.grids:
+        assert all(m.grid is gr for m in gr.members)
+        assert gr.supply == sum(pw.producer_stats(m)[0] for m in gr.members)
+        assert gr.capacity == sum(pw.producer_stats(m)[1] for m in gr.members)
+        assert 0 <= gr.stored <= gr.capacity
+    assert pw.solars == sum(b.b_type == 'solar' for b in g.buildings)
+
+def test_removing_a_pole_splits_the_grid():
+    g = main.Game(headless=True, seed=SEED)
+    reach = main.POLE_REACH
+    poles = place(g, [(10 + i * reach, 10, 'pole') for i in range(3)])
+    solars = place(g, [(10 + i * reach, 11, 'solar') for i in range(3)])
+    assert len(g.power.grids) == 1
+    for _ in range(50): g.update()
+    stored = poles[0].grid.stored
+    g.remove_building(poles[1])
+    assert len(g.power.grids) == 2 and poles[0].grid is not poles[2].grid
+    assert solars[1].grid is None # Its only pole is gone
+    assert sum(gr.stored for gr in g.power.grids) <= stored
+    check_grids(g)
+    place(g, [(10 + reach, 10, 'pole')])
+    assert len(g.power.grids) == 1
+    check_grids(g)
+
+def test_machine_in_range_of_two_grids_does_not_join_them():
+    g = main.Game(headless=True, seed=SEED)
+    g.power.reach = 2 # Poles 4 apart are out of reach but share a machine between them
+    s = g.power.supply
+    a, b = place(g, [(10, 10, 'pole'), (10 + 2 * s, 10, 'pole')])
+    m, = place(g, [(10 + s, 10, 'furnace')])
+    assert a.grid is not b.grid and m.grid in (a.grid, b.grid)
+    g.remove_building(m)
+    assert a.grid is not b.grid
+    check_grids(g)
+
+def test_random_edits_keep_grids_consistent():
+    g = main.Game(headless=True, seed=SEED)
+    g.power.reach = 3
+    rng = random.Random(1)
+    for step in range(2000):
+        if rng.random() < 0.65 or not g.occupancy:
+            x, y = rng.randrange(5, 60), rng.randrange(5, 60)
+            if (x, y) not in g.occupancy: g.add_building(x, y, rng.choice(('pole', 'pole', 'solar', 'furnace', 'drill', 'belt')))
+        else:
+            g.remove_building(g.occupancy[rng.choice(sorted(g.occupancy))])
+        if step % 10 == 0: g.power.update()
+        if step % 100 == 0: check_grids(g)
+    check_grids(g)
@@ -0,0 +1,38 @@
+import gzip
+import random
+
+import main
+import replay
+from conftest import SEED
+
+def record(path, ticks=600):
+    g = main.Game(headless=True, seed=SEED)
+    rec = replay.Recorder(str(path), g)
+    rng = random.Random(3)
+    script = [[('recipes',)], [('mdown', 700, 175, 1)], [('recipes',)], [('inv',)], [('mdown', 150, 280, 1)],
+              [('mdown', 200, 185, 1)], [('inv',)], [('role',)]]
+    for t in range(ticks):
+        cmds = list(script[t // 50]) if t % 50 == 0 and t // 50 < len(script) else []
+        if t < 300 and t % 3 == 0: cmds += [('move', rng.choice((-4, 0, 4)), rng.choice((-4, 0, 4))), ('harvest',)]
+        if t > 400 and t % 7 == 0: cmds.append(('beam', g.player.rect.x + rng.randint(-20, 20), g.player.rect.y + 5))
+        g.apply_commands(cmds)
+        rec.record(cmds)
+        g.update()
+    rec.close()
+    return g
+
+def test_replay_matches_recording(tmp_path):
+    path = tmp_path / 'r.log.gz'
+    g = record(path)
+    played, n, h, end = replay.play(str(path))
+    assert end == (600, replay.state_hash(g))
+    assert (n, h) == end
+
+def test_replay_notices_changed_input(tmp_path):
+    path = tmp_path / 'r.log.gz'
+    record(path)
+    with gzip.open(path, 'rt') as f: lines = f.readlines()
+    lines = [l.replace('"move",-4,', '"move",4,') for l in lines] # Walk the other way
+    with gzip.open(path, 'wt') as f: f.writelines(lines)
+    _, _, h, end = replay.play(str(path))
+    assert h != end[1]
@@ -0,0 +1,38 @@
+import pytest
+
+import replay
+from conftest import busy_world, play_script
+
+TICKS = 800
+
+def run(every, workers=None):
+    hashes, offloaded = [], set()
+    def hook(g, t):
+        offloaded.update(g.lod.out)
+        if t % 200 == 199: hashes.append(replay.state_hash(g))
+    g = busy_world(every=every, workers=workers)
+    try: play_script(g, TICKS, hook=hook)
+    finally:
+        if workers is not None: g.lod.offload.pool.close()
+    return (hashes, g.science_points, g.telemetry.totals.tolist()), len(offloaded)
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_sharded_sim_matches_in_process(workers):
+    # 0 workers: the shard kernel on this thread; 2: worker processes on shared memory
+    result, offloaded = run(8, workers)
+    assert offloaded > 1
+    assert result == run(8)[0]
+
+def test_pool_grows_without_respawning_workers():
+    from items import IRON_ORE, EMPTY
+    from shard import ShardPool, FURNACE
+    pool = ShardPool(2, 4)
+    try:
+        pids = [p.pid for p in pool.procs]
+        for _ in range(40):
+            pool.add(type('Row', (), {})(), FURNACE, 10 ** 9, 0, IRON_ORE, 50, EMPTY, 0)
+            pool.tick(500, 1, 500, 180)
+        assert pool.cap == 64 and [p.pid for p in pool.procs] == pids
+        assert pool.tick(500, 1, 500, 180)[1] == 40 # Every row still smelts after the regrowths
+    finally:
+        pool.close()
@@ -0,0 +1,45 @@
+import main
+import statehash
+from conftest import SEED
+
+def twins(tmp_path):
+    a, b = (main.Game(headless=True, seed=SEED) for _ in range(2))
+    return (a, statehash.DesyncDetector(a.hasher, 'a', 60, str(tmp_path))), (b, statehash.DesyncDetector(b.hasher, 'b', 60, str(tmp_path)))
+
+def test_desync_is_caught_at_the_next_check(tmp_path):
+    (a, da), (b, db) = twins(tmp_path)
+    found = None
+    for t in range(1, 600):
+        for g in (a, b):
+            if t % 5 == 0: g.apply_commands([('beam', g.player.rect.x, g.player.rect.y)])
+            g.update()
+        if t == 250: b.science_points += 1
+        ma, mb = da.local(t), db.local(t)
+        if ma and da.check('b', mb) is False:
+            found = t
+            break
+    assert found == 300
+    assert len(da.desyncs) == 1 and (tmp_path / f"desync_a_t300_vs_b.json").exists()
+
+def test_incremental_hash_equals_fresh(tmp_path):
+    (a, _), _ = twins(tmp_path)
+    for t in range(200):
+        if t % 5 == 0: a.apply_commands([('beam', a.player.rect.x, a.player.rect.y)])
+        a.update()
+    fresh = statehash.StateHash()
+    for k, o in a.hasher.objs.items(): fresh.set(k, o.hash_state())
+    fresh.set(('terrain',), repr(sorted(a.tile_map.items())))
+    assert fresh.digest() == a.hasher.digest()
+
+def test_peer_hash_messages_are_checked_and_bounded(tmp_path):
+    d = statehash.DesyncDetector(statehash.StateHash(), 'x', 60, str(tmp_path))
+    b = [0] * statehash.BUCKETS
+    for bad in ([1], {'tick': 60}, {'tick': 60, 'h': -1, 'b': b}, {'tick': 60, 'h': 1, 'b': b[:-1]},
+                {'tick': True, 'h': 1, 'b': b}, {'tick': 61, 'h': 1, 'b': b}, {'tick': 60 * 10 ** 6, 'h': 1, 'b': b}):
+        assert d.check('p', bad) is None
+    assert d.n_early == 0
+    for i in range(10000): d.check(f"p{i}", {'tick': 60 * (1 + i % 16), 'h': 1, 'b': b})
+    assert d.n_early == sum(map(len, d.early.values())) == d.keep * 4
+    for t in range(60, 1200, 60): d.local(t)
+    assert d.n_early == 0 and not d.early
+    assert len(d.desyncs) == d.keep * 4 # Each early message compared once, no more